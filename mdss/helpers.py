@@ -1,24 +1,45 @@
 import yaml
-import pandas as pd
 import importlib.resources as resources
 import re
 import os, subprocess
+import glob
+import time
+import math
+import json
+import fcntl
+import numpy as np
 from mdss.yaml_config import ref_sim_info, ref_hpc_info, ref_hierarchy_info, ref_case_info, ref_geometry_info, ref_exp_set_info
-from mdss.templates import gl_job_script
+from mdss.output_writer import write_yaml_file
+from mdss.watchdog import get_watchdog_criteria
+from mdss.templates import gl_job_script, gl_array_job_script, gl_task_job_script, gl_merge_job_script
 
 ################################################################################
 # Helper Functions
 ################################################################################
-def load_yaml_file(yaml_file, comm):
+def get_comm():
+    """
+    Returns the MPI communicator of all the processors, `MPI.COMM_WORLD`.
+
+    `mpi4py` is imported on the first call, as importing it initializes MPI. Modules that only read results or validate inputs can then be imported without it.
+
+    Outputs
+    -------
+    **MPI.Comm**
+        The communicator `MPI.COMM_WORLD`.
+    """
+    from mpi4py import MPI
+    return MPI.COMM_WORLD
+
+def read_yaml_file(yaml_file):
     """
-    Loads a YAML file and returns its content as a dictionary.
+    Reads a YAML file and returns its content as a dictionary.
 
     This function attempts to read the specified YAML file and parse its content into a Python dictionary. If the file cannot be loaded due to errors, it provides a detailed error message.
 
     Inputs
     ----------
     - **yaml_file** : str
-        Path to the YAML file to be loaded.
+        Path to the YAML file to be read.
 
     Outputs
     -------
@@ -32,51 +53,87 @@ def load_yaml_file(yaml_file, comm):
         return dict_info
     except FileNotFoundError:
         # Handle the case where the YAML file is not found
-        if comm.rank == 0:  # Only the root process prints this error
-            print(f"FileNotFoundError: The info file '{yaml_file}' was not found.")
+        print(f"FileNotFoundError: The info file '{yaml_file}' was not found.")
     except yaml.YAMLError as ye:
         # Errors in YAML parsing
-        if comm.rank == 0:  # Only the root process prints this error
-            print(f"YAMLError: There was an issue reading '{yaml_file}'. Check the YAML formatting. Error: {ye}")
+        print(f"YAMLError: There was an issue reading '{yaml_file}'. Check the YAML formatting. Error: {ye}")
     except Exception as e:
         # General error catch in case of other unexpected errors
-        if comm.rank == 0:  # Only the root process prints this error
-            print(f"An unexpected error occurred while loading the info file: {e}")
+        print(f"An unexpected error occurred while loading the info file: {e}")
     return None
 
-def load_csv_data(csv_file, comm):
+def load_yaml_file(yaml_file, comm):
+    """
+    Loads a YAML file and returns its content as a dictionary on all the ranks of a communicator.
+
+    The file is read and parsed once on the root rank, and the parsed dictionary is broadcast to the other ranks, so a large series does not have every rank hit the filesystem.
+
+    Inputs
+    ----------
+    - **yaml_file** : str
+        Path to the YAML file to be loaded.
+    - **comm** : MPI.Comm
+        Communicator of the ranks that need the content. All of its ranks must call this function. Use `MPI.COMM_SELF` to read the file on a single rank.
+
+    Outputs
+    -------
+    **dict or None**
+        A dictionary containing the content of the YAML file if successful, or None if an error occurs.
+    """
+    dict_info = read_yaml_file(yaml_file) if comm.rank == 0 else None
+    return comm.bcast(dict_info, root=0)
+
+def read_csv_data(csv_file):
     """
-    Loads a CSV file and returns its content as a Pandas DataFrame.
+    Reads a CSV file and returns its content as a Pandas DataFrame.
 
     This function reads the specified CSV file and converts its content into a Pandas DataFrame. It handles common errors such as missing files, empty files, or parsing issues.
 
     Inputs
     ----------
     - **csv_file** : str
-        Path to the CSV file to be loaded.
+        Path to the CSV file to be read.
 
     Outputs
     -------
     **pandas.DataFrame or None**
         A DataFrame containing the content of the CSV file if successful, or None if an error occurs.
-"""
+    """
+    import pandas as pd # Imported here, as validating inputs and writing job scripts do not need it
     try:
         df = pd.read_csv(csv_file)
         return df
     except FileNotFoundError:
-        if comm.rank == 0:
-            print(f"Warning: The file '{csv_file}' was not found. Please check the file path.")
+        print(f"Warning: The file '{csv_file}' was not found. Please check the file path.")
     except pd.errors.EmptyDataError:
-        if comm.rank == 0:
-            print("Error: The file is empty. Please check if data has been written correctly.")
+        print("Error: The file is empty. Please check if data has been written correctly.")
     except pd.errors.ParserError:
-        if comm.rank == 0:
-            print("Error: The file could not be parsed. Please check the file format.")
+        print("Error: The file could not be parsed. Please check the file format.")
     except Exception as e:
-        if comm.rank == 0:
-            print(f"An unexpected error occurred: {e}")
+        print(f"An unexpected error occurred: {e}")
     return None # In case of error, return none.
 
+def load_csv_data(csv_file, comm):
+    """
+    Loads a CSV file and returns its content as a Pandas DataFrame on all the ranks of a communicator.
+
+    The file is read once on the root rank, and the DataFrame is broadcast to the other ranks.
+
+    Inputs
+    ----------
+    - **csv_file** : str
+        Path to the CSV file to be loaded.
+    - **comm** : MPI.Comm
+        Communicator of the ranks that need the content. All of its ranks must call this function.
+
+    Outputs
+    -------
+    **pandas.DataFrame or None**
+        A DataFrame containing the content of the CSV file if successful, or None if an error occurs.
+    """
+    df = read_csv_data(csv_file) if comm.rank == 0 else None
+    return comm.bcast(df, root=0)
+
 def check_input_yaml(yaml_file):
     """
     Validates the structure of the input YAML file against predefined templates.
@@ -85,8 +142,8 @@ def check_input_yaml(yaml_file):
 
     Inputs
     ----------
-    - **yaml_file** : str
-        Path to the YAML file to be validated.
+    - **yaml_file** : str or dict
+        Path to the YAML file to be validated, or its already parsed content.
 
     Outputs
     ------
@@ -98,24 +155,69 @@ def check_input_yaml(yaml_file):
     - Uses `ref_sim_info`, `ref_hpc_info`, and other reference pydantic models listed in `yaml_config.py` for validation.
     - Ensures hierarchical consistency by iterating through all levels of the YAML structure.
     """
-    with open(yaml_file, 'r') as file:
-        sim_info = yaml.safe_load(file)
+    if isinstance(yaml_file, dict):
+        sim_info = yaml_file
+    else:
+        with open(yaml_file, 'r') as file:
+            sim_info = yaml.safe_load(file)
 
     ref_sim_info.model_validate(sim_info)
     if sim_info['run_as_subprocess']=='yes':
         if 'nproc' not in sim_info or not isinstance(sim_info['nproc'], int):
             raise ValueError("'nproc' must be provided as an integer when 'run_as_subprocess' is 'yes'")
+        if sim_info.get('groups', 1) > 1:
+            raise ValueError("'groups' cannot be more than 1 when 'run_as_subprocess' is 'yes'")
     if sim_info['hpc'] == 'yes':
         ref_hpc_info.model_validate(sim_info['hpc_info'])
+    get_output_artifacts(sim_info) # Raises an error if the output profile or artifacts are not valid
+    if get_watchdog_criteria(sim_info) is not None and sim_info['run_as_subprocess'] != 'yes' and 'MDSS_SPAWN_TIME' not in os.environ: # Subprocesses are watched by their parent
+        print("Warning: 'watchdog' only stops simulations early when 'run_as_subprocess' is 'yes'. Simulations run in-process still run to 'nCycles', and the watchdog only records why they failed.")
     for hierarchy, hierarchy_info in enumerate(sim_info['hierarchies']): # loop for Hierarchy level
         ref_hierarchy_info.model_validate(hierarchy_info)
         for case, case_info in enumerate(hierarchy_info['cases']): # loop for cases in hierarchy
             ref_case_info.model_validate(case_info)
             ref_geometry_info.model_validate(case_info['geometry_info'])
+            check_retry_ladder(case_info) # Raises an error if the retry ladder is not valid
             for exp_set, exp_info in enumerate(case_info['exp_sets']): # loop for experimental datasets that may present
                 ref_exp_set_info.model_validate(exp_info)
 
-def write_python_file(fname):
+def load_input_yaml(yaml_file, comm):
+    """
+    Loads and validates the input YAML file once on the root rank, and returns its content on all the ranks of a communicator.
+
+    Inputs
+    ----------
+    - **yaml_file** : str
+        Path to the input YAML file.
+    - **comm** : MPI.Comm
+        Communicator of the ranks that need the content. All of its ranks must call this function.
+
+    Outputs
+    -------
+    **dict**
+        Content of the input YAML file.
+
+    Notes
+    -----
+    - The file is validated with `check_input_yaml()`. If it cannot be read or is not valid, the error is raised on all the ranks, so none of them is left waiting for the others.
+    - The root rank raises the original error, and the other ranks raise a `ValueError` with its message, as validation errors cannot always be broadcast.
+    """
+    sim_info, error = None, None
+    if comm.rank == 0:
+        try:
+            with open(yaml_file, 'r') as file:
+                sim_info = yaml.safe_load(file)
+            check_input_yaml(sim_info)
+        except Exception as e:
+            error = e
+    sim_info, error_message = comm.bcast((sim_info, None if error is None else f"{type(error).__name__}: {error}"), root=0)
+    if error is not None:
+        raise error
+    if error_message is not None:
+        raise ValueError(f"The input file '{yaml_file}' could not be loaded on the root rank. {error_message}")
+    return sim_info
+
+def write_python_file(fname, mode='run'):
     """
     Generates a Python script to run simulations on an HPC cluster.
 
@@ -125,21 +227,34 @@ def write_python_file(fname):
     ----------
     - **fname** : str
         Path where the Python script should be saved.
+    - **mode** : str, optional
+        `run` to run the simulations (default), `array_task` to run a single task of a Slurm job array, `job` to run the tasks of a single job of the task manifest, and `merge` to collect the results of the jobs.
 
     Notes
     -----
     - The generated script uses argparse to accept input YAML files.
     - It imports the `run_sim` class and runs the simulation using `run_problem` method.
+    - The `array_task` and `job` scripts also accept the task manifest, and the indices of the wave and task, or of the job to run.
     """
-    python_code = """
+    run_calls = {
+        'run': "sim.run_problem() # Run the simulation",
+        'array_task': "sim.run_array_task(args.manifest, args.wave, args.taskIndex) # Run a single task of the job array",
+        'job': "sim.run_manifest_job(args.manifest, args.job) # Run the tasks of a single job",
+        'merge': "sim.run_problem(collect_only=True) # Collect the results of the job array",
+    }
+    python_code = f"""
 import argparse
 from mdss.run_sim import run_sim
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--inputFile", type=str)
+parser.add_argument("--manifest", type=str)
+parser.add_argument("--wave", type=int)
+parser.add_argument("--taskIndex", type=int)
+parser.add_argument("--job", type=int)
 args = parser.parse_args()
 sim = run_sim(args.inputFile) # Input the simulation info and output dir
-sim.run_problem() # Run the simulation
+{run_calls[mode]}
         """
     # Open the file in write mode
     with open(fname, "w") as file:
@@ -209,9 +324,846 @@ def write_job_script(sim_info, out_dir, out_file, python_file_path, yaml_file_pa
 
         return job_script_path
     
+def write_array_job_script(sim_info, out_dir, wave, n_tasks, python_file_path, yaml_file_path, manifest_path):
+    """
+    Generates a Slurm job array script that runs one wave of the task manifest, with one array task per solve task.
+
+    Inputs
+    ------
+    - **sim_info** : dict
+        Dictionary containing simulation details details.
+    - **out_dir** : str
+        Directory where the job script and output files will be saved.
+    - **wave** : int
+        Index of the wave in the task manifest.
+    - **n_tasks** : int
+        Number of tasks in the wave.
+    - **python_file_path** : str
+        Path to the Python script run by each array task.
+    - **yaml_file_path** : str
+        Path to the YAML file containing simulation information.
+    - **manifest_path** : str
+        Path to the task manifest.
+
+    Outputs
+    -------
+    - **str**
+        Path to the generated job script.
+
+    Notes
+    -----
+    - Each array task uses `task_nproc` processors and `task_time` from `hpc_info`, which default to `nproc` and `time`.
+    - If `array_limit` is given in `hpc_info`, at most that many array tasks run at the same time.
+    """
+    hpc_info = sim_info['hpc_info']
+    if hpc_info['cluster'] == 'GL':
+        array_limit = hpc_info.get('array_limit')
+        job_script = gl_array_job_script.format(
+            job_name=f"{hpc_info['job_name']}_wave{wave}",
+            last_index=n_tasks - 1,
+            array_limit=f"%{array_limit}" if array_limit else "",
+            nproc=hpc_info.get('task_nproc') or hpc_info['nproc'],
+            mem_per_cpu=hpc_info.get('mem_per_cpu', '1000m'),
+            time=hpc_info.get('task_time') or hpc_info.get('time', '1:00:00'),
+            account_name=hpc_info['account_name'],
+            email_id=hpc_info['email_id'],
+            out_dir=out_dir,
+            out_file=f"array_wave{wave}_%a.txt",
+            python_file_path=python_file_path,
+            yaml_file_path=yaml_file_path,
+            manifest_path=manifest_path,
+            wave=wave,
+        )
+
+        job_script_path = f"{out_dir}/{hpc_info['job_name']}_wave{wave}.sh"
+        with open(job_script_path, "w") as file:
+            file.write(job_script)
+
+        return job_script_path
+
+def write_task_job_script(sim_info, out_dir, job_index, job_time, python_file_path, yaml_file_path, manifest_path):
+    """
+    Generates a Slurm job script that runs one job of the task manifest, holding several solve tasks that are run one after the other.
+
+    Inputs
+    ------
+    - **sim_info** : dict
+        Dictionary containing simulation details details.
+    - **out_dir** : str
+        Directory where the job script and output files will be saved.
+    - **job_index** : int
+        Index of the job in the task manifest.
+    - **job_time** : str
+        Time requested for the job in D-H:M:S format.
+    - **python_file_path** : str
+        Path to the Python script run by the job.
+    - **yaml_file_path** : str
+        Path to the YAML file containing simulation information.
+    - **manifest_path** : str
+        Path to the task manifest.
+
+    Outputs
+    -------
+    - **str**
+        Path to the generated job script.
+    """
+    hpc_info = sim_info['hpc_info']
+    if hpc_info['cluster'] == 'GL':
+        job_script = gl_task_job_script.format(
+            job_name=f"{hpc_info['job_name']}_job{job_index}",
+            nproc=hpc_info.get('task_nproc') or hpc_info['nproc'],
+            mem_per_cpu=hpc_info.get('mem_per_cpu', '1000m'),
+            time=job_time,
+            account_name=hpc_info['account_name'],
+            email_id=hpc_info['email_id'],
+            out_dir=out_dir,
+            out_file=f"job{job_index}_out.txt",
+            python_file_path=python_file_path,
+            yaml_file_path=yaml_file_path,
+            manifest_path=manifest_path,
+            job_index=job_index,
+        )
+
+        job_script_path = f"{out_dir}/{hpc_info['job_name']}_job{job_index}.sh"
+        with open(job_script_path, "w") as file:
+            file.write(job_script)
+
+        return job_script_path
+
+def write_merge_job_script(sim_info, out_dir, out_file, python_file_path, yaml_file_path):
+    """
+    Generates a Slurm job script that merges the results of a job array into the overall simulation info file.
+
+    Inputs
+    ------
+    - **sim_info** : dict
+        Dictionary containing simulation details details.
+    - **out_dir** : str
+        Directory where the job script and output files will be saved.
+    - **out_file** : str
+        Name of the file to store job output.
+    - **python_file_path** : str
+        Path to the Python script collecting the results.
+    - **yaml_file_path** : str
+        Path to the YAML file containing simulation information.
+
+    Outputs
+    -------
+    - **str**
+        Path to the generated job script.
+    """
+    hpc_info = sim_info['hpc_info']
+    if hpc_info['cluster'] == 'GL':
+        job_script = gl_merge_job_script.format(
+            job_name=f"{hpc_info['job_name']}_merge",
+            mem_per_cpu=hpc_info.get('mem_per_cpu', '1000m'),
+            time=hpc_info.get('merge_time', '0:30:00'),
+            account_name=hpc_info['account_name'],
+            email_id=hpc_info['email_id'],
+            out_dir=out_dir,
+            out_file=out_file,
+            python_file_path=python_file_path,
+            yaml_file_path=yaml_file_path,
+        )
+
+        job_script_path = f"{out_dir}/{hpc_info['job_name']}_merge.sh"
+        with open(job_script_path, "w") as file:
+            file.write(job_script)
+
+        return job_script_path
+
+def submit_job(job_script_path, dependency=None):
+    """
+    Submits a job script with `sbatch` and returns the job ID.
+
+    Inputs
+    ------
+    - **job_script_path** : str
+        Path to the job script.
+    - **dependency** : str, optional
+        Slurm dependency of the job, such as `afterany:<job_id>`.
+
+    Outputs
+    -------
+    **str**
+        ID of the submitted job.
+    """
+    command = ["sbatch", "--parsable"]
+    if dependency is not None:
+        command.append(f"--dependency={dependency}")
+    command.append(job_script_path)
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return output.strip().split(';')[0] # The cluster name follows the job ID on federated clusters
+
+def set_solver_option(aero_options, option, value):
+    """
+    Sets an ADflow solver option in a dictionary of solver options.
+
+    ADflow options are case insensitive, so any existing entry that differs from `option` only in case is removed before the new value is set. Otherwise, the entry that comes last in the dictionary would be the one used by ADflow.
+
+    Inputs
+    ------
+    - **aero_options** : dict
+        Dictionary of ADflow solver options. Modified in place.
+    - **option** : str
+        Name of the option.
+    - **value** : any
+        Value of the option.
+    """
+    for key in [key for key in aero_options if key.lower() == option.lower()]:
+        del aero_options[key]
+    aero_options[option] = value
+
+def get_solver_option(aero_options, option, default=None):
+    """
+    Gets the value of an ADflow solver option from a dictionary of solver options, ignoring the case of the option name.
+
+    Inputs
+    ------
+    - **aero_options** : dict
+        Dictionary of ADflow solver options.
+    - **option** : str
+        Name of the option.
+    - **default** : any, optional
+        Value returned if the option is not in the dictionary.
+
+    Outputs
+    -------
+    **any**
+        Value of the option. If there are several entries differing only in case, the last one is returned as it is the one used by ADflow.
+    """
+    value = default
+    for key in aero_options:
+        if key.lower() == option.lower():
+            value = aero_options[key]
+    return value
+
+################################################################################
+# Helper Functions for warm starting the simulations
+################################################################################
+def get_continuation_order(aoa_list):
+    """
+    Orders the angles of attack for a continuation sweep.
+
+    The sweep starts at the angle of attack closest to zero, where the flow is most likely to converge from free stream, marches up to the largest angle, and then marches down from the starting angle to the smallest one. This way every angle of attack, except the first one, follows a neighbor that was solved before it.
+
+    Inputs
+    ------
+    - **aoa_list** : list
+        List of angles of attack.
+
+    Outputs
+    -------
+    **list**
+        Angles of attack in the order they should be run.
+    """
+    sorted_aoa_list = sorted(aoa_list, key=float)
+    start = min(range(len(sorted_aoa_list)), key=lambda ii: abs(float(sorted_aoa_list[ii])))
+    return sorted_aoa_list[start:] + sorted_aoa_list[:start][::-1]
+
+def find_restart_file(aoa_out_dir):
+    """
+    Finds the most recent ADflow volume solution in an angle of attack directory.
+
+    Inputs
+    ------
+    - **aoa_out_dir** : str
+        Directory where the outputs of an angle of attack are stored.
+
+    Outputs
+    -------
+    **str or None**
+        Path to the volume solution file, or None if there is no volume solution in the directory.
+    """
+    vol_files = glob.glob(f"{aoa_out_dir}/*_vol.cgns")
+    if not vol_files:
+        return None
+    return max(vol_files, key=os.path.getmtime)
+
+def get_converged_solutions(refinement_level_dir):
+    """
+    Scans the angle of attack directories of a refinement level for converged solutions that can be used to warm start other angles of attack.
+
+    Inputs
+    ------
+    - **refinement_level_dir** : str
+        Directory of the refinement level.
+
+    Outputs
+    -------
+    **dict**
+        Dictionary with angle of attack (float) as keys, and the path to its volume solution as values.
+    """
+    converged_solutions = {}
+    if not os.path.isdir(refinement_level_dir):
+        return converged_solutions
+    for entry in os.listdir(refinement_level_dir):
+        aoa_info_file = f"{refinement_level_dir}/{entry}/{entry}.yaml"
+        if not entry.startswith('aoa_') or not os.path.isfile(aoa_info_file):
+            continue
+        try:
+            with open(aoa_info_file, 'r') as aoa_file:
+                aoa_sim_info = yaml.safe_load(aoa_file)
+            fail_flag = aoa_sim_info['fail_flag']
+            aoa = float(aoa_sim_info['AOA'])
+        except Exception:
+            continue
+        restart_file = find_restart_file(f"{refinement_level_dir}/{entry}")
+        if fail_flag == 0 and restart_file is not None:
+            converged_solutions[aoa] = restart_file
+    return converged_solutions
+
+def get_nearest_aoa(aoa, converged_aoa_list):
+    """
+    Finds the converged angle of attack that is closest to the given angle of attack.
+
+    Inputs
+    ------
+    - **aoa** : float
+        Angle of attack to be warm started.
+    - **converged_aoa_list** : list
+        Angles of attack with converged solutions.
+
+    Outputs
+    -------
+    **float or None**
+        The closest converged angle of attack, or None if there are no converged angles of attack.
+    """
+    if not converged_aoa_list:
+        return None
+    return min(converged_aoa_list, key=lambda converged_aoa: abs(float(converged_aoa) - float(aoa)))
+
+################################################################################
+# Helper Functions for reading the simulation results
+################################################################################
+def read_aoa_results(aoa_info_file, aoa_out_dir):
+    """
+    Reads the results of an angle of attack from its simulation info file.
+
+    Inputs
+    ------
+    - **aoa_info_file** : str
+        Path to the `aoa_<aoa>.yaml` file written after the simulation of the angle of attack.
+    - **aoa_out_dir** : str
+        Directory where the outputs of the angle of attack are stored.
+
+    Outputs
+    -------
+    **dict or None**
+        Dictionary with `cl`, `cd`, `wall_time`, `fail_flag` and `out_dir` to be stored in the overall simulation info file, or None if the file does not exist or is not readable.
+    """
+    try:
+        with open(aoa_info_file, 'r') as aoa_file:
+            aoa_sim_info = yaml.safe_load(aoa_file)
+        aoa_level_dict = {
+            'cl': float(aoa_sim_info['cl']),
+            'cd': float(aoa_sim_info['cd']),
+            'wall_time': aoa_sim_info['wall_time'],
+            'fail_flag': int(aoa_sim_info['fail_flag']),
+            'out_dir': aoa_out_dir,
+        }
+    except Exception:
+        return None
+    return aoa_level_dict
+
+def read_aoa_input_hash(aoa_info_file):
+    """
+    Reads the hash of the inputs recorded in the simulation info file of an angle of attack.
+
+    Inputs
+    ------
+    - **aoa_info_file** : str
+        Path to the `aoa_<aoa>.yaml` file written after the simulation of the angle of attack.
+
+    Outputs
+    -------
+    **str or None**
+        Hash of the inputs of the simulation, or None if the file does not exist or has no hash.
+    """
+    try:
+        with open(aoa_info_file, 'r') as aoa_file:
+            return yaml.safe_load(aoa_file).get('input_hash')
+    except Exception:
+        return None
+
+def read_aoa_info(aoa_info_file):
+    """
+    Reads the simulation info file of an angle of attack, with the same entries as its journal record.
+
+    Inputs
+    ------
+    - **aoa_info_file** : str
+        Path to the `aoa_<aoa>.yaml` file written after the simulation of the angle of attack.
+
+    Outputs
+    -------
+    **dict or None**
+        Simulation info of the angle of attack, with `wall_time` and `artifact_time` in seconds, or None if the file does not exist or is not readable.
+    """
+    try:
+        with open(aoa_info_file, 'r') as aoa_file:
+            aoa_sim_info = yaml.safe_load(aoa_file)
+        for field in ('wall_time', 'artifact_time'):
+            if field in aoa_sim_info:
+                aoa_sim_info[field] = float(str(aoa_sim_info[field]).replace(" sec", ""))
+    except Exception:
+        return None
+    return aoa_sim_info
+
+################################################################################
+# Helper Functions for the output artifacts of the simulations
+################################################################################
+# Artifacts written for each angle of attack by each output profile, and the angles of attack they are written for:
+# 'all', 'first' (the first angle of attack run at each refinement level) or 'none'
+output_profiles = {
+    'lean': {'n2': 'none', 'listings': 'none', 'tecplot_surface': 'none', 'history': 'all'},
+    'standard': {'n2': 'first', 'listings': 'none', 'tecplot_surface': 'all', 'history': 'all'},
+    'debug': {'n2': 'all', 'listings': 'all', 'tecplot_surface': 'all', 'history': 'all'},
+}
+artifact_files = {'n2': ['mphys_aero.html'], 'tecplot_surface': ['*_surf.plt', '*_surf.dat'], 'history': ['aoa_*_history.npz']} # Files written for the artifacts
+
+def get_output_artifacts(sim_info):
+    """
+    Returns the artifacts to write for each angle of attack, from the output profile and the artifacts set by the user.
+
+    Inputs
+    ------
+    - **sim_info** : dict
+        Dictionary containing simulation details, with the optional `output_profile` and `output_artifacts` entries.
+
+    Outputs
+    -------
+    **dict**
+        When to write each artifact (`all`, `first` or `none`), keyed by `n2` (OpenMDAO N2 diagram), `listings` (lists of the model inputs and outputs), `tecplot_surface` (ADflow Tecplot surface solution) and `history` (convergence history of the solver).
+
+    Notes
+    -----
+    - `output_profile` is `lean`, `standard` (default) or `debug`, and `output_artifacts` overrides the profile for single artifacts.
+    """
+    profile = sim_info.get('output_profile', 'standard')
+    if profile not in output_profiles:
+        raise ValueError(f"'output_profile' must be one of {list(output_profiles)}, not '{profile}'")
+    artifacts = dict(output_profiles[profile])
+    for artifact, when in (sim_info.get('output_artifacts') or {}).items():
+        if artifact not in artifacts:
+            raise ValueError(f"'{artifact}' in 'output_artifacts' is not an artifact. Available artifacts are {list(artifacts)}")
+        if when not in ('all', 'first', 'none'):
+            raise ValueError(f"'output_artifacts' must be 'all', 'first' or 'none', not '{when}' for '{artifact}'")
+        artifacts[artifact] = when
+    return artifacts
+
+def get_artifact_size(aoa_out_dir):
+    """
+    Returns the size in bytes of the artifacts written in the output directory of an angle of attack.
+    """
+    artifact_size = 0
+    for patterns in artifact_files.values():
+        for pattern in patterns:
+            artifact_size += sum(os.path.getsize(file_path) for file_path in glob.glob(f"{aoa_out_dir}/{pattern}"))
+    return artifact_size
+
+################################################################################
+# Helper Functions for the timings of the simulations
+################################################################################
+# Phases of the simulation of an angle of attack:
+# - spawn: start-up of the subprocess or worker running the simulation, counted for its first angle of attack
+# - setup: setup of the OpenMDAO problem, or reset of a reused problem, without loading the mesh
+# - mesh_load: loading of the mesh and initialization of ADflow
+# - solve: solution of the model
+# - post: artifacts such as the N2 diagram and listings, and the converged states kept for warm starting
+# - io: checks of the earlier results, lookup and storage in the result cache
+timing_phases = ['spawn', 'setup', 'mesh_load', 'solve', 'post', 'io']
+
+def gather_timings(phase_times, comm):
+    """
+    Gathers the time spent by each rank in each phase of a simulation, and returns their statistics across the ranks.
+
+    Inputs
+    ------
+    - **phase_times** : dict
+        Time in seconds spent by this rank in each phase of `timing_phases`.
+    - **comm** : MPI communicator
+        Communicator of the processors running the simulation. All of its ranks must call this function.
+
+    Outputs
+    -------
+    **dict or None**
+        Minimum, maximum and mean time in seconds across the ranks, keyed by phase, on rank 0, and None on the other ranks.
+    """
+    all_phase_times = comm.gather(phase_times, root=0)
+    if comm.rank != 0:
+        return None
+    timings = {}
+    for phase in timing_phases:
+        rank_times = [rank_phase_times.get(phase, 0.0) for rank_phase_times in all_phase_times]
+        timings[phase] = {
+            'min': round(min(rank_times), 3),
+            'max': round(max(rank_times), 3),
+            'mean': round(sum(rank_times) / len(rank_times), 3),
+        }
+    return timings
+
+def add_timings(timing_rollup, timings, nproc):
+    """
+    Adds the timings of the simulation of an angle of attack to a roll-up of a refinement level, case or simulation series.
+
+    Inputs
+    ------
+    - **timing_rollup** : dict
+        Roll-up, modified in place. Holds the wall time and core-seconds of each phase and of all the phases (`total`), keyed by phase. An empty dictionary starts a new roll-up.
+    - **timings** : dict
+        Timings of the angle of attack, as returned by `gather_timings()`.
+    - **nproc** : int
+        Number of processors that ran the simulation. The core-seconds of a phase are its maximum time across the ranks times the number of processors, as all of them are held until the slowest is done.
+    """
+    for phase in timing_phases + ['total']:
+        if phase == 'total':
+            wall_time = sum(timings[timing_phase]['max'] for timing_phase in timing_phases if timing_phase in timings)
+        elif phase in timings:
+            wall_time = timings[phase]['max']
+        else:
+            continue
+        phase_rollup = timing_rollup.setdefault(phase, {'wall_time': 0.0, 'core_sec': 0.0})
+        phase_rollup['wall_time'] = round(phase_rollup['wall_time'] + wall_time, 3)
+        phase_rollup['core_sec'] = round(phase_rollup['core_sec'] + wall_time * (nproc or 1), 3)
+
+################################################################################
+# Helper Functions for the retry ladder of failed simulations
+################################################################################
+def check_retry_ladder(case_info):
+    """
+    Checks that the retry ladder of a case is a list of rungs, each one a dictionary of solver parameters with the optional `warm_start` entry.
+    """
+    retry_ladder = case_info.get('retry_ladder') or []
+    if not isinstance(retry_ladder, list):
+        raise ValueError(f"'retry_ladder' of case '{case_info['name']}' must be a list of rungs")
+    for rung in retry_ladder:
+        if not isinstance(rung, dict) or not rung:
+            raise ValueError(f"Each rung of the 'retry_ladder' of case '{case_info['name']}' must be a dictionary of solver parameters, not '{rung}'")
+        if rung.get('warm_start', 'no') not in ('yes', 'no'):
+            raise ValueError(f"'warm_start' in the 'retry_ladder' of case '{case_info['name']}' must be 'yes' or 'no'")
+
+def get_retry_options(retry_ladder, rung):
+    """
+    Returns the options of an attempt at a rung of the retry ladder. Each rung adds its options on top of the options of the rungs below it.
+
+    Inputs
+    ------
+    - **retry_ladder** : list
+        Rungs of the retry ladder of the case, each one a dictionary of solver parameters with the optional `warm_start` entry.
+    - **rung** : int
+        Rung of the attempt. Rung 0 is the first attempt, with the solver parameters of the case, and rung `n` adds the `n` first rungs of the ladder.
+
+    Outputs
+    -------
+    **dict**
+        Solver parameters and `warm_start` entry of the attempt, in addition to the solver parameters of the case.
+    """
+    retry_options = {}
+    for rung_options in retry_ladder[:rung]:
+        retry_options.update(rung_options)
+    return retry_options
+
+def get_next_rung(attempts, retry_ladder):
+    """
+    Returns the rung of the next attempt of a simulation, after the given attempts. Returns 0, the first attempt, when there was no attempt, and None when the last attempt was on the top rung of the ladder.
+    """
+    if not attempts:
+        return 0
+    next_rung = attempts[-1]['rung'] + 1
+    return next_rung if next_rung <= len(retry_ladder) else None
+
+def read_aoa_attempts(aoa_info_file, input_hash):
+    """
+    Reads the attempts of a failed simulation recorded in the simulation info file of an angle of attack, so that they are carried on up the retry ladder instead of being tried again. Returns an empty list if the simulation succeeded, was run with other inputs, or has no recorded attempts.
+    """
+    try:
+        with open(aoa_info_file, 'r') as aoa_file:
+            aoa_sim_info = yaml.safe_load(aoa_file)
+    except Exception:
+        return []
+    if not isinstance(aoa_sim_info, dict) or aoa_sim_info.get('fail_flag') != 1 or aoa_sim_info.get('input_hash') != input_hash:
+        return []
+    return list(aoa_sim_info.get('attempts') or [])
+
+def add_attempts(retry_rollup, attempts, retry_ladder):
+    """
+    Adds the attempts of the simulation of an angle of attack to a roll-up of the retry ladder of a case.
+
+    Inputs
+    ------
+    - **retry_rollup** : dict
+        Roll-up, modified in place. Holds the options, number of attempts, number of successes, wall time and core-seconds of each rung, keyed by rung (`rung_0`, `rung_1`, ...). An empty dictionary starts a new roll-up.
+    - **attempts** : list
+        Attempts of the simulation, as recorded in its simulation info file.
+    - **retry_ladder** : list
+        Rungs of the retry ladder of the case.
+    """
+    for attempt in attempts:
+        rung_rollup = retry_rollup.setdefault(f"rung_{attempt['rung']}", {
+            'options': attempt.get('options', get_retry_options(retry_ladder, attempt['rung'])),
+            'attempts': 0,
+            'successes': 0,
+            'wall_time': 0.0,
+            'core_sec': 0.0,
+        })
+        rung_rollup['attempts'] += 1
+        rung_rollup['successes'] += int(attempt['fail_flag'] == 0)
+        rung_rollup['wall_time'] = round(rung_rollup['wall_time'] + attempt['wall_time'], 3)
+        rung_rollup['core_sec'] = round(rung_rollup['core_sec'] + attempt['core_sec'], 3)
+
+################################################################################
+# Helper Functions for the journal of completed simulations
+################################################################################
+# Entries of the simulation info of an angle of attack that are recorded in the journal, with the wall times in seconds
+journal_fields = ['cl', 'cd', 'wall_time', 'nproc', 'fail_flag', 'out_dir', 'input_hash', 'artifact_time', 'timings', 'watchdog_reason', 'attempts']
+
+def get_journal_key(hierarchy_name, case_name, exp_set, level, aoa):
+    """
+    Returns the key of an angle of attack in the journal, as `(hierarchy_name, case_name, exp_set, level, aoa)` with the angle of attack as a float.
+    """
+    return (hierarchy_name, case_name, int(exp_set), int(level), float(aoa))
+
+def append_journal_record(journal_file, record):
+    """
+    Appends the record of a completed simulation to the journal, and flushes it to disk.
+
+    The journal is a JSON lines file, with one record per completed angle of attack. The file is locked while the record is written, so that concurrent subprocesses and jobs can append to the same journal.
+
+    Inputs
+    ------
+    - **journal_file** : str
+        Path to the journal file.
+    - **record** : dict
+        Record of the simulation, with `hierarchy`, `case`, `exp_set`, `level` and `aoa` identifying the angle of attack.
+    """
+    line = json.dumps(record) + "\n"
+    with open(journal_file, 'a') as journal_handle:
+        fcntl.flock(journal_handle, fcntl.LOCK_EX)
+        try:
+            journal_handle.write(line)
+            journal_handle.flush()
+            os.fsync(journal_handle.fileno())
+        finally:
+            fcntl.flock(journal_handle, fcntl.LOCK_UN)
+
+def load_journal(journal_file):
+    """
+    Replays the journal of completed simulations.
+
+    Inputs
+    ------
+    - **journal_file** : str
+        Path to the journal file.
+
+    Outputs
+    -------
+    **dict or None**
+        Latest record of each angle of attack, keyed by `get_journal_key()`, or None if the journal does not exist.
+
+    Notes
+    -----
+    - A later record of an angle of attack replaces the earlier ones, so a successful rerun replaces a failed run.
+    - Lines that cannot be parsed, such as a line cut short when a job was killed, are ignored.
+    """
+    if not os.path.exists(journal_file):
+        return None
+    journal = {}
+    with open(journal_file, 'r') as journal_handle:
+        for line in journal_handle:
+            try:
+                record = json.loads(line)
+                journal[get_journal_key(record['hierarchy'], record['case'], record['exp_set'], record['level'], record['aoa'])] = record
+            except (ValueError, KeyError, TypeError):
+                continue
+    return journal
+
 ################################################################################
 # Helper Functions for running the simulations as subprocesses
 ################################################################################
+# Top level options of the input YAML file that are passed on to the subprocesses
+subprocess_options = ['reuse_problem', 'warm_start', 'mesh_sequencing', 'mesh_sequencing_L2Convergence', 'resume', 'cache_dir', 'cache_quota', 'output_profile', 'output_artifacts', 'trace', 'watchdog', 'watchdog_criteria', 'retry_budget', 'retry_failed']
+
+def write_subprocess_input(sim_info, hierarchy_info, case_info, exp_info, aoa_list, level_indices, input_file):
+    """
+    Writes the input YAML file of a subprocess that runs a part of an experimental set.
+
+    Inputs
+    ------
+    - **sim_info** : dict
+        Dictionary containing simulation details, such as output directory, and the options passed on to the subprocess.
+    - **hierarchy_info** : dict
+        Information about the simulation hierarchy, including hierarchy name.
+    - **case_info** : dict
+        Details about the simulation case, such as mesh files, geometry, and solver parameters.
+    - **exp_info** : dict
+        Experimental setup details, including Reynolds number, Mach number, temperature, and experimental data.
+    - **aoa_list** : list
+        Angles of attack to be run by the subprocess.
+    - **level_indices** : list or None
+        Indices of the refinement levels to be run by the subprocess. None stands for all refinement levels.
+    - **input_file** : str
+        Path of the input YAML file to be written.
+    """
+    sub_sim_info = {
+        'out_dir': sim_info['out_dir'],
+        'hpc': 'no',
+        'run_as_subprocess': 'no',
+    }
+    for option in subprocess_options:
+        if option in sim_info:
+            sub_sim_info[option] = sim_info[option]
+    if level_indices is not None:
+        sub_sim_info['levels'] = list(level_indices)
+    sub_sim_info['hierarchies'] = [
+        {
+            'name': hierarchy_info['name'],
+            'cases':[
+                {
+                    'name': case_info['name'],
+                    'meshes_folder_path': case_info['meshes_folder_path'],
+                    'mesh_files': case_info['mesh_files'],
+                    'geometry_info': case_info['geometry_info'],
+                    'solver_parameters': case_info['solver_parameters'],
+                    'retry_ladder': case_info.get('retry_ladder'),
+                    'exp_sets':[
+                        {
+                            'aoa_list': list(aoa_list),
+                            'Re': exp_info['Re'],
+                            'mach': exp_info['mach'],
+                            'Temp': exp_info['Temp'],
+                            'exp_data': exp_info['exp_data'],
+                        },
+                    ],
+                },
+            ],
+        },
+    ]
+    write_yaml_file(input_file, sub_sim_info)
+
+def get_subprocess_command(sim_info, python_fname, input_file, nproc):
+    """
+    Returns the command that runs a simulation subprocess, using `mpirun` on a local machine and `srun` on an HPC cluster.
+
+    On an HPC cluster, the subprocess is run as a job step with `srun --exact`, which gives the step only the processors it requests. Several steps can then share the nodes of a single allocation.
+
+    Inputs
+    ------
+    - **sim_info** : dict
+        Dictionary containing simulation details.
+    - **python_fname** : str
+        Path to the python script run by the subprocess.
+    - **input_file** : str
+        Path to the input YAML file of the subprocess.
+    - **nproc** : int
+        Number of processors used by the subprocess.
+
+    Outputs
+    -------
+    **list**
+        Command as a list of arguments for `subprocess.Popen`.
+    """
+    if sim_info['hpc'] == 'yes':
+        launcher = ['srun', '--exact', '-n', str(nproc), '--cpus-per-task=1']
+    else:
+        launcher = ['mpirun', '-np', str(nproc)]
+    return launcher + ['python', python_fname, '--inputFile', input_file]
+
+def run_subprocesses(jobs, total_cores, comm, poll_interval=1.0, tracer=None, watchdog=None):
+    """
+    Runs simulation subprocesses concurrently within a core budget.
+
+    The subprocesses are started on rank 0 once the subprocesses they depend on are completed, and as long as the cores they need fit in the budget. Among the ready subprocesses, the ones with the largest expected cost are started first, and smaller ones fill the cores left free. Each subprocess is collected as soon as it finishes, which frees its cores for the next one.
+
+    Inputs
+    ------
+    - **jobs** : list
+        List of dictionaries, each one with the `command` to run, the number of processors it uses (`nproc`), the file its standard output and error are written to (`log_file`), and a `label` to print. Optionally, `deps` lists the indices of the jobs that must be completed before the job starts, and `cost` is the expected cost of the job.
+    - **total_cores** : int
+        Number of cores available for all the subprocesses running at the same time.
+    - **comm** : MPI communicator
+        An MPI communicator object to handle parallelism.
+    - **poll_interval** : float, optional
+        Time in seconds between checks for finished subprocesses.
+    - **tracer** : Tracer, optional
+        Tracer of the calling process. If given, the lifetime of each subprocess is recorded on its own track, named by its label, and the subprocesses name their own tracks after it.
+    - **watchdog** : Watchdog, optional
+        Watchdog of the simulations run by the subprocesses. If given, a subprocess whose current simulation is hopeless is stopped, and started again for its remaining simulations, at most `max_restarts` times as given in its job. Its log file is appended to when it is started again.
+
+    Outputs
+    -------
+    **list or None**
+        Return codes of the subprocesses in the order of `jobs` on rank 0, and None on the other ranks.
+    """
+    return_codes = None
+    if comm.rank == 0:
+        return_codes = [None] * len(jobs)
+        pending = list(range(len(jobs))) # Indices of the jobs that are not started yet
+        running = {} # Running subprocesses and their log files, keyed by job index
+        start_times = {} # Start times of the subprocesses, keyed by job index
+        restarts = {} # Number of times each subprocess was stopped by the watchdog, keyed by job index
+        used_cores = 0
+        env = os.environ.copy()
+        while pending or running:
+            # Start the ready jobs that fit in the free cores. A job larger than the budget is started when nothing else is running.
+            for job_index in sorted(pending, key=lambda index: -jobs[index].get('cost', 0.0)):
+                job = jobs[job_index]
+                if any(return_codes[dep] is None for dep in job.get('deps', [])):
+                    continue
+                if used_cores + job['nproc'] > total_cores and running:
+                    continue
+                pending.remove(job_index)
+                log_handle = open(job['log_file'], 'a' if job_index in restarts else 'w') # Write the output to a file, as an unread pipe blocks the subprocess once it is full
+                spawn_time = time.time()
+                start_times.setdefault(job_index, spawn_time) # A subprocess started again keeps its first start time
+                job_env = dict(env, MDSS_SPAWN_TIME=str(spawn_time), MDSS_TRACE_LABEL=job['label']) # The subprocess measures its start-up time from this, and names its trace track after it
+                p = subprocess.Popen(job['command'], env=job_env, stdout=log_handle, stderr=subprocess.STDOUT, text=True)
+                running[job_index] = (p, log_handle)
+                used_cores += job['nproc']
+                print(f"{'-' * 30}")
+                print(f"Starting subprocess for {job['label']} on {job['nproc']} processors ({used_cores}/{total_cores} cores in use)")
+
+            # Stop the subprocesses running a hopeless simulation, and start them again for their remaining simulations
+            if watchdog is not None:
+                for job_index, (p, log_handle) in list(running.items()):
+                    stop = watchdog.check_log(jobs[job_index]['log_file'])
+                    if stop is None or p.poll() is not None:
+                        continue
+                    p.terminate()
+                    p.wait()
+                    log_handle.close()
+                    del running[job_index]
+                    used_cores -= jobs[job_index]['nproc']
+                    watchdog.write_stop(stop)
+                    restarts[job_index] = restarts.get(job_index, 0) + 1
+                    print(f"Stopped subprocess for {jobs[job_index]['label']} | Reason: {stop['reason']} after {stop['iterations']} iterations in {stop['out_dir']}")
+                    if restarts[job_index] <= jobs[job_index].get('max_restarts', 0):
+                        pending.append(job_index)
+                    else:
+                        return_codes[job_index] = p.returncode
+                        if tracer is not None:
+                            tracer.name_track(job_index + 1, jobs[job_index]['label'])
+                            tracer.complete(jobs[job_index]['label'], start_times[job_index], category='subprocess', tid=job_index + 1, nproc=jobs[job_index]['nproc'], return_code=p.returncode, restarts=restarts[job_index])
+                        print(f"{'-' * 30}")
+
+            # Collect the finished subprocesses
+            for job_index, (p, log_handle) in list(running.items()):
+                if p.poll() is not None:
+                    log_handle.close()
+                    del running[job_index]
+                    used_cores -= jobs[job_index]['nproc']
+                    return_codes[job_index] = p.returncode
+                    if tracer is not None:
+                        tracer.name_track(job_index + 1, jobs[job_index]['label'])
+                        tracer.complete(jobs[job_index]['label'], start_times[job_index], category='subprocess', tid=job_index + 1, nproc=jobs[job_index]['nproc'], return_code=p.returncode, restarts=restarts.get(job_index, 0))
+                    print(f"Completed subprocess for {jobs[job_index]['label']} with return code {p.returncode}")
+                    print(f"{'-' * 30}")
+
+            if running:
+                time.sleep(poll_interval)
+    comm.Barrier()
+    return return_codes
+
 def run_as_subprocess(sim_info, hierarchy_info, case_info, exp_info, aoa, aoa_out_dir, nproc, comm):
     """
     Executes a simulation case as a subprocess using mpirun.
@@ -243,51 +1195,22 @@ def run_as_subprocess(sim_info, hierarchy_info, case_info, exp_info, aoa, aoa_ou
         This function does not return any value but performs the following actions:
         1. Creates necessary directories and input files.
         2. Launches a subprocess to execute the simulation using `mpirun`.
-        3. Prints standard output and error logs from the subprocess for debugging.
+        3. Writes standard output and error of the subprocess to `subprocess_out.txt` in the angle of attack directory.
 
     Notes
     -----
     - The function ensures the proper setup of the simulation environment for the given angle of attack.
     - The generated Python script and YAML input file are specific to each simulation run.
     - Uses MPI to parallelize the simulation process.
-    - Captures and displays `stdout` and `stderr` from the subprocess for troubleshooting.
+    - To run several subprocesses at the same time, use `run_subprocesses()`.
     """
-    aoa_specific_sim_info = {
-        'out_dir': sim_info['out_dir'],
-        'hpc': 'no',
-        'run_as_subprocess': 'no',
-        'hierarchies':[
-            {
-                'name': hierarchy_info['name'],
-                'cases':[
-                    {
-                        'name': case_info['name'],
-                        'meshes_folder_path': case_info['meshes_folder_path'],
-                        'mesh_files': case_info['mesh_files'],
-                        'geometry_info': case_info['geometry_info'],
-                        'solver_parameters': case_info['solver_parameters'],
-                        'exp_sets':[
-                            {
-                                'aoa_list': [aoa],
-                                'Re': exp_info['Re'],
-                                'mach': exp_info['mach'],
-                                'Temp': exp_info['Temp'],
-                                'exp_data': exp_info['exp_data'],
-                            },
-                        ],
-                    },
-                ],
-            },
-        ],
-    }
     if not os.path.exists(aoa_out_dir): # Create the directory if it doesn't exist
         if comm.rank == 0:
             os.makedirs(aoa_out_dir)
     
     aoa_specific_input_file = f"{aoa_out_dir}/temp_input_file.yaml"
     if comm.rank==0:
-        with open(aoa_specific_input_file, 'w') as input_file:
-            yaml.dump(aoa_specific_sim_info, input_file, sort_keys=False)
+        write_subprocess_input(sim_info, hierarchy_info, case_info, exp_info, [aoa], None, aoa_specific_input_file)
 
     python_fname = f"{sim_info['out_dir']}/script_for_subprocess.py"
 
@@ -295,37 +1218,159 @@ def run_as_subprocess(sim_info, hierarchy_info, case_info, exp_info, aoa, aoa_ou
         if comm.rank==0:
             write_python_file(python_fname)
 
-    env = os.environ.copy()
-    if comm.rank==0:
-        print(f"{'-' * 30}")
-        print(f"Starting subprocess for aoa: {aoa}")
-        if sim_info['hpc'] != 'yes':
-            p = subprocess.Popen(
-                ['mpirun', '-np', str(nproc), 'python', python_fname, '--inputFile', aoa_specific_input_file],
-                env=env,
-                stdout=subprocess.PIPE,  # Capture standard output
-                stderr=subprocess.PIPE,  # Capture standard error
-                text=True  # Ensure output is in text format, not bytes
-                )
-        elif sim_info['hpc'] == 'yes':
-            p = subprocess.Popen(
-                ['srun', '-n', str(nproc), 'python', python_fname, '--inputFile', aoa_specific_input_file],
-                env=env,
-                stdout=subprocess.PIPE,  # Capture standard output
-                stderr=subprocess.PIPE,  # Capture standard error
-                text=True  # Ensure output is in text format, not bytes
-                )
-        # Read and print the output and error messages
-        stdout, stderr = p.communicate()
-
-        #print("Subprocess Output:", stdout)
-        #print("Subprocess Error:", stderr)
-
-        p.wait() # Wait for subprocess to end
-        
-        print(f"Completed")
-        print(f"{'-' * 30}")
+    job = {
+        'command': get_subprocess_command(sim_info, python_fname, aoa_specific_input_file, nproc),
+        'nproc': nproc,
+        'log_file': f"{aoa_out_dir}/subprocess_out.txt",
+        'label': f"aoa: {aoa}",
+    }
+    run_subprocesses([job], nproc, comm)
 
     # Delete the files
     if comm.rank == 0:
-        os.remove(aoa_specific_input_file)
\ No newline at end of file
+        os.remove(aoa_specific_input_file)
+
+################################################################################
+# Helper Functions for estimating the cost of the simulations
+################################################################################
+bytes_per_cell = 50 # Approximate size of a cell in a CGNS mesh file, used when the cells cannot be counted
+default_core_sec_per_cell = 0.3 # Approximate core-seconds per cell of a RANS simulation, used when there are no earlier simulations
+
+def get_mesh_size(mesh_file):
+    """
+    Returns the number of cells of a CGNS mesh.
+
+    Inputs
+    ------
+    - **mesh_file** : str
+        Path to the CGNS mesh file.
+
+    Outputs
+    -------
+    **float or None**
+        Number of cells in the mesh, or None if the file does not exist.
+
+    Notes
+    -----
+    - The cells are counted from the sizes of the zones with `h5py`, which reads only the headers of the file.
+    - If `h5py` is not available or the file is not an HDF5 CGNS file, the number of cells is estimated from the size of the file.
+    """
+    try:
+        import h5py # Imported here, as only the cost model reads the meshes
+    except ImportError:
+        h5py = None # The size of the meshes is then estimated from the size of their files
+    get_label = lambda node: bytes(node.attrs.get('label', b'')).split(b'\x00')[0].decode().strip()
+    if h5py is not None:
+        try:
+            n_cells = 0
+            with h5py.File(mesh_file, 'r') as cgns_file:
+                for base in cgns_file.values():
+                    if not isinstance(base, h5py.Group) or get_label(base) != 'CGNSBase_t':
+                        continue
+                    for zone in base.values():
+                        if isinstance(zone, h5py.Group) and get_label(zone) == 'Zone_t':
+                            zone_size = np.array(zone[' data'][()]) # Rows of vertex, cell and boundary vertex sizes
+                            n_cells += int(np.prod(zone_size[1]))
+            if n_cells > 0:
+                return float(n_cells)
+        except Exception:
+            pass
+    try:
+        return os.path.getsize(mesh_file) / bytes_per_cell
+    except OSError:
+        return None
+
+def get_cost_model(sim_info, nproc, core_sec_per_cell=None, journal=None):
+    """
+    Builds a model of the wall time of each angle of attack, from the wall times of earlier simulations and the size of the meshes.
+
+    Inputs
+    ------
+    - **sim_info** : dict
+        Dictionary containing the information of the input YAML file.
+    - **nproc** : int
+        Number of processors the simulations will be run on.
+    - **core_sec_per_cell** : float, optional
+        Core-seconds per cell used when there are no earlier simulations. Defaults to `default_core_sec_per_cell`.
+    - **journal** : dict, optional
+        Journal of completed simulations returned by `load_journal()`. If given, the wall times are read from it instead of the `aoa_<aoa>.yaml` files.
+
+    Outputs
+    -------
+    **callable**
+        Function of `(hierarchy, case, exp_set, level_index, aoa)` that returns the estimated wall time in seconds, to be passed to `build_task_graph()`.
+
+    Notes
+    -----
+    - An angle of attack that was simulated before is estimated from its recorded wall time, scaled by the number of processors it was run on.
+    - Otherwise, its wall time is the number of cells of its mesh times the median core-seconds per cell of the earlier simulations.
+    """
+    out_dir = sim_info['out_dir']
+    mesh_sizes = {} # Number of cells of each mesh, keyed by (hierarchy, case, level)
+    recorded = {} # Core-seconds of the earlier simulations, keyed by (hierarchy, case, exp_set, level, aoa)
+    rates = [] # Core-seconds per cell of the earlier simulations
+    for hierarchy, hierarchy_info in enumerate(sim_info['hierarchies']): # loop for Hierarchy level
+        for case, case_info in enumerate(hierarchy_info['cases']): # loop for cases in hierarchy
+            for ii, mesh_file in enumerate(case_info['mesh_files']): # Loop for refinement levels
+                mesh_sizes[(hierarchy, case, ii)] = get_mesh_size(f"{case_info['meshes_folder_path']}/{mesh_file}")
+            for exp_set, exp_info in enumerate(case_info['exp_sets']): # loop for experimental datasets that may present
+                for ii in range(len(case_info['mesh_files'])):
+                    for aoa in exp_info['aoa_list']:
+                        aoa_info_file = f"{out_dir}/{hierarchy_info['name']}/{case_info['name']}/exp_set_{exp_set}/L{ii}/aoa_{aoa}/aoa_{aoa}.yaml"
+                        try:
+                            if journal is not None:
+                                aoa_sim_info = journal[get_journal_key(hierarchy_info['name'], case_info['name'], exp_set, ii, aoa)]
+                            else:
+                                with open(aoa_info_file, 'r') as aoa_file:
+                                    aoa_sim_info = yaml.safe_load(aoa_file)
+                            wall_time = float(str(aoa_sim_info['wall_time']).replace(" sec", ""))
+                            run_nproc = int(aoa_sim_info.get('nproc', nproc))
+                        except Exception:
+                            continue
+                        if not wall_time > 0: # Simulations that did not run
+                            continue
+                        recorded[(hierarchy, case, exp_set, ii, aoa)] = wall_time * run_nproc
+                        if mesh_sizes[(hierarchy, case, ii)]:
+                            rates.append(wall_time * run_nproc / mesh_sizes[(hierarchy, case, ii)])
+
+    if rates:
+        core_sec_per_cell = float(np.median(rates))
+    elif core_sec_per_cell is None:
+        core_sec_per_cell = default_core_sec_per_cell
+    median_recorded = float(np.median(list(recorded.values()))) if recorded else None
+
+    def get_cost(hierarchy, case, exp_set, ii, aoa):
+        core_seconds = recorded.get((hierarchy, case, exp_set, ii, aoa))
+        if core_seconds is None:
+            mesh_size = mesh_sizes.get((hierarchy, case, ii))
+            if mesh_size:
+                core_seconds = core_sec_per_cell * mesh_size
+            else: # The mesh file is missing, assume a typical simulation
+                core_seconds = median_recorded if median_recorded is not None else 3600.0 * nproc
+        return core_seconds / nproc
+    return get_cost
+
+def parse_slurm_time(slurm_time):
+    """
+    Converts a Slurm time, such as `D-H:M:S`, `H:M:S`, `M:S` or `M`, to seconds.
+    """
+    days = 0
+    slurm_time = str(slurm_time)
+    if '-' in slurm_time:
+        days, slurm_time = slurm_time.split('-')
+        fields = [int(field) for field in slurm_time.split(':')]
+        fields = fields + [0] * (3 - len(fields)) # Hours are given first after the days
+    else:
+        fields = [int(field) for field in slurm_time.split(':')]
+        fields = {1: [0, fields[0], 0], 2: [0] + fields, 3: fields}[len(fields)]
+    hours, minutes, seconds = fields
+    return ((int(days) * 24 + hours) * 60 + minutes) * 60 + seconds
+
+def format_slurm_time(seconds):
+    """
+    Converts a time in seconds to the `D-H:M:S` format of Slurm, rounding up to the minute.
+    """
+    minutes = math.ceil(seconds / 60)
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{days}-{hours:02d}:{minutes:02d}:00"
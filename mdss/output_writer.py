@@ -0,0 +1,137 @@
+import os
+import io
+import atexit
+import queue
+import threading
+import yaml
+import numpy as np
+
+################################################################################
+# Single-writer, atomic output of the simulation files
+################################################################################
+def write_file_atomic(file_path, content):
+    """
+    Writes a text or binary file atomically, so readers never see a partially written file.
+
+    The content is written to a temporary file in the same directory, flushed to disk, and renamed over the target file.
+
+    Inputs
+    ------
+    - **file_path** : str
+        Path to the file to write.
+    - **content** : str or bytes
+        Content of the file.
+    """
+    temp_file_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp" # Unique to the writer, in the same filesystem as the target
+    try:
+        with open(temp_file_path, 'wb' if isinstance(content, bytes) else 'w') as file_handle:
+            file_handle.write(content)
+            file_handle.flush()
+            os.fsync(file_handle.fileno())
+        os.replace(temp_file_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+        raise
+
+def write_yaml_file(yaml_file, data):
+    """
+    Writes a dictionary to a YAML file atomically, keeping the order of its keys.
+
+    Inputs
+    ------
+    - **yaml_file** : str
+        Path to the YAML file to write.
+    - **data** : dict
+        Content of the YAML file.
+    """
+    write_file_atomic(yaml_file, yaml.dump(data, sort_keys=False))
+
+class OutputWriter():
+    """
+    Writes the output files of the simulations from a single rank, in a background thread.
+
+    Only the writer rank of the given communicator writes, so the ranks of a simulation do not all rewrite the same file. The content is serialized on the calling thread, so later changes to the data do not reach the file, and the file is then written atomically by a background thread while the solver carries on.
+
+    Inputs
+    ------
+    - **writer_rank** : int, optional
+        Rank that writes the files, in the communicator given to each write. Defaults to 0.
+
+    Notes
+    -----
+    - `flush()` waits until the queued files are written, and must be called before the files are read back. The queued files are also written when the process exits.
+    - Errors raised while writing a file are raised again by the next call to `flush()`.
+    """
+    def __init__(self, writer_rank=0):
+        self.writer_rank = writer_rank
+        self.queue = queue.Queue()
+        self.errors = [] # Errors raised by the background thread
+        self.thread = None
+
+    def is_writer(self, comm):
+        return comm is None or comm.rank == self.writer_rank % comm.size
+
+    def write(self, file_path, content, comm=None):
+        """
+        Queues a text or binary file to be written by the writer rank.
+
+        Inputs
+        ------
+        - **file_path** : str
+            Path to the file to write.
+        - **content** : str or bytes
+            Content of the file.
+        - **comm** : MPI.Comm, optional
+            Communicator of the ranks taking part in the write. Only its writer rank writes the file. Defaults to the calling rank.
+        """
+        if not self.is_writer(comm):
+            return
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.write_queued_files, daemon=True)
+            self.thread.start()
+            atexit.register(self.queue.join) # The queued files are still written if the process exits without flushing
+        self.queue.put((file_path, content))
+
+    def write_yaml(self, yaml_file, data, comm=None):
+        """
+        Queues a YAML file to be written by the writer rank. The inputs are the same as `write()`, with the dictionary `data` as content.
+        """
+        if self.is_writer(comm):
+            self.write(yaml_file, yaml.dump(data, sort_keys=False))
+
+    def write_csv(self, csv_file, df, comm=None, **csv_options):
+        """
+        Queues a Pandas DataFrame to be written to a CSV file by the writer rank. The inputs are the same as `write()`, with the DataFrame `df` as content, and the options of `DataFrame.to_csv()`.
+        """
+        if self.is_writer(comm):
+            self.write(csv_file, df.to_csv(**csv_options))
+
+    def write_npz(self, npz_file, arrays, comm=None):
+        """
+        Queues NumPy arrays to be written to a compressed NPZ file by the writer rank. The inputs are the same as `write()`, with the dictionary of arrays `arrays` as content.
+        """
+        if self.is_writer(comm):
+            npz_buffer = io.BytesIO()
+            np.savez_compressed(npz_buffer, **arrays)
+            self.write(npz_file, npz_buffer.getvalue())
+
+    def write_queued_files(self):
+        while True:
+            file_path, content = self.queue.get()
+            try:
+                write_file_atomic(file_path, content)
+            except Exception as e:
+                self.errors.append(e)
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """
+        Waits until all the queued files are written, and raises the first error met while writing them.
+        """
+        self.queue.join()
+        if self.errors:
+            error = self.errors[0]
+            self.errors = []
+            raise error
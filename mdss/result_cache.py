@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import fcntl
+from contextlib import contextmanager
+
+################################################################################
+# Content-addressed cache of simulation results
+################################################################################
+# Solver options that do not change the converged solution, and are left out of the cache key
+uncached_options = ['outputdirectory', 'gridfile', 'restartfile', 'printiterations', 'printalloptions', 'printintro', 'printtiming']
+
+pin_timeout = 3600.0 # Seconds after which the pin of a reader that did not release it, for example because it was killed, is ignored
+
+file_fingerprints = {} # Fingerprints of the files already hashed, keyed by (path, size, modification time)
+
+def get_file_fingerprint(file_path):
+    """
+    Returns the SHA-256 hash of the content of a file, such as a mesh file.
+
+    Inputs
+    ------
+    - **file_path** : str
+        Path to the file.
+
+    Outputs
+    -------
+    **str**
+        Hexadecimal hash of the file content. The hash is computed once per file, unless the file is modified.
+    """
+    file_stat = os.stat(file_path)
+    stat_key = (os.path.abspath(file_path), file_stat.st_size, file_stat.st_mtime_ns)
+    if stat_key not in file_fingerprints:
+        file_hash = hashlib.sha256()
+        with open(file_path, 'rb') as file_handle:
+            for chunk in iter(lambda: file_handle.read(1 << 20), b''):
+                file_hash.update(chunk)
+        file_fingerprints[stat_key] = file_hash.hexdigest()
+    return file_fingerprints[stat_key]
+
+def get_cache_key(mesh_file, aero_options, exp_info, geometry_info, aoa):
+    """
+    Returns the cache key of the simulation of an angle of attack, as a hash of everything that sets its solution.
+
+    Inputs
+    ------
+    - **mesh_file** : str
+        Path to the mesh file. Its content is hashed, so the same mesh in another folder has the same key.
+    - **aero_options** : dict
+        ADflow solver options used for the simulation. The options in `uncached_options` are left out.
+    - **exp_info** : dict
+        Experimental conditions, of which the Mach number, Reynolds number and temperature are used.
+    - **geometry_info** : dict
+        Reference geometry of the case.
+    - **aoa** : float
+        Angle of attack.
+
+    Outputs
+    -------
+    **str**
+        Hexadecimal cache key.
+    """
+    key_info = {
+        'mesh': get_file_fingerprint(mesh_file),
+        'aero_options': {option: value for option, value in aero_options.items() if option.lower() not in uncached_options},
+        'mach': float(exp_info['mach']),
+        'Re': float(exp_info['Re']),
+        'Temp': float(exp_info['Temp']),
+        'geometry_info': geometry_info,
+        'aoa': float(aoa),
+    }
+    return hashlib.sha256(json.dumps(key_info, sort_keys=True, default=str).encode()).hexdigest()
+
+class ResultCache():
+    """
+    Cache of simulation results and output files, shared across output directories.
+
+    Each entry is stored in a directory named by its cache key, holding the results in `result.json` and a copy of the output files of the angle of attack. An index of the entries, with their sizes and last use, is kept in `index.json`. Changes to the cache are made while holding a lock on `cache.lock`, so several simulations can share it, and the least recently used entries are evicted when the cache exceeds its quota. Output files are copied outside the lock: an entry being read is pinned in the index, so it is neither evicted nor replaced until it is released.
+
+    Inputs
+    ------
+    - **cache_dir** : str
+        Path to the cache directory, typically on a shared filesystem.
+    - **quota** : float, optional
+        Maximum size of the cache in GB. Defaults to no limit.
+    """
+    def __init__(self, cache_dir, quota=None):
+        self.cache_dir = cache_dir
+        self.quota_bytes = quota * 1e9 if quota is not None else None
+        self.index_file = f"{cache_dir}/index.json"
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get_entry_dir(self, key):
+        return f"{self.cache_dir}/{key[:2]}/{key}"
+
+    @contextmanager
+    def locked_index(self):
+        """
+        Locks the cache, and yields its index to be read or modified. The index is written back when the lock is released, if it was modified.
+        """
+        with open(f"{self.cache_dir}/cache.lock", 'w') as lock_handle:
+            fcntl.flock(lock_handle, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.index_file, 'r') as index_handle:
+                        index_text = index_handle.read()
+                    index = json.loads(index_text)
+                except (OSError, ValueError):
+                    index_text, index = None, {}
+                yield index
+                if index_text is not None and json.dumps(index) == index_text:
+                    return # Unchanged, as for a miss
+                temp_index_file = f"{self.index_file}.{os.getpid()}.tmp"
+                with open(temp_index_file, 'w') as index_handle:
+                    index_handle.write(json.dumps(index))
+                os.replace(temp_index_file, self.index_file)
+            finally:
+                fcntl.flock(lock_handle, fcntl.LOCK_UN)
+
+    def lookup(self, key, out_dir):
+        """
+        Looks up a simulation in the cache, and copies its output files to the output directory on a hit.
+
+        Inputs
+        ------
+        - **key** : str
+            Cache key returned by `get_cache_key()`.
+        - **out_dir** : str
+            Output directory of the angle of attack.
+
+        Outputs
+        -------
+        **dict or None**
+            Cached results of the simulation, or None on a miss.
+        """
+        entry_dir = self.get_entry_dir(key)
+        pin = f"{os.uname().nodename}.{os.getpid()}" # Reader holding the entry while its files are copied
+        with self.locked_index() as index:
+            if key not in index:
+                return None
+            index[key].setdefault('pins', {})[pin] = time.time()
+
+        # Copy the files without holding the lock, so other simulations can use the cache meanwhile
+        try:
+            with open(f"{entry_dir}/result.json", 'r') as result_handle:
+                result = json.load(result_handle)
+            shutil.copytree(f"{entry_dir}/files", out_dir, dirs_exist_ok=True)
+        except (OSError, ValueError): # The entry was removed by hand
+            result = None
+
+        with self.locked_index() as index:
+            if key in index:
+                index[key].get('pins', {}).pop(pin, None)
+                if not index[key].get('pins'):
+                    index[key].pop('pins', None)
+                if result is None:
+                    del index[key]
+                else:
+                    index[key]['last_used'] = time.time()
+        return result
+
+    def is_pinned(self, entry):
+        """
+        Returns whether an entry of the index is being read by a simulation.
+        """
+        return any(time.time() - pin_time < pin_timeout for pin_time in entry.get('pins', {}).values())
+
+    def store(self, key, result, out_dir):
+        """
+        Stores the results and output files of a simulation in the cache, and evicts the least recently used entries if the cache exceeds its quota.
+
+        Inputs
+        ------
+        - **key** : str
+            Cache key returned by `get_cache_key()`.
+        - **result** : dict
+            Results of the simulation, to be returned by `lookup()`.
+        - **out_dir** : str
+            Output directory of the angle of attack, whose files are copied to the cache.
+        """
+        entry_dir = self.get_entry_dir(key)
+        temp_entry_dir = f"{entry_dir}.{os.getpid()}.tmp" # Written aside and renamed, so a partial entry is never read
+        shutil.rmtree(temp_entry_dir, ignore_errors=True)
+        shutil.copytree(out_dir, f"{temp_entry_dir}/files", ignore=shutil.ignore_patterns('aoa_*.yaml', '*.tmp', 'subprocess_out.txt'))
+        with open(f"{temp_entry_dir}/result.json", 'w') as result_handle:
+            json.dump(result, result_handle)
+        size = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(temp_entry_dir) for name in names)
+
+        with self.locked_index() as index:
+            if key in index and self.is_pinned(index[key]): # Being read, and holds the results of the same inputs
+                shutil.rmtree(temp_entry_dir, ignore_errors=True)
+                index[key]['last_used'] = time.time()
+                return
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.rename(temp_entry_dir, entry_dir)
+            index[key] = {'size': size, 'last_used': time.time()}
+            if self.quota_bytes is not None:
+                total_size = sum(entry['size'] for entry in index.values())
+                for old_key in sorted(index, key=lambda old_key: index[old_key]['last_used']):
+                    if total_size <= self.quota_bytes:
+                        break
+                    if old_key == key or self.is_pinned(index[old_key]):
+                        continue
+                    shutil.rmtree(self.get_entry_dir(old_key), ignore_errors=True)
+                    total_size -= index.pop(old_key)['size']
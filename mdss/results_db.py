@@ -0,0 +1,126 @@
+import sqlite3
+from datetime import datetime
+import pandas as pd
+
+################################################################################
+# Results database of a simulation series
+################################################################################
+# Columns of the results table, in order. A result is identified by the first five columns.
+result_columns = ['hierarchy', 'case_name', 'exp_set', 'level', 'alpha', 'mach', 'Re', 'Temp', 'mesh_file', 'cl', 'cd', 'wall_time', 'nproc', 'fail_flag', 'out_dir', 'updated']
+
+results_schema = """
+CREATE TABLE IF NOT EXISTS results (
+    hierarchy TEXT NOT NULL,
+    case_name TEXT NOT NULL,
+    exp_set INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    alpha REAL NOT NULL,
+    mach REAL,
+    Re REAL,
+    Temp REAL,
+    mesh_file TEXT,
+    cl REAL,
+    cd REAL,
+    wall_time REAL,
+    nproc INTEGER,
+    fail_flag INTEGER,
+    out_dir TEXT,
+    updated TEXT,
+    PRIMARY KEY (hierarchy, case_name, exp_set, level, alpha)
+);
+CREATE INDEX IF NOT EXISTS results_case ON results (case_name, exp_set, level);
+CREATE INDEX IF NOT EXISTS results_mach ON results (mach);
+CREATE INDEX IF NOT EXISTS results_Re ON results (Re);
+CREATE INDEX IF NOT EXISTS results_alpha ON results (alpha);
+"""
+
+def connect_results_db(db_file):
+    """
+    Opens the results database, and creates its table and indexes if they do not exist.
+
+    Inputs
+    ------
+    - **db_file** : str
+        Path to the SQLite database file.
+
+    Outputs
+    -------
+    **sqlite3.Connection**
+        Connection to the database, returning the rows as `sqlite3.Row`.
+    """
+    connection = sqlite3.connect(db_file, timeout=60) # Wait for the other writers, such as concurrent subprocesses
+    connection.row_factory = sqlite3.Row
+    connection.executescript(results_schema)
+    return connection
+
+def store_results(db_file, records):
+    """
+    Stores the results of simulations in the results database, replacing the earlier results of the same angles of attack.
+
+    Inputs
+    ------
+    - **db_file** : str
+        Path to the SQLite database file.
+    - **records** : list
+        List of dictionaries with the columns in `result_columns`. Missing columns are stored as NULL.
+    """
+    updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = [tuple(record.get(column, updated if column == 'updated' else None) for column in result_columns) for record in records]
+    connection = connect_results_db(db_file)
+    try:
+        with connection: # Single transaction
+            connection.executemany(f"INSERT OR REPLACE INTO results ({', '.join(result_columns)}) VALUES ({', '.join('?' * len(result_columns))})", rows)
+    finally:
+        connection.close()
+
+def query_results(db_file, **filters):
+    """
+    Returns the results matching the given values of the columns.
+
+    Inputs
+    ------
+    - **db_file** : str
+        Path to the SQLite database file.
+    - **filters** : optional
+        Values of the columns to match, such as `case_name='naca0012'`, `level=0` or `mach=0.15`. A list of values matches any of them.
+
+    Outputs
+    -------
+    **pandas.DataFrame**
+        Matching results with the columns in `result_columns`, sorted by hierarchy, case, experimental set, refinement level and angle of attack.
+    """
+    conditions = []
+    values = []
+    for column, value in filters.items():
+        if column not in result_columns:
+            raise ValueError(f"'{column}' is not a column of the results database. Available columns are {result_columns}")
+        if isinstance(value, (list, tuple)):
+            conditions.append(f"{column} IN ({', '.join('?' * len(value))})")
+            values.extend(value)
+        else:
+            conditions.append(f"{column} = ?")
+            values.append(value)
+    query = f"SELECT {', '.join(result_columns)} FROM results"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY hierarchy, case_name, exp_set, level, alpha"
+    connection = connect_results_db(db_file)
+    try:
+        return pd.read_sql_query(query, connection, params=values)
+    finally:
+        connection.close()
+
+def export_csv(db_file, csv_file, **filters):
+    """
+    Writes the results matching the given values of the columns to a CSV file, with full precision.
+
+    Inputs
+    ------
+    - **db_file** : str
+        Path to the SQLite database file.
+    - **csv_file** : str
+        Path to the CSV file to write.
+    - **filters** : optional
+        Values of the columns to match, as in `query_results()`.
+    """
+    query_results(db_file, **filters).to_csv(csv_file, index=False, float_format="%.17g")
@@ -6,21 +6,31 @@ import yaml
 import time
 import copy
 import subprocess
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
 from datetime import date, datetime
-
-from mphys.multipoint import Multipoint
-from mphys.scenario_aerodynamic import ScenarioAerodynamic
-from adflow.mphys import ADflowBuilder
-from baseclasses import AeroProblem
-import openmdao.api as om
 from mpi4py import MPI
 
-from mdss.helpers import load_yaml_file, load_csv_data, check_input_yaml, write_python_file, write_job_script, run_as_subprocess
+from mdss.worker_pool import run_worker_pool, dispatch_tasks, serve_tasks
+from mdss.task_graph import build_task_graph, pack_tasks
+from mdss.results_db import store_results
+from mdss.result_cache import ResultCache, get_cache_key
+from mdss.output_writer import OutputWriter, write_yaml_file
+from mdss.tracing import Tracer
+from mdss.watchdog import Watchdog, get_watchdog_criteria, check_history, read_watchdog_stop, watchdog_stop_file, watchdog_point_prefix
+from mdss.helpers import load_yaml_file, load_csv_data, load_input_yaml, write_python_file, write_job_script, write_array_job_script, write_task_job_script, write_merge_job_script, submit_job, \
+    write_subprocess_input, get_subprocess_command, run_subprocesses, read_aoa_results, get_continuation_order, find_restart_file, get_converged_solutions, get_nearest_aoa, set_solver_option, get_solver_option, \
+    get_cost_model, parse_slurm_time, format_slurm_time, get_journal_key, append_journal_record, load_journal, read_aoa_input_hash, read_aoa_info, journal_fields, \
+    get_output_artifacts, get_artifact_size, timing_phases, gather_timings, add_timings, \
+    get_retry_options, get_next_rung, read_aoa_attempts, add_attempts
 
 comm = MPI.COMM_WORLD
 
+def __getattr__(name):
+    # 'Top' is kept importable from this module, and imported from 'mdss.top' only when asked for, as it loads the solver stack
+    if name == 'Top':
+        from mdss.top import Top
+        return Top
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 ################################################################################
 # Setting up default ADflow Options
 ################################################################################
@@ -59,95 +69,9 @@ default_aero_options = {
     "nCycles": 75000,
 }
 
-################################################################################
-# Multipoint class definition
-################################################################################
-
-class Top(Multipoint):
-
-    """
-    Sets up an OpenMDAO problem using MPhys and ADflow for aerodynamic simulations.
-
-    This class is designed to integrate OpenMDAO with MPhys and ADflow to perform aerodynamic simulations. It sets up the problem environment, manages inputs and outputs, and configures scenarios for simulation.
-
-    Methods
-    --------
-    **setup()**
-        Initializes and sets up the required subsystems and scenarios.
-
-    **configure()**
-        Configures the aerodynamic problem (e.g., reference area, chord, angle of attack) and connects design variables to the system.
-
-    Inputs
-    -------
-    - **case_info** : dict
-        Dictionary containing geometry and configuration details for the case being analyzed.
-    - **exp_info** : dict
-        Dictionary with experimental conditions such as Mach number, Reynolds number, and temperature.
-    - **aero_options** : dict
-        ADflow solver parameters that control aerodynamic analysis.
-
-    Outputs
-    --------
-    None. This class directly modifies the OpenMDAO problem structure to include aerodynamic analysis subsystems.
-
-    """
-
-    def __init__(self, case_info, exp_info, aero_options):
-        super().__init__()
-        self.case_info = case_info
-        self.exp_info = exp_info
-        self.aero_options = aero_options
-
-    def setup(self):
-                        
-        adflow_builder = ADflowBuilder(self.aero_options, scenario="aerodynamic")
-        adflow_builder.initialize(self.comm)
-        adflow_builder.err_on_convergence_fail = True
-
-        ################################################################################
-        # MPHY setup
-        ################################################################################
-
-        # ivc to keep the top level DVs
-        self.add_subsystem("dvs", om.IndepVarComp(), promotes=["*"])
-
-        # create the mesh and cruise scenario because we only have one analysis point
-        self.add_subsystem("mesh", adflow_builder.get_mesh_coordinate_subsystem())
-        self.mphys_add_scenario("cruise", ScenarioAerodynamic(aero_builder=adflow_builder))
-        self.connect("mesh.x_aero0", "cruise.x_aero")
-
-    def configure(self):
-        aoa = 0.0 # Set default Angle of attack
-
-        geometry_info = self.case_info['geometry_info'] # Load geometry info
-        chordRef = geometry_info['chordRef']
-        areaRef = geometry_info['areaRef']
-
-        ap0 = AeroProblem(
-            name="ap0",
-            # Experimental Conditions 
-            mach = self.exp_info['mach'], reynolds=self.exp_info['Re'], reynoldsLength=chordRef, T=self.exp_info['Temp'], 
-            alpha=aoa,
-            # Geometry Info
-            areaRef=areaRef, 
-            chordRef=chordRef, 
-            evalFuncs=["cl", "cd"]
-        )
-        ap0.addDV("alpha", value=aoa, name="aoa", units="deg")
-
-
-        # set the aero problem in the coupling and post coupling groups
-        self.cruise.coupling.mphys_set_ap(ap0)
-        self.cruise.aero_post.mphys_set_ap(ap0)
-
-        # add dvs to ivc and connect
-        self.dvs.add_output("aoa", val=aoa, units="deg")
-        self.connect("aoa", ["cruise.coupling.aoa", "cruise.aero_post.aoa"])
-
 class run_sim():
     """
-    Executes ADflow simulations using the `Top` class.
+    Executes ADflow simulations using the `Top` class of `mdss.top`, which is also importable from `mdss.run_sim`.
 
     This class sets up, runs, and post-processes aerodynamic simulations based on input parameters provided via a YAML configuration file. It validates the input, manages directories, and handles outputs, including plots and summary files.
 
@@ -169,17 +93,34 @@ class run_sim():
     """
 
     def __init__(self, info_file):
-        # Validate the input yaml file
-        check_input_yaml(info_file)
+        # Load and validate the input yaml file on the root rank, and share it with the other ranks
+        self.sim_info = load_input_yaml(info_file, comm)
         if comm.rank == 0:
             print(f"{'-' * 50}")
             print("YAML file validation is successful")
             print(f"{'-' * 50}")
 
         self.info_file = info_file
-        self.sim_info = load_yaml_file(self.info_file, comm)
         self.out_dir = self.sim_info['out_dir']
         self.final_out_file = f"{self.out_dir}/overall_sim_info.yaml" # Setting the overall simulation info file.
+        self.collect_only = False # Only collect the results of simulations that were run by other jobs
+        self.journal_file = f"{self.out_dir}/journal.jsonl" # Append-only journal of the completed simulations
+        self.journal = None # Latest journal record of each angle of attack, None to read the 'aoa_<aoa>.yaml' files instead
+        self.results_db_file = f"{self.out_dir}/results.db" # Indexed database of the results
+        self.writer = OutputWriter() # Writes the output files from a single rank, in the background
+        spawn_start_time = os.environ.get('MDSS_SPAWN_TIME') # Set by the parent process when this is a subprocess
+        self.spawn_time = max(0.0, time.time() - float(spawn_start_time)) if spawn_start_time else 0.0 # Start-up time, counted for the first angle of attack
+
+        # Timeline of the simulations, if the user has requested it
+        trace_label = os.environ.get('MDSS_TRACE_LABEL', 'mdss') # Set by the parent process when this is a subprocess
+        trace_file = f"{self.out_dir}/trace.json" if self.sim_info.get('trace', 'no') == 'yes' else None
+        self.tracer = Tracer(trace_file, process_name=f"{trace_label} rank {comm.rank}")
+        if spawn_start_time:
+            self.tracer.complete('spawn', float(spawn_start_time), category='spawn')
+
+        # Cache of results shared across output directories, if the user has given one
+        cache_dir = self.sim_info.get('cache_dir') or os.environ.get('MDSS_CACHE_DIR')
+        self.cache = ResultCache(cache_dir, self.sim_info.get('cache_quota')) if cache_dir else None
         
 
         # Create the output directory if it doesn't exist
@@ -190,12 +131,17 @@ class run_sim():
     ################################################################################
     # Code for running simulations
     ################################################################################   
-    def run_problem(self):
+    def run_problem(self, collect_only=False):
         """
         Sets up and runs the OpenMDAO problem for aerodynamic simulations.
 
         This method iterates through all hierarchies, cases, refinement levels, and angles of attack defined in the input YAML file. For each combination, it sets up the OpenMDAO problem, runs the simulation, and stores the results.
 
+        Inputs
+        ------
+        - **collect_only** : bool, optional
+            If True, no simulation is run, and only the results written by other jobs, such as the tasks of a Slurm job array, are collected. Defaults to False.
+
         Outputs
         -------
         - **A CSV file**:
@@ -204,6 +150,8 @@ class run_sim():
             Stores simulation data for each angle of attack in the corresponding directory.
         - **A final YAML file**:
             Summarizes all simulation results across hierarchies, cases, and refinement levels.
+        - **A results database**:
+            Stores all simulation results with full precision in `results.db`, see `mdss.results_db`.
 
         Notes
         -----
@@ -212,226 +160,1557 @@ class run_sim():
         - Existing successful simulations are skipped.
         - Directories are created dynamically if they do not exist.
         - Simulation results are saved in structured output files.
+        - If `reuse_problem` is `yes`, the problem is set up once per refinement level, and only the angle of attack is changed between runs. With `mesh_sequencing`, the problem is set up again for each angle of attack that starts from the coarser level.
+        - If `warm_start` is `yes`, the angles of attack are run as a continuation sweep, and each one starts from the nearest converged solution.
+        - If `mesh_sequencing` is `yes`, the refinement levels are run from the coarsest to the finest, and each angle of attack starts from its solution at the coarser level.
+        - If `groups` is more than 1, the processors are split into groups that run independent simulations concurrently.
+        - If `run_as_subprocess` is `yes`, independent simulations are run as concurrent subprocesses, within the core budget given by `subprocess_cores`.
+        - If `worker_pool` is also `yes`, the simulations are run by a pool of long-lived MPI workers instead of one subprocess per unit of work.
+        - If `collect_only` is True, the simulations that were not run are recorded as failed.
+        - If `cache_dir` is given, or the `MDSS_CACHE_DIR` environment variable is set, the results of identical simulations are taken from the cache instead of running them again.
+        - Each completed simulation is appended to the journal `journal.jsonl` as soon as it finishes, so a partial summary exists even if the run is killed. Unless `resume` is `scan`, the journal is replayed to find the completed simulations instead of reading every `aoa_<aoa>.yaml` file.
         """
+        self.collect_only = collect_only
 
         # Store a copy of input YAML file in output directory
         input_yaml_file = f"{self.out_dir}/input_file.yaml"
         if comm.rank == 0:
-            with open(input_yaml_file, 'w') as input_yaml_handle:
-                yaml.dump(self.sim_info, input_yaml_handle, sort_keys=False)
+            write_yaml_file(input_yaml_file, self.sim_info)
         
         sim_info_copy = copy.deepcopy(self.sim_info) # Copying to run the loop
         sim_out_info = copy.deepcopy(self.sim_info) # Copying to write the output YAML file
+        groups = max(1, min(sim_info_copy.get('groups', 1), comm.size - 1)) # Number of processor groups running simulations concurrently, besides rank 0 dispatching their tasks
         start_time = time.time()
         start_wall_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        for hierarchy, hierarchy_info in enumerate(sim_info_copy['hierarchies']): # loop for Hierarchy level
+        # Compile the input into a task graph, and mark the tasks that have successful simulations as done. The costs are only used on rank 0.
+        graph_start_time = time.time()
+        self.replay_journal()
+        task_nproc = sim_info_copy['nproc'] if sim_info_copy['run_as_subprocess'] == 'yes' else (comm.size - 1) // groups if groups > 1 else comm.size # Processors running each task
+        get_cost = get_cost_model(sim_info_copy, task_nproc, journal=self.journal) if comm.rank == 0 else None
+        graph = build_task_graph(sim_info_copy, get_cost=get_cost)
+        self.mark_completed_tasks(graph)
+        self.print_task_graph(graph)
+        self.tracer.complete('task graph', graph_start_time, category='setup')
+
+        # Run the simulations as subprocesses if the user has requested, the results are then collected by 'run_exp_set'
+        pool_results = {} # Results sent back by the worker pool
+        if sim_info_copy['run_as_subprocess'] == 'yes' and not collect_only:
+            with self.tracer.span('subprocesses', category='task'):
+                if sim_info_copy.get('worker_pool', 'no') == 'yes':
+                    pool_results = self.run_tasks_in_worker_pool(graph)
+                else:
+                    self.run_tasks_as_subprocesses(graph)
+            self.replay_journal() # Read the records appended by the subprocesses
+
+        if groups > 1 and not collect_only:
+            results = self.run_in_groups(graph, groups)
+        else:
+            results = {} # Creating dictionary to store the results of each experimental set
+            for hierarchy, hierarchy_info in enumerate(sim_info_copy['hierarchies']): # loop for Hierarchy level
+                for case, case_info in enumerate(hierarchy_info['cases']): # loop for cases in hierarchy
+                    for exp_set, exp_info in enumerate(case_info['exp_sets']): # loop for experimental datasets that may present
+                        results[(hierarchy, case, exp_set)] = self.run_exp_set(hierarchy_info, case_info, exp_set, exp_info, level_indices=sim_info_copy.get('levels'))
+
+        # The results sent back by the worker pool take precedence over the ones read from the files
+        for exp_key, exp_results in pool_results.items():
+            for refinement_level, level_results in exp_results.items():
+                results.setdefault(exp_key, {}).setdefault(refinement_level, {}).update(level_results)
 
-            for case, case_info in enumerate(hierarchy_info['cases']): # loop for cases in hierarchy
+        end_time = time.time()
+        end_wall_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        net_run_time = end_time - start_time
 
-                aero_options = default_aero_options.copy()
-                aero_options.update(case_info['solver_parameters']) # Update ADflow solver parameters
+        self.replay_journal() # Read the records appended by all the groups and workers
+        if comm.rank == 0:
+            with self.tracer.span('results database', category='io'):
+                self.write_results_db(results)
+        summary_start_time = time.time()
 
-                for exp_set, exp_info in enumerate(case_info['exp_sets']): # loop for experimental datasets that may present
+        # Run the csv and summary tasks, and write the final simulation out file.
+        if comm.rank == 0:
+            exp_sim_infos = {} # Experimental level sim info dictionaries for overall sim info file
+            level_timings, case_timings, series_timings = self.get_timing_rollups(results)
+            for task in graph.get_tasks():
+                exp_key = (task.info['hierarchy'], task.info['case'], task.info['exp_set'])
+                hierarchy_info = sim_info_copy['hierarchies'][exp_key[0]]
+                case_info = hierarchy_info['cases'][exp_key[1]]
+                exp_info = case_info['exp_sets'][exp_key[2]]
+                if task.kind == 'level_csv':
+                    refinement_level = f"L{task.info['level']}"
+                    level_results = results.get(exp_key, {}).get(refinement_level, {})
+                    exp_sim_infos.setdefault(exp_key, {})[refinement_level] = self.write_level_outputs(hierarchy_info, case_info, exp_key[2], exp_info, task.info['level'], level_results)
+                    exp_sim_infos[exp_key][refinement_level]['timings'] = level_timings.get(exp_key + (refinement_level,), {})
+                elif task.kind == 'exp_set_summary':
+                    # Add experimental level simulation to the overall simulation out file, with the refinement levels in order
+                    exp_sim_info = dict(sorted(exp_sim_infos.get(exp_key, {}).items(), key=lambda item: int(item[0][1:])))
+                    exp_sim_info['exp_set_out_dir'] = f"{self.out_dir}/{hierarchy_info['name']}/{case_info['name']}/exp_set_{exp_key[2]}"
+                    sim_out_info['hierarchies'][exp_key[0]]['cases'][exp_key[1]]['exp_sets'][exp_key[2]]['sim_info'] = exp_sim_info
+                graph.mark_done(task.name)
+            for (hierarchy, case), timing_rollup in case_timings.items():
+                sim_out_info['hierarchies'][hierarchy]['cases'][case]['timings'] = timing_rollup
+            for (hierarchy, case), retry_rollup in self.get_retry_rollups(results).items():
+                sim_out_info['hierarchies'][hierarchy]['cases'][case]['retries'] = retry_rollup
+
+            sim_out_info['overall_sim_info'] = {
+                'start_time': start_wall_time,
+                'end_time': end_wall_time,
+                'total_wall_time': f"{net_run_time:.2f} sec",
+                'journal_file': self.journal_file,
+                'results_db': self.results_db_file,
+                'output_profile': self.get_artifact_cost(results),
+                'timings': series_timings,
+            }
+
+            self.writer.flush() # The csv files are written before the final out file that points to them
+            write_yaml_file(self.final_out_file, sim_out_info)
+            self.tracer.complete('summary', summary_start_time, category='io')
+        with self.tracer.span('barrier', category='barrier'):
+            comm.Barrier()
+        self.tracer.complete('run_problem', start_time, category='task')
+        self.tracer.flush()
+
+    def run_exp_set(self, hierarchy_info, case_info, exp_set, exp_info, comm=comm, level_indices=None, aoa_list=None):
+        """
+        Runs the simulations of an experimental set.
+
+        This method iterates through the refinement levels and angles of attack of an experimental set. For each combination, it sets up the OpenMDAO problem, runs the simulation, and stores the results in a YAML file in the angle of attack directory.
+
+        Inputs
+        ------
+        - **hierarchy_info** : dict
+            Information about the hierarchy, including hierarchy name.
+        - **case_info** : dict
+            Details about the simulation case, such as mesh files, geometry, and solver parameters.
+        - **exp_set** : int
+            Index of the experimental set in the case.
+        - **exp_info** : dict
+            Experimental conditions such as Mach number, Reynolds number, and temperature.
+        - **comm** : MPI communicator, optional
+            Communicator of the processors running the simulations. Defaults to `MPI.COMM_WORLD`.
+        - **level_indices** : list, optional
+            Indices of the refinement levels to run. Defaults to all refinement levels.
+        - **aoa_list** : list, optional
+            Angles of attack to run. Defaults to `aoa_list` of the experimental set.
 
-                    if comm.rank == 0:
-                        print(f"{'#' * 30}")
-                        print(f"{'SIMULATION INFO':^30}")
-                        print(f"{'#' * 30}")
-                        print(f"{'Hierarchy':<20}: {hierarchy_info['name']}")
-                        print(f"{'Case Name':<20}: {case_info['name']}")
-                        print(f"{'Experimental Condition':<20}: {exp_set}")
-                        print(f"{'Reynolds Number (Re)':<20}: {exp_info['Re']}")
-                        print(f"{'Mach Number':<20}: {exp_info['mach']}")
-                        print(f"{'=' * 30}")
-                    
-                    # Extract the Angle of attacks for which the simulation has to be run
-                    aoa_list = exp_info['aoa_list']
+        Outputs
+        -------
+        **dict**
+            Results of each refinement level, keyed by refinement level (`L0`, `L1`, ...) and angle of attack (`aoa_<aoa>`).
+        """
+        reuse_problem = self.sim_info.get('reuse_problem', 'no') # Set up the problem once per refinement level
+        warm_start = self.sim_info.get('warm_start', 'no') # Start each angle of attack from the nearest converged solution
+        mesh_sequencing = self.sim_info.get('mesh_sequencing', 'no') # Start each refinement level from the coarser level solution
+        coarse_l2_convergence = self.sim_info.get('mesh_sequencing_L2Convergence') # Convergence tolerance for the coarser levels
+
+        aero_options = default_aero_options.copy()
+        aero_options.update(case_info['solver_parameters']) # Update ADflow solver parameters
+        l2_convergence = get_solver_option(aero_options, 'L2Convergence') # Convergence tolerance of the finest level
+        artifacts = get_output_artifacts(self.sim_info) # Artifacts written for each angle of attack, from the output profile
+        if get_solver_option(case_info['solver_parameters'], 'writeTecplotSurfaceSolution') is not None:
+            artifacts['tecplot_surface'] = None # Set by the user in the solver parameters
+        criteria = get_watchdog_criteria(self.sim_info) # Criteria of hopeless simulations, None if the watchdog is off
+        if criteria is not None:
+            set_solver_option(aero_options, 'printIterations', True) # Read by the watchdog of the parent process
+        retry_ladder = case_info.get('retry_ladder') or [] # Rungs of solver parameters tried in turn when a simulation fails
+        retries_left = self.sim_info.get('retry_budget') # Attempts above the first one left for this task, None for no limit
+
+        if comm.rank == 0:
+            print(f"{'#' * 30}")
+            print(f"{'SIMULATION INFO':^30}")
+            print(f"{'#' * 30}")
+            print(f"{'Hierarchy':<20}: {hierarchy_info['name']}")
+            print(f"{'Case Name':<20}: {case_info['name']}")
+            print(f"{'Experimental Condition':<20}: {exp_set}")
+            print(f"{'Reynolds Number (Re)':<20}: {exp_info['Re']}")
+            print(f"{'Mach Number':<20}: {exp_info['mach']}")
+            print(f"{'=' * 30}")
+        
+        # Extract the Angle of attacks for which the simulation has to be run
+        if aoa_list is None:
+            aoa_list = exp_info['aoa_list']
 
-                    exp_sim_info = {} # Creating experimental level sim info dictionary for overall sim info file
+        exp_results = {} # Creating dictionary to store the results of each refinement level
 
-                    for ii, mesh_file in enumerate(case_info['mesh_files']): # Loop for refinement levels
+        level_list = list(enumerate(case_info['mesh_files'])) # Order in which the refinement levels are run
+        if level_indices is not None:
+            level_list = [(ii, mesh_file) for ii, mesh_file in level_list if ii in level_indices]
+        if mesh_sequencing == 'yes':
+            level_list = level_list[::-1] # Run from the coarsest level to the finest level
+
+        for ii, mesh_file in level_list: # Loop for refinement levels
+
+            refinement_level = f"L{ii}"
 
-                        refinement_level = f"L{ii}"
-                        CLList = []
-                        CDList = []
-                        TList = []
-                        FList = [] # Fail flag list
+            level_results = {} # Creating refinement level dictionary to store the results of each angle of attack
 
-                        refinement_level_dict = {} # Creating refinement level sim info dictionary for overall sim info file
+            # Update Grid file
+            aero_options['gridFile'] = f"{case_info['meshes_folder_path']}/{mesh_file}"
 
-                        # Update Grid file
-                        aero_options['gridFile'] = f"{case_info['meshes_folder_path']}/{mesh_file}"
+            # Use the loose tolerance on all levels but the finest when mesh sequencing
+            if mesh_sequencing == 'yes' and coarse_l2_convergence is not None:
+                set_solver_option(aero_options, 'L2Convergence', l2_convergence if ii == 0 else coarse_l2_convergence)
 
+            prob = None # OpenMDAO problem of this refinement level, shared by all angles of attack when 'reuse_problem' is 'yes'
+            prob_rung = 0 # Rung of the retry ladder the problem was set up for. Only a problem set up for rung 0 is reused.
+            first_solve = True # The artifacts set to 'first' are only written for the first angle of attack run at this level
+
+            refinement_level_dir = f"{self.out_dir}/{hierarchy_info['name']}/{case_info['name']}/exp_set_{exp_set}/{refinement_level}"
+
+            # Volume solutions of the converged angles of attack at the next coarser level, to start this level from,
+            # and at this level, to warm start from. They are read back on rank 0 once the results of the previous level are written.
+            coarse_level = None
+            coarse_solutions = {}
+            converged_solutions = {}
+            if mesh_sequencing == 'yes' and ii + 1 < len(case_info['mesh_files']):
+                coarse_level = f"L{ii + 1}"
+            if comm.rank == 0:
+                self.writer.flush()
+                if coarse_level is not None:
+                    coarse_solutions = get_converged_solutions(f"{os.path.dirname(refinement_level_dir)}/{coarse_level}")
+                if warm_start == 'yes':
+                    converged_solutions = get_converged_solutions(refinement_level_dir)
+            coarse_solutions, converged_solutions = comm.bcast((coarse_solutions, converged_solutions), root=0)
+
+            aoa_run_list = aoa_list # Order in which the angles of attack are run
+            if warm_start == 'yes':
+                aoa_run_list = get_continuation_order(aoa_list)
+                converged_states = {} # States of converged angles of attack, kept in memory when the problem is reused
+    
+            for aoa in aoa_run_list: # loop for angles of attack
                 
-                        for aoa in aoa_list: # loop for angles of attack
-                            
-                            # Date
-                            current_date = date.today()
-                            date_string = current_date.strftime("%Y-%m-%d")
-
-                            # Define output directory -- Written to store in the parent directory
-                            output_dir = f"{self.out_dir}/{hierarchy_info['name']}/{case_info['name']}/exp_set_{exp_set}/{refinement_level}/aoa_{aoa}"
-                            aero_options['outputDirectory'] = output_dir
-
-                            # name of the simulation info file at the aoa level directory
-                            aoa_info_file = f"{output_dir}/aoa_{aoa}.yaml" 
-
-
-                            aoa_level_dict = {} # Creating aoa level sim info dictionary for overall sim info file
-
-                            # Call 'run_as_subprocess' function if the user has requested
-                            if sim_info_copy['run_as_subprocess'] == 'yes':
-                                run_as_subprocess(sim_info_copy, hierarchy_info, case_info, exp_info, aoa, output_dir, sim_info_copy['nproc'], comm)
-
-                            ################################################################################
-                            # OpenMDAO setup
-                            ################################################################################
-
-                            os.environ["OPENMDAO_REPORTS"]="0" # Do this to disable report generation by OpenMDAO
-
-                            prob = om.Problem()
-                            prob.model = Top(case_info, exp_info, aero_options)
-
-                            # Checking for existing sucessful simualtion info, 
-                            if os.path.exists(output_dir):
-                                try:
-                                    with open(aoa_info_file, 'r') as aoa_file:
-                                        aoa_sim_info = yaml.safe_load(aoa_file)
-                                    fail_flag = aoa_sim_info['fail_flag']
-                                    if fail_flag == 0:
-                                        CLList.append(aoa_sim_info['cl'])
-                                        CDList.append(aoa_sim_info['cd'])
-                                        TList.append(float(aoa_sim_info['wall_time'].replace(" sec", "")))
-                                        FList.append(fail_flag)
-
-                                        # To Store in the overall simulation out file in case of skipping
-                                        aoa_level_dict = {
-                                            'cl': float(aoa_sim_info['cl']),
-                                            'cd': float(aoa_sim_info['cd']),
-                                            'wall_time': aoa_sim_info['wall_time'],
-                                            'fail_flag': int(fail_flag),
-                                            'out_dir': output_dir,
-                                        }
-                                        refinement_level_dict[f"aoa_{aoa}"] = aoa_level_dict
-
-                                        if comm.rank == 0:
-                                            print(f"{'-'*50}")
-                                            print(f"{'NOTICE':^50}")
-                                            print(f"{'-'*50}")
-                                            print(f"Skipping Angle of Attack (AoA): {float(aoa):<5} | Reason: Existing successful simulation found")
-                                            print(f"{'-'*50}")
-                                        continue # Continue to next loop if there exists a successful simulation
-                                except:
-                                    fail_flag = 1
-                            elif not os.path.exists(output_dir): # Create the directory if it doesn't exist
-                                if comm.rank == 0:
-                                    os.makedirs(output_dir)
-
-                            
-                            if comm.rank == 0:
-                                print(f"{'-'*50}")
-                                print(f"Starting Angle of Attack (AoA): {float(aoa):<5}")
-                                print(f"{'-'*50}")
-                            # Setup the problem
-                            prob.setup()
-
-                            # Set the angle
-                            prob["aoa"] = float(aoa)
-
-                            om.n2(prob, show_browser=False, outfile=f"{output_dir}/mphys_aero.html")
-
-                            # Run the model
-                            aoa_start_time = time.time() # Stote the start time
-                            try:
-                                prob.run_model()
-                                fail_flag = 0
-                            except:
-                                fail_flag = 1
-                                
-                            aoa_end_time = time.time() # Store the end time
-                            aoa_run_time = aoa_end_time - aoa_start_time # Compute the run time
-
-                            prob.model.list_inputs(units=True)
-                            prob.model.list_outputs(units=True)
-                    
-                            # Store a Yaml file at this level
-                            aoa_out_dic = {
-                                'case': case_info['name'],
-                                'exp_info': exp_info,
-                                'mesh_file_used': f"{case_info['meshes_folder_path']}/{mesh_file}",
-                                'AOA': float(aoa),
-                                'cl': float(prob["cruise.aero_post.cl"][0]),
-                                'cd': float(prob["cruise.aero_post.cd"][0]),
-                                'refinement_level': refinement_level,
-                                'wall_time': f"{aoa_run_time:.2f} sec",
-                                'fail_flag': int(fail_flag),
-                                'out_dir': output_dir,
-                            }
-                            with open(aoa_info_file, 'w') as interim_out_yaml:
-                                yaml.dump(aoa_out_dic, interim_out_yaml, sort_keys=False)
-                        
-                            # To Store in the overall simulation out file
-                            aoa_level_dict = {
-                                'cl': float(prob["cruise.aero_post.cl"][0]),
-                                'cd': float(prob["cruise.aero_post.cd"][0]),
-                                'wall_time': f"{aoa_run_time:.2f} sec",
-                                'fail_flag': int(fail_flag),
-                                'out_dir': output_dir,
-                            }
-                            refinement_level_dict[f"aoa_{aoa}"] = aoa_level_dict
-
-                            # Adding cl, cd, wall time, Fail flags to their respective lists to create the csv file at refinement level
-                            CLList.append(float(prob["cruise.aero_post.cl"][0]))
-                            CDList.append(float(prob["cruise.aero_post.cd"][0]))
-                            TList.append(aoa_run_time)
-                            FList.append(fail_flag)
-                        
-                        
-                        # Write simulation results to a csv file
-                        refinement_level_data = {
-                            "Alpha": [f"{alpha:6.2f}" for alpha in aoa_list],
-                            "CL": [f"{cl:8.4f}" for cl in CLList],
-                            "CD": [f"{cd:8.4f}" for cd in CDList],
-                            "FFlag": [f"{int(FF):12f}" for FF in FList],
-                            "WTime": [f"{wall_time:10.2f}" for wall_time in TList]
+                # Date
+                current_date = date.today()
+                date_string = current_date.strftime("%Y-%m-%d")
+
+                # Define output directory -- Written to store in the parent directory
+                output_dir = f"{refinement_level_dir}/aoa_{aoa}"
+                aero_options['outputDirectory'] = output_dir
+
+                # name of the simulation info file at the aoa level directory
+                aoa_info_file = f"{output_dir}/aoa_{aoa}.yaml" 
+
+
+                aoa_level_dict = {} # Creating aoa level sim info dictionary for overall sim info file
+
+                # The simulation was already run by a subprocess or by a job array task, only collect its results
+                if self.sim_info['run_as_subprocess'] == 'yes' or self.collect_only:
+                    aoa_level_dict = self.get_aoa_results(hierarchy_info, case_info, exp_set, ii, aoa)
+                    if aoa_level_dict is None: # The subprocess or the array task did not write its results
+                        aoa_level_dict = {
+                            'cl': float('nan'),
+                            'cd': float('nan'),
+                            'wall_time': "0.00 sec",
+                            'fail_flag': 1,
+                            'out_dir': output_dir,
                         }
+                    level_results[f"aoa_{aoa}"] = aoa_level_dict
+                    continue
+
+                ################################################################################
+                # OpenMDAO setup
+                ################################################################################
+
+                os.environ["OPENMDAO_REPORTS"]="0" # Do this to disable report generation by OpenMDAO
+
+                # Checking for existing sucessful simualtion info, run with the same inputs
+                io_start_time = time.time()
+                input_hash = None # Hash of the inputs of the simulation, also used as its cache key
+                point_status = None
+                attempts = [] # Attempts of the simulation, carried on from earlier runs that failed with the same inputs
+                if comm.rank == 0:
+                    input_hash = self.get_input_hash(case_info, exp_info, ii, aoa)
+                    point_status = self.get_point_status(hierarchy_info, case_info, exp_set, ii, aoa, input_hash)
+                    if retry_ladder and point_status == 'new':
+                        attempts = read_aoa_attempts(aoa_info_file, input_hash)
+                input_hash, point_status, attempts = comm.bcast((input_hash, point_status, attempts), root=0)
+                rung = get_next_rung(attempts, retry_ladder) # Rung of the retry ladder of the next attempt
+                if rung is None: # The whole ladder was tried by earlier runs, and 'retry_failed' asks to start it again
+                    rung = 0
+                if rung == 0:
+                    attempts = []
+                if point_status == 'exhausted':
+                    level_results[f"aoa_{aoa}"] = self.get_aoa_results(hierarchy_info, case_info, exp_set, ii, aoa)
+                    if comm.rank == 0:
+                        print(f"{'-'*50}")
+                        print(f"{'NOTICE':^50}")
+                        print(f"{'-'*50}")
+                        print(f"Skipping Angle of Attack (AoA): {float(aoa):<5} | Reason: Failed on every rung of the retry ladder with the same inputs")
+                        print(f"{'-'*50}")
+                    continue
+                if point_status == 'reused':
+                    # To Store in the overall simulation out file in case of skipping
+                    aoa_level_dict = self.get_aoa_results(hierarchy_info, case_info, exp_set, ii, aoa)
+                    level_results[f"aoa_{aoa}"] = aoa_level_dict
 
-                        # Define the output file path
-                        refinement_level_dir = os.path.dirname(output_dir)
-                        ADflow_out_file = f"{refinement_level_dir}/ADflow_output.csv"
-                        
-                        df = pd.DataFrame(refinement_level_data) # Create a panda DataFrame
-                        # Write the DataFrame to a CSV file
-                        df.to_csv(ADflow_out_file, index=False)
+                    if comm.rank == 0:
+                        print(f"{'-'*50}")
+                        print(f"{'NOTICE':^50}")
+                        print(f"{'-'*50}")
+                        print(f"Skipping Angle of Attack (AoA): {float(aoa):<5} | Reason: Existing successful simulation found")
+                        print(f"{'-'*50}")
+                    continue # Continue to next loop if there exists a successful simulation
+                if comm.rank == 0 and point_status == 'stale':
+                    print(f"Rerunning Angle of Attack (AoA): {float(aoa):<5} | Reason: Inputs changed since the existing simulation")
+                if not os.path.exists(output_dir): # Create the directory if it doesn't exist
+                    if comm.rank == 0:
+                        os.makedirs(output_dir)
+
+                # The subprocess was stopped by the watchdog while running this simulation, record it as failed instead of running it again,
+                # and carry on up the retry ladder if there are rungs left
+                watchdog_stop = None
+                if criteria is not None:
+                    if comm.rank == 0:
+                        watchdog_stop = read_watchdog_stop(output_dir)
+                    watchdog_stop = comm.bcast(watchdog_stop, root=0)
+                if watchdog_stop is not None:
+                    attempts.append({
+                        'rung': rung,
+                        'options': get_retry_options(retry_ladder, rung),
+                        'fail_flag': 1,
+                        'wall_time': watchdog_stop['wall_time'],
+                        'core_sec': round(watchdog_stop['wall_time'] * comm.size, 3),
+                        'watchdog_reason': watchdog_stop['reason'],
+                    })
+                    rung += 1
+                    retry = rung <= len(retry_ladder) and (retries_left is None or retries_left > 0)
+                    if comm.rank == 0:
+                        print(f"{'-'*50}")
+                        print(f"{'NOTICE':^50}")
+                        print(f"{'-'*50}")
+                        print(f"{'Retrying' if retry else 'Skipping'} Angle of Attack (AoA): {float(aoa):<5} | Reason: Stopped by the watchdog ({watchdog_stop['reason']})")
+                        print(f"{'-'*50}")
+                    aoa_out_dic = self.build_aoa_out_dic(case_info, exp_info, ii, aoa, output_dir, cl=float('nan'), cd=float('nan'), wall_time=watchdog_stop['wall_time'], nproc=comm.size, fail_flag=1, input_hash=input_hash,
+                                                         watchdog_reason=watchdog_stop['reason'], watchdog_iterations=watchdog_stop['iterations'], attempts=attempts)
+                    aoa_level_dict = self.write_aoa_results(hierarchy_info, case_info, exp_set, ii, aoa, aoa_out_dic, comm)
+                    if comm.rank == 0:
+                        os.remove(f"{output_dir}/{watchdog_stop_file}")
+                    self.writer.flush() # The stop is kept if the subprocess is stopped again
+                    if retries_left is not None and retry:
+                        retries_left -= 1
+                    if not retry:
+                        level_results[f"aoa_{aoa}"] = aoa_level_dict
+                        continue
+
+                # Take the results of an identical simulation from the cache, if there is one
+                cache_key = None
+                if self.cache is not None and input_hash is not None:
+                    cache_key = input_hash
+                    cached_result = None
+                    if comm.rank == 0:
+                        cached_result = self.cache.lookup(cache_key, output_dir)
+                    cached_result = comm.bcast(cached_result, root=0)
+                    if cached_result is not None:
+                        if comm.rank == 0:
+                            print(f"{'-'*50}")
+                            print(f"{'NOTICE':^50}")
+                            print(f"{'-'*50}")
+                            print(f"Skipping Angle of Attack (AoA): {float(aoa):<5} | Reason: Identical simulation found in the cache")
+                            print(f"{'-'*50}")
+                        aoa_out_dic = self.build_aoa_out_dic(case_info, exp_info, ii, aoa, output_dir, cl=cached_result['cl'], cd=cached_result['cd'], wall_time=cached_result['wall_time'], nproc=cached_result['nproc'], fail_flag=0, input_hash=input_hash,
+                                                             cache_key=cache_key)
+                        level_results[f"aoa_{aoa}"] = self.write_aoa_results(hierarchy_info, case_info, exp_set, ii, aoa, aoa_out_dic, comm)
+                        with self.tracer.span('barrier', category='barrier'):
+                            comm.Barrier() # The cached output files are copied on rank 0
+                        if warm_start == 'yes':
+                            restart_file = comm.bcast(find_restart_file(output_dir) if comm.rank == 0 else None, root=0)
+                            if restart_file is not None:
+                                converged_solutions[float(aoa)] = restart_file
+                        continue
+
+                phase_times = dict.fromkeys(timing_phases, 0.0) # Time spent by this rank in each phase of the simulation
+                phase_times['io'] = time.time() - io_start_time
+                self.tracer.complete('checks', io_start_time, category='io')
+                aoa_trace_start_time = io_start_time
+                phase_times['spawn'], self.spawn_time = self.spawn_time, 0.0
+
+                if comm.rank == 0:
+                    print(f"{'-'*50}")
+                    print(f"Starting Angle of Attack (AoA): {float(aoa):<5}")
+                    print(f"{'-'*50}")
+
+                write_artifact = {artifact: when == 'all' or (when == 'first' and first_solve) for artifact, when in artifacts.items()}
+                if artifacts['tecplot_surface'] is not None:
+                    set_solver_option(aero_options, 'writeTecplotSurfaceSolution', write_artifact['tecplot_surface'])
+
+                artifact_time = 0.0 # Time spent writing artifacts
+                aoa_run_time = 0.0 # Time spent solving, by all the attempts
+                first_attempt = True
+                while True: # Attempts up the retry ladder, until one succeeds, the ladder ends or the retry budget is spent
+                    setup_start_time = time.time()
+                    retry_options = get_retry_options(retry_ladder, rung)
+                    attempt_options = aero_options.copy()
+                    for option, value in retry_options.items():
+                        if option != 'warm_start':
+                            set_solver_option(attempt_options, option, value)
+                    # The coarser level solution is only read as the restart file of a new problem, so the problem is set up again to start from it
+                    from_coarse_level = mesh_sequencing == 'yes' and float(aoa) in coarse_solutions
+                    reuse_prob = reuse_problem == 'yes' and prob is not None and prob_rung == 0 and rung == 0 and not from_coarse_level
+
+                    # Find the solution to start from. A converged neighbor asked for by the rung of the retry ladder is
+                    # preferred, then the same angle of attack at the coarser level, then the nearest converged angle of attack at this level.
+                    warm_start_from = None
+                    mesh_sequencing_from = None
+                    if reuse_prob: # The states are set directly in the problem
+                        if warm_start == 'yes':
+                            warm_start_from = get_nearest_aoa(aoa, list(converged_states.keys()))
+                    elif warm_start == 'yes' or mesh_sequencing == 'yes' or retry_options.get('warm_start') == 'yes': # A volume solution is used as the restart file of the new problem
+                        restart_file = None
+                        if retry_options.get('warm_start') == 'yes':
+                            neighbor_solutions = None
+                            if comm.rank == 0:
+                                self.writer.flush() # The results of the angles of attack run before are read back
+                                neighbor_solutions = get_converged_solutions(refinement_level_dir)
+                                neighbor_solutions.pop(float(aoa), None)
+                            neighbor_solutions = comm.bcast(neighbor_solutions, root=0)
+                            warm_start_from = get_nearest_aoa(aoa, list(neighbor_solutions.keys()))
+                            if warm_start_from is not None:
+                                restart_file = neighbor_solutions[warm_start_from]
+                        elif mesh_sequencing == 'yes' and float(aoa) in coarse_solutions:
+                            mesh_sequencing_from = coarse_level
+                            restart_file = coarse_solutions[float(aoa)]
+                        elif warm_start == 'yes':
+                            warm_start_from = get_nearest_aoa(aoa, list(converged_solutions.keys()))
+                            if warm_start_from is not None:
+                                restart_file = converged_solutions[warm_start_from]
+                        if restart_file is not None:
+                            attempt_options['restartFile'] = restart_file
+                        else:
+                            attempt_options.pop('restartFile', None)
+                    if comm.rank == 0:
+                        print(f"{watchdog_point_prefix}{output_dir}", flush=True) # Tells the watchdog which attempt the next solver iterations belong to
+                    if comm.rank == 0 and rung > 0:
+                        print(f"Attempting rung {rung} of the retry ladder: {retry_options}")
+                    if comm.rank == 0 and warm_start_from is not None:
+                        print(f"Warm starting from the converged solution at AoA: {warm_start_from}")
+                    if comm.rank == 0 and mesh_sequencing_from is not None:
+                        print(f"Starting from the converged solution at refinement level: {mesh_sequencing_from}")
+
+                    mesh_load_time = 0.0
+                    if reuse_prob:
+                        # Reuse the problem set up for a previous angle of attack. Only the output directory changes,
+                        # and the flow is reset to free stream so that the results match a fresh setup.
+                        solver = prob.model.adflow_builder.solver
+                        solver.setOption("outputDirectory", output_dir)
+                        if artifacts['tecplot_surface'] is not None:
+                            solver.setOption("writeTecplotSurfaceSolution", write_artifact['tecplot_surface'])
+                        if warm_start_from is not None:
+                            solver.setStates(converged_states[warm_start_from])
+                        else:
+                            solver.resetFlow(prob.model.ap0)
+                    else:
+                        # Setup the problem. The solver stack is imported here, so that reading results and submitting jobs do not load it.
+                        import openmdao.api as om
+                        from mdss.top import Top
+                        prob = om.Problem(comm=comm)
+                        prob.model = Top(case_info, exp_info, attempt_options)
+                        prob.setup()
+                        prob_rung = rung
+                        mesh_load_time = prob.model.mesh_load_time
+
+                    # Set the angle
+                    prob["aoa"] = float(aoa)
+                    setup_time = time.time() - setup_start_time
+                    phase_times['mesh_load'] += mesh_load_time
+                    phase_times['setup'] += setup_time - mesh_load_time
+                    self.tracer.complete('setup', setup_start_time, category='setup', mesh_load=round(mesh_load_time, 3), rung=rung)
+
+                    artifact_start_time = time.time()
+                    if write_artifact['n2'] and first_attempt:
+                        import openmdao.api as om
+                        om.n2(prob, show_browser=False, outfile=f"{output_dir}/mphys_aero.html")
+                    artifact_time += time.time() - artifact_start_time
+
+                    # Run the model
+                    solve_start_time = time.time()
+                    try:
+                        prob.run_model()
+                        fail_flag = 0
+                    except:
+                        fail_flag = 1
+                    solve_end_time = time.time()
+                    aoa_run_time += solve_end_time - solve_start_time
+                    self.tracer.complete('solve', solve_start_time, solve_end_time, category='solve', fail_flag=fail_flag, rung=rung)
+
+                    # Tell why the attempt failed, when it stalled, diverged or produced NaNs
+                    watchdog_reason = None
+                    solver = prob.model.adflow_builder.solver
+                    if criteria is not None and fail_flag == 1 and hasattr(solver, 'getConvergenceHistory'):
+                        watchdog_reason = check_history(solver.getConvergenceHistory(), criteria)
+
+                    attempt_time = setup_time + solve_end_time - solve_start_time
+                    attempts.append({
+                        'rung': rung,
+                        'options': retry_options,
+                        'fail_flag': int(fail_flag),
+                        'wall_time': round(attempt_time, 3),
+                        'core_sec': round(attempt_time * comm.size, 3),
+                        'watchdog_reason': watchdog_reason,
+                    })
+                    first_attempt = False
+                    if fail_flag == 0 or rung >= len(retry_ladder) or (retries_left is not None and retries_left <= 0):
+                        break
+
+                    # Record the failed attempts before the next one, so that a run stopped during it carries on from the right rung
+                    aoa_out_dic = self.build_aoa_out_dic(case_info, exp_info, ii, aoa, output_dir, cl=float('nan'), cd=float('nan'), wall_time=aoa_run_time, nproc=comm.size, fail_flag=1, input_hash=input_hash,
+                                                         attempts=attempts)
+                    self.write_aoa_results(hierarchy_info, case_info, exp_set, ii, aoa, aoa_out_dic, comm, journal=False) # Journaled once the simulation is completed
+                    self.writer.flush()
+                    rung += 1
+                    if retries_left is not None:
+                        retries_left -= 1
+
+                artifact_start_time = time.time()
+                if write_artifact['listings']:
+                    out_stream = sys.stdout if comm.rank == 0 else None # Listed once, not by every rank
+                    prob.model.list_inputs(units=True, out_stream=out_stream)
+                    prob.model.list_outputs(units=True, out_stream=out_stream)
+                if write_artifact['history'] and hasattr(solver, 'getConvergenceHistory'):
+                    self.write_convergence_history(solver.getConvergenceHistory(), f"{output_dir}/aoa_{aoa}_history.npz", {
+                        'hierarchy': hierarchy_info['name'],
+                        'case': case_info['name'],
+                        'exp_set': exp_set,
+                        'level': ii,
+                        'alpha': float(aoa),
+                        'fail_flag': int(fail_flag),
+                    }, comm)
+                artifact_time += time.time() - artifact_start_time
+                first_solve = False
+
+                # Keep the converged solution to warm start the remaining angles of attack
+                post_start_time = time.time()
+                if warm_start == 'yes' and fail_flag == 0:
+                    restart_file = comm.bcast(find_restart_file(output_dir) if comm.rank == 0 else None, root=0)
+                    if restart_file is not None:
+                        converged_solutions[float(aoa)] = restart_file
+                    if reuse_problem == 'yes':
+                        converged_states[float(aoa)] = prob.model.adflow_builder.solver.getStates()
+                phase_times['solve'] = aoa_run_time
+                phase_times['post'] = artifact_time + time.time() - post_start_time
+
+                # Store the successful simulation in the cache
+                io_start_time = time.time()
+                if cache_key is not None and fail_flag == 0 and comm.rank == 0:
+                    self.writer.flush() # The convergence history is copied into the cache entry
+                    self.cache.store(cache_key, {'cl': float(prob["cruise.aero_post.cl"][0]), 'cd': float(prob["cruise.aero_post.cd"][0]), 'wall_time': aoa_run_time, 'nproc': comm.size}, output_dir)
+                phase_times['io'] += time.time() - io_start_time
+                self.tracer.complete('cache store', io_start_time, category='io')
+                gather_start_time = time.time()
+                timings = gather_timings(phase_times, comm) # Statistics across the ranks, on rank 0
+                self.tracer.complete('gather timings', gather_start_time, category='barrier')
+
+                # Store a Yaml file at this level, written by a single rank while the solver carries on, and journal the completed simulation
+                aoa_out_dic = self.build_aoa_out_dic(case_info, exp_info, ii, aoa, output_dir, cl=float(prob["cruise.aero_post.cl"][0]), cd=float(prob["cruise.aero_post.cd"][0]), wall_time=aoa_run_time, nproc=comm.size, fail_flag=int(fail_flag), input_hash=input_hash,
+                                                     artifact_time=artifact_time, timings=timings, watchdog_reason=watchdog_reason, attempts=attempts, warm_start_from=warm_start_from, mesh_sequencing_from=mesh_sequencing_from)
+                level_results[f"aoa_{aoa}"] = self.write_aoa_results(hierarchy_info, case_info, exp_set, ii, aoa, aoa_out_dic, comm)
+                self.tracer.complete(f"aoa {aoa}", aoa_trace_start_time, category='task', case=case_info['name'], exp_set=exp_set, level=refinement_level, fail_flag=int(fail_flag))
+
+            # Add refinement level results to exp level results
+            exp_results[refinement_level] = level_results
+
+        self.writer.flush() # The 'aoa_<aoa>.yaml' files are read by the other processes once this returns
+        self.tracer.flush()
+        return exp_results
+
+    def build_aoa_out_dic(self, case_info, exp_info, ii, aoa, output_dir, cl, cd, wall_time, nproc, fail_flag, input_hash, **details):
+        """
+        Builds the simulation info of an angle of attack, with the same entries whether the simulation was run, stopped by the watchdog or taken from the cache.
+
+        Inputs
+        ------
+        - **case_info** : dict
+            Details about the simulation case.
+        - **exp_info** : dict
+            Experimental conditions of the experimental set.
+        - **ii** : int
+            Index of the refinement level.
+        - **aoa** : float
+            Angle of attack.
+        - **output_dir** : str
+            Output directory of the angle of attack.
+        - **cl**, **cd** : float
+            Lift and drag coefficients, NaN if the simulation failed.
+        - **wall_time** : float
+            Time in seconds spent running the simulation.
+        - **nproc** : int
+            Number of processors that ran the simulation.
+        - **fail_flag** : int
+            0 if the simulation succeeded, 1 otherwise.
+        - **input_hash** : str
+            Hash of the inputs of the simulation.
+        - **details** : optional
+            Entries known only for some simulations, such as `artifact_time` in seconds, `timings`, `attempts`, `watchdog_reason` or `cache_key`. They are added after the common entries.
 
-                        # Add csv file location to the overall simulation out file
-                        refinement_level_dict['csv_file'] = ADflow_out_file
-                        refinement_level_dict['refinement_out_dir'] = refinement_level_dir
+        Outputs
+        -------
+        **dict**
+            Simulation info of the angle of attack, with the times in seconds, to be written by `write_aoa_results()`.
+        """
+        aoa_out_dic = {
+            'case': case_info['name'],
+            'exp_info': exp_info,
+            'mesh_file_used': f"{case_info['meshes_folder_path']}/{case_info['mesh_files'][ii]}",
+            'AOA': float(aoa),
+            'cl': cl,
+            'cd': cd,
+            'refinement_level': f"L{ii}",
+            'wall_time': wall_time,
+            'nproc': nproc,
+            'fail_flag': fail_flag,
+            'out_dir': output_dir,
+            'input_hash': input_hash,
+        }
+        aoa_out_dic.update(details)
+        return aoa_out_dic
 
-                        # Add refinement level dict to exp level dict
-                        exp_sim_info[f"{refinement_level}"] = refinement_level_dict
+    def write_aoa_results(self, hierarchy_info, case_info, exp_set, ii, aoa, aoa_out_dic, comm, journal=True):
+        """
+        Writes the simulation info of an angle of attack to its `aoa_<aoa>.yaml` file, and appends it to the journal.
+
+        Inputs
+        ------
+        - **hierarchy_info** : dict
+            Information about the hierarchy, including hierarchy name.
+        - **case_info** : dict
+            Details about the simulation case.
+        - **exp_set** : int
+            Index of the experimental set in the case.
+        - **ii** : int
+            Index of the refinement level.
+        - **aoa** : float
+            Angle of attack.
+        - **aoa_out_dic** : dict
+            Simulation info of the angle of attack, as returned by `build_aoa_out_dic()`.
+        - **comm** : MPI communicator
+            Communicator of the processors running the simulation. The file is written, and the journal appended to, by its rank 0.
+        - **journal** : bool, optional
+            If False, the simulation info is only written to the file, as for the attempts of a simulation that is not completed yet. Defaults to True.
 
-                    # Add experimental level simulation to the overall simulation out file
-                    exp_out_dir = os.path.dirname(refinement_level_dir)
-                    exp_sim_info['exp_set_out_dir'] = exp_out_dir
-                    sim_out_info['hierarchies'][hierarchy]['cases'][case]['exp_sets'][exp_set]['sim_info'] = exp_sim_info
+        Outputs
+        -------
+        **dict**
+            Dictionary with `cl`, `cd`, `wall_time`, `fail_flag` and `out_dir`, to be stored in the overall simulation info file.
+        """
+        aoa_info = dict(aoa_out_dic, wall_time=f"{aoa_out_dic['wall_time']:.2f} sec")
+        if 'artifact_time' in aoa_out_dic:
+            aoa_info['artifact_time'] = f"{aoa_out_dic['artifact_time']:.2f} sec"
+        self.writer.write_yaml(f"{aoa_out_dic['out_dir']}/aoa_{aoa}.yaml", aoa_info, comm)
+        if journal and comm.rank == 0:
+            self.write_journal_record(hierarchy_info, case_info, exp_set, ii, aoa, {field: aoa_out_dic[field] for field in journal_fields if field in aoa_out_dic})
+        return {field: aoa_info[field] for field in ('cl', 'cd', 'wall_time', 'fail_flag', 'out_dir')}
+
+    def write_results_db(self, results):
+        """
+        Stores the results of the simulation series in the results database.
 
-        end_time = time.time()
-        end_wall_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        net_run_time = end_time - start_time
-        sim_out_info['overall_sim_info'] = {
-            'start_time': start_wall_time,
-            'end_time': end_wall_time,
-            'total_wall_time': f"{net_run_time:.2f} sec"
+        Inputs
+        ------
+        - **results** : dict
+            Results of each experimental set keyed by `(hierarchy, case, exp_set)`, as returned by `run_exp_set()`.
+
+        Notes
+        -----
+        - The wall times and numbers of processors are read with `get_aoa_record()`, as the results only hold the wall times rounded to the hundredth of a second.
+        """
+        records = []
+        for (hierarchy, case, exp_set), exp_results in results.items():
+            hierarchy_info = self.sim_info['hierarchies'][hierarchy]
+            case_info = hierarchy_info['cases'][case]
+            exp_info = case_info['exp_sets'][exp_set]
+            for refinement_level, level_results in exp_results.items():
+                ii = int(refinement_level[1:])
+                for aoa_key, aoa_level_dict in level_results.items():
+                    aoa = aoa_key[len("aoa_"):] # Angles of attack may be added outside 'aoa_list' by 'SimResults'
+                    aoa_record = self.get_aoa_record(hierarchy_info, case_info, exp_set, refinement_level, aoa_key, aoa_level_dict)
+                    records.append({
+                        'hierarchy': hierarchy_info['name'],
+                        'case_name': case_info['name'],
+                        'exp_set': exp_set,
+                        'level': ii,
+                        'alpha': float(aoa),
+                        'mach': exp_info['mach'],
+                        'Re': exp_info['Re'],
+                        'Temp': exp_info['Temp'],
+                        'mesh_file': f"{case_info['meshes_folder_path']}/{case_info['mesh_files'][ii]}",
+                        'cl': aoa_level_dict['cl'],
+                        'cd': aoa_level_dict['cd'],
+                        'wall_time': float(aoa_record.get('wall_time', str(aoa_level_dict['wall_time']).replace(" sec", ""))),
+                        'nproc': aoa_record.get('nproc'),
+                        'fail_flag': aoa_level_dict['fail_flag'],
+                        'out_dir': aoa_level_dict['out_dir'],
+                    })
+        store_results(self.results_db_file, records)
+
+    def write_convergence_history(self, history, history_file, point_info, comm):
+        """
+        Writes the convergence history of the last solution of ADflow, such as the residuals and forces at each iteration, to a compressed NPZ file.
+
+        Inputs
+        ------
+        - **history** : dict
+            Convergence history returned by `getConvergenceHistory()` of the ADflow solver.
+        - **history_file** : str
+            Path to the NPZ file, written next to the `aoa_<aoa>.yaml` file.
+        - **point_info** : dict
+            Hierarchy, case, experimental set, refinement level, angle of attack and fail flag of the simulation, stored with the history so that it can be merged with others by `get_convergence_histories()`.
+        - **comm** : MPI communicator
+            Communicator of the processors running the simulation. The file is written by its rank 0.
+
+        Notes
+        -----
+        - The history holds one array per variable of `monitorvariables`, along with the iteration counters of ADflow. Variables that are not numeric or string arrays are left out.
+        - Nothing is written if the installed ADflow does not provide `getConvergenceHistory()`, as there is no history to pass.
+        """
+        arrays = {}
+        for variable, values in history.items():
+            values = np.asarray(values)
+            if values.dtype.kind in 'biufU': # Kept without pickling
+                arrays[variable] = values
+        for key, value in point_info.items():
+            arrays[f"point_{key}"] = np.asarray(value)
+        self.writer.write_npz(history_file, arrays, comm)
+
+    def get_timing_rollups(self, results):
+        """
+        Rolls up the timings of the simulations by refinement level, by case, and for the simulation series.
+
+        Inputs
+        ------
+        - **results** : dict
+            Results of each experimental set keyed by `(hierarchy, case, exp_set)`, as returned by `run_exp_set()`.
+
+        Outputs
+        -------
+        **tuple**
+            Roll-ups keyed by `(hierarchy, case, exp_set, refinement_level)`, roll-ups keyed by `(hierarchy, case)`, and the roll-up of the simulation series. Each roll-up holds the wall time and core-seconds of each phase and of all the phases (`total`), as returned by `add_timings()`.
+
+        Notes
+        -----
+        - The timings are read from the journal when it is available, and from the `aoa_<aoa>.yaml` files otherwise. Simulations taken from the cache have no timings.
+        """
+        level_timings = {}
+        case_timings = {}
+        series_timings = {}
+        for (hierarchy, case, exp_set), exp_results in results.items():
+            hierarchy_info = self.sim_info['hierarchies'][hierarchy]
+            case_info = hierarchy_info['cases'][case]
+            for refinement_level, level_results in exp_results.items():
+                for aoa_key, aoa_level_dict in level_results.items():
+                    aoa_record = self.get_aoa_record(hierarchy_info, case_info, exp_set, refinement_level, aoa_key, aoa_level_dict)
+                    timings, nproc = aoa_record.get('timings'), aoa_record.get('nproc')
+                    if timings is None: # Not simulated, or taken from the cache
+                        continue
+                    add_timings(level_timings.setdefault((hierarchy, case, exp_set, refinement_level), {}), timings, nproc)
+                    add_timings(case_timings.setdefault((hierarchy, case), {}), timings, nproc)
+                    add_timings(series_timings, timings, nproc)
+        return level_timings, case_timings, series_timings
+
+    def get_retry_rollups(self, results):
+        """
+        Rolls up the attempts of the simulations by rung of the retry ladder of each case, to show which rungs pay off.
+
+        Inputs
+        ------
+        - **results** : dict
+            Results of each experimental set keyed by `(hierarchy, case, exp_set)`, as returned by `run_exp_set()`.
+
+        Outputs
+        -------
+        **dict**
+            Roll-ups keyed by `(hierarchy, case)`, for the cases with a retry ladder. Each roll-up holds the options, number of attempts, number of successes, wall time and core-seconds of each rung, as returned by `add_attempts()`.
+
+        Notes
+        -----
+        - The attempts are read from the journal when it is available, and from the `aoa_<aoa>.yaml` files otherwise. The attempts of earlier runs that failed with the same inputs are carried on, so they are counted too.
+        """
+        retry_rollups = {}
+        for (hierarchy, case, exp_set), exp_results in results.items():
+            hierarchy_info = self.sim_info['hierarchies'][hierarchy]
+            case_info = hierarchy_info['cases'][case]
+            if not case_info.get('retry_ladder'):
+                continue
+            retry_rollup = retry_rollups.setdefault((hierarchy, case), {})
+            for refinement_level, level_results in exp_results.items():
+                for aoa_key, aoa_level_dict in level_results.items():
+                    attempts = self.get_aoa_record(hierarchy_info, case_info, exp_set, refinement_level, aoa_key, aoa_level_dict).get('attempts')
+                    if attempts: # Not simulated, or taken from the cache
+                        add_attempts(retry_rollup, attempts, case_info['retry_ladder'])
+        return retry_rollups
+
+    def get_artifact_cost(self, results):
+        """
+        Returns the time and disk space spent on the artifacts of the output profile, such as N2 diagrams and Tecplot surface solutions.
+
+        Inputs
+        ------
+        - **results** : dict
+            Results of each experimental set keyed by `(hierarchy, case, exp_set)`, as returned by `run_exp_set()`.
+
+        Outputs
+        -------
+        **dict**
+            Output profile, time spent writing the N2 diagrams and model listings, and size of the artifact files, to be stored in the overall simulation info file.
+
+        Notes
+        -----
+        - The Tecplot surface solutions are written by ADflow during the simulation, so only their size is counted.
+        """
+        artifact_time = 0.0
+        artifact_size = 0
+        for (hierarchy, case, exp_set), exp_results in results.items():
+            hierarchy_info = self.sim_info['hierarchies'][hierarchy]
+            case_info = hierarchy_info['cases'][case]
+            for refinement_level, level_results in exp_results.items():
+                for aoa_key, aoa_level_dict in level_results.items():
+                    aoa_out_dir = aoa_level_dict.get('out_dir')
+                    if aoa_out_dir is None: # The simulation was not run
+                        continue
+                    artifact_time += float(self.get_aoa_record(hierarchy_info, case_info, exp_set, refinement_level, aoa_key, aoa_level_dict).get('artifact_time', 0.0))
+                    artifact_size += get_artifact_size(aoa_out_dir)
+        return {
+            'name': self.sim_info.get('output_profile', 'standard'),
+            'artifacts': get_output_artifacts(self.sim_info),
+            'artifact_time': f"{artifact_time:.2f} sec",
+            'artifact_size': f"{artifact_size / 1e6:.2f} MB",
+        }
+
+    def get_aoa_record(self, hierarchy_info, case_info, exp_set, refinement_level, aoa_key, aoa_level_dict):
+        """
+        Returns the simulation info of an angle of attack for the roll-ups, from the journal when it is available, and from its `aoa_<aoa>.yaml` file otherwise.
+
+        Inputs
+        ------
+        - **hierarchy_info** : dict
+            Information about the hierarchy, including hierarchy name.
+        - **case_info** : dict
+            Details about the simulation case.
+        - **exp_set** : int
+            Index of the experimental set in the case.
+        - **refinement_level** : str
+            Refinement level, such as `L0`.
+        - **aoa_key** : str
+            Key of the angle of attack in the results of the refinement level, such as `aoa_2.0`.
+        - **aoa_level_dict** : dict
+            Results of the angle of attack, as returned by `run_exp_set()`.
+
+        Outputs
+        -------
+        **dict**
+            Journal record or simulation info of the angle of attack, with `wall_time` and `artifact_time` in seconds. Empty if the angle of attack was not simulated.
+        """
+        if self.journal is not None:
+            aoa_record = self.journal.get(get_journal_key(hierarchy_info['name'], case_info['name'], exp_set, int(refinement_level[1:]), aoa_key[len("aoa_"):]))
+        elif aoa_level_dict.get('out_dir') is not None:
+            aoa_record = read_aoa_info(f"{aoa_level_dict['out_dir']}/{aoa_key}.yaml")
+        else:
+            aoa_record = None
+        return aoa_record or {}
+
+    def write_level_outputs(self, hierarchy_info, case_info, exp_set, exp_info, ii, level_results):
+        """
+        Writes the CSV file of a refinement level, and gathers the refinement level information for the overall simulation info file.
+
+        Inputs
+        ------
+        - **hierarchy_info** : dict
+            Information about the hierarchy, including hierarchy name.
+        - **case_info** : dict
+            Details about the simulation case, such as mesh files, geometry, and solver parameters.
+        - **exp_set** : int
+            Index of the experimental set in the case.
+        - **exp_info** : dict
+            Experimental conditions, including the list of angles of attack.
+        - **ii** : int
+            Index of the refinement level.
+        - **level_results** : dict
+            Results of each angle of attack at the refinement level, as returned by `run_exp_set()`.
+
+        Outputs
+        -------
+        **dict**
+            Refinement level simulation info to be stored in the overall simulation info file.
+        """
+        refinement_level_dir = f"{self.out_dir}/{hierarchy_info['name']}/{case_info['name']}/exp_set_{exp_set}/L{ii}"
+
+        aoa_list = exp_info['aoa_list']
+        if self.sim_info.get('warm_start', 'no') == 'yes':
+            aoa_list = sorted(aoa_list, key=float) # Write the rows in the order of angle of attack rather than the order they were run
+
+        AlphaList = []
+        CLList = []
+        CDList = []
+        TList = []
+        FList = [] # Fail flag list
+
+        refinement_level_dict = {} # Creating refinement level sim info dictionary for overall sim info file
+
+        for aoa in aoa_list: # loop for angles of attack
+            aoa_level_dict = level_results.get(f"aoa_{aoa}")
+            if aoa_level_dict is None: # Angle of attack was not run
+                continue
+            refinement_level_dict[f"aoa_{aoa}"] = aoa_level_dict
+
+            # Adding cl, cd, wall time, Fail flags to their respective lists to create the csv file at refinement level
+            AlphaList.append(float(aoa))
+            CLList.append(aoa_level_dict['cl'])
+            CDList.append(aoa_level_dict['cd'])
+            TList.append(float(aoa_level_dict['wall_time'].replace(" sec", "")))
+            FList.append(aoa_level_dict['fail_flag'])
+
+        # Write simulation results to a csv file
+        refinement_level_data = {
+            "Alpha": [f"{alpha:6.2f}" for alpha in AlphaList],
+            "CL": [f"{cl:8.4f}" for cl in CLList],
+            "CD": [f"{cd:8.4f}" for cd in CDList],
+            "FFlag": [f"{int(FF):12f}" for FF in FList],
+            "WTime": [f"{wall_time:10.2f}" for wall_time in TList]
+        }
+
+        # Define the output file path
+        ADflow_out_file = f"{refinement_level_dir}/ADflow_output.csv"
+        os.makedirs(refinement_level_dir, exist_ok=True)
+        
+        df = pd.DataFrame(refinement_level_data) # Create a panda DataFrame
+        # Write the DataFrame to a CSV file
+        self.writer.write_csv(ADflow_out_file, df, index=False)
+
+        # Add csv file location to the overall simulation out file
+        refinement_level_dict['csv_file'] = ADflow_out_file
+        refinement_level_dict['refinement_out_dir'] = refinement_level_dir
+
+        return refinement_level_dict
+
+    ################################################################################
+    # Code for scheduling the tasks
+    ################################################################################
+    def replay_journal(self):
+        """
+        Loads the latest record of each angle of attack from the journal of completed simulations, and broadcasts it to all ranks.
+
+        If the journal does not exist yet, it is created from the `aoa_<aoa>.yaml` files of earlier runs, so that the next runs only replay the journal. If `resume` is `scan`, the journal is not replayed, and the `aoa_<aoa>.yaml` files are read instead.
+        """
+        if self.sim_info.get('resume', 'journal') == 'scan':
+            self.journal = None
+            return
+        journal = None
+        if comm.rank == 0:
+            journal = load_journal(self.journal_file)
+            if journal is None: # Seed the journal from the files of earlier runs
+                journal = {}
+                open(self.journal_file, 'a').close()
+                for hierarchy_info in self.sim_info['hierarchies']: # loop for Hierarchy level
+                    for case_info in hierarchy_info['cases']: # loop for cases in hierarchy
+                        for exp_set, exp_info in enumerate(case_info['exp_sets']): # loop for experimental datasets that may present
+                            for ii in range(len(case_info['mesh_files'])):
+                                for aoa in exp_info['aoa_list']:
+                                    aoa_out_dir = f"{self.out_dir}/{hierarchy_info['name']}/{case_info['name']}/exp_set_{exp_set}/L{ii}/aoa_{aoa}"
+                                    aoa_level_dict = read_aoa_results(f"{aoa_out_dir}/aoa_{aoa}.yaml", aoa_out_dir)
+                                    if aoa_level_dict is None:
+                                        continue
+                                    aoa_info = read_aoa_info(f"{aoa_out_dir}/aoa_{aoa}.yaml")
+                                    aoa_results = {field: aoa_info[field] for field in journal_fields if field in aoa_info}
+                                    aoa_results.update(aoa_level_dict, wall_time=aoa_info['wall_time'])
+                                    record = self.write_journal_record(hierarchy_info, case_info, exp_set, ii, aoa, aoa_results)
+                                    journal[get_journal_key(hierarchy_info['name'], case_info['name'], exp_set, ii, aoa)] = record
+        self.journal = comm.bcast(journal, root=0)
+
+    def write_journal_record(self, hierarchy_info, case_info, exp_set, ii, aoa, aoa_results):
+        """
+        Appends the results of an angle of attack to the journal of completed simulations.
+
+        Inputs
+        ------
+        - **hierarchy_info** : dict
+            Information about the hierarchy, including hierarchy name.
+        - **case_info** : dict
+            Details about the simulation case.
+        - **exp_set** : int
+            Index of the experimental set in the case.
+        - **ii** : int
+            Index of the refinement level.
+        - **aoa** : float
+            Angle of attack.
+        - **aoa_results** : dict
+            Results of the angle of attack, with `cl`, `cd`, `wall_time` in seconds, `fail_flag` and `out_dir`.
+
+        Outputs
+        -------
+        **dict**
+            Record written to the journal.
+        """
+        record = {
+            'hierarchy': hierarchy_info['name'],
+            'case': case_info['name'],
+            'exp_set': exp_set,
+            'level': ii,
+            'aoa': float(aoa),
+            'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         }
+        record.update(aoa_results)
+        append_journal_record(self.journal_file, record)
+        if self.journal is not None:
+            self.journal[get_journal_key(record['hierarchy'], record['case'], exp_set, ii, aoa)] = record
+        return record
+
+    def get_aoa_results(self, hierarchy_info, case_info, exp_set, ii, aoa):
+        """
+        Returns the results of an earlier simulation of an angle of attack, from the journal if it was replayed, and from its `aoa_<aoa>.yaml` file otherwise. A journal record is only used while the `aoa_<aoa>.yaml` file it records still exists.
+
+        Inputs
+        ------
+        - **hierarchy_info** : dict
+            Information about the hierarchy, including hierarchy name.
+        - **case_info** : dict
+            Details about the simulation case.
+        - **exp_set** : int
+            Index of the experimental set in the case.
+        - **ii** : int
+            Index of the refinement level.
+        - **aoa** : float
+            Angle of attack.
+
+        Outputs
+        -------
+        **dict or None**
+            Dictionary with `cl`, `cd`, `wall_time`, `fail_flag` and `out_dir`, or None if the angle of attack was not simulated.
+        """
+        aoa_out_dir = f"{self.out_dir}/{hierarchy_info['name']}/{case_info['name']}/exp_set_{exp_set}/L{ii}/aoa_{aoa}"
+        if self.journal is None:
+            return read_aoa_results(f"{aoa_out_dir}/aoa_{aoa}.yaml", aoa_out_dir)
+        record = self.journal.get(get_journal_key(hierarchy_info['name'], case_info['name'], exp_set, ii, aoa))
+        if record is None or not os.path.isfile(f"{aoa_out_dir}/aoa_{aoa}.yaml"): # A deleted directory is run again
+            return None
+        return {
+            'cl': float(record['cl']),
+            'cd': float(record['cd']),
+            'wall_time': f"{float(record['wall_time']):.2f} sec",
+            'fail_flag': int(record['fail_flag']),
+            'out_dir': aoa_out_dir,
+        }
+
+    def mark_completed_tasks(self, graph, collective=True):
+        """
+        Marks the solve tasks in which all the angles of attack have successful simulations with unchanged inputs, or exhausted their retry ladder, as done, and prints how many simulations are reused, stale, exhausted or new.
+
+        Inputs
+        ------
+        - **graph** : TaskGraph
+            Task graph of the simulation series, as returned by `build_task_graph()`.
+        - **collective** : bool, optional
+            If True (default), the simulations are checked on rank 0 and the result is broadcast to all ranks. Set to False when only the calling rank is running.
+
+        Outputs
+        -------
+        **dict**
+            Number of `reused`, `stale`, `exhausted` and `new` simulations.
+        """
+        plan = None
+        if comm.rank == 0 or not collective:
+            plan = {'done': [], 'counts': {'reused': 0, 'stale': 0, 'exhausted': 0, 'new': 0}}
+            for task in graph.get_tasks('solve'):
+                hierarchy, case, exp_set, level_indices, aoa_list = task.get_unit()
+                hierarchy_info = self.sim_info['hierarchies'][hierarchy]
+                case_info = hierarchy_info['cases'][case]
+                exp_info = case_info['exp_sets'][exp_set]
+                completed = True
+                for ii in level_indices:
+                    for aoa in aoa_list:
+                        point_status = self.get_point_status(hierarchy_info, case_info, exp_set, ii, aoa, self.get_input_hash(case_info, exp_info, ii, aoa))
+                        plan['counts'][point_status] += 1
+                        if point_status not in ('reused', 'exhausted'):
+                            completed = False
+                if completed:
+                    plan['done'].append(task.name)
+            print(f"{'-' * 50}")
+            print(f"Simulations: {plan['counts']['reused']} reused, {plan['counts']['stale']} stale, {plan['counts']['exhausted']} exhausted, {plan['counts']['new']} new")
+            print(f"{'-' * 50}")
+        if collective:
+            plan = comm.bcast(plan, root=0)
+        for name in plan['done']:
+            graph.mark_done(name)
+        return plan['counts']
+
+    def get_input_hash(self, case_info, exp_info, ii, aoa):
+        """
+        Returns the hash of the effective inputs of the simulation of an angle of attack: the content of the mesh file, the solver parameters, the flow conditions, the reference geometry and the angle of attack.
+
+        Inputs
+        ------
+        - **case_info** : dict
+            Details about the simulation case, such as mesh files, geometry, and solver parameters.
+        - **exp_info** : dict
+            Experimental conditions such as Mach number, Reynolds number, and temperature.
+        - **ii** : int
+            Index of the refinement level.
+        - **aoa** : float
+            Angle of attack.
+
+        Outputs
+        -------
+        **str or None**
+            Hexadecimal hash of the inputs, as returned by `get_cache_key()`, or None if the mesh file does not exist.
+        """
+        aero_options = default_aero_options.copy()
+        aero_options.update(case_info['solver_parameters'])
+        aero_options['gridFile'] = f"{case_info['meshes_folder_path']}/{case_info['mesh_files'][ii]}"
+        coarse_l2_convergence = self.sim_info.get('mesh_sequencing_L2Convergence')
+        if self.sim_info.get('mesh_sequencing', 'no') == 'yes' and coarse_l2_convergence is not None and ii != 0:
+            set_solver_option(aero_options, 'L2Convergence', coarse_l2_convergence)
+        if not os.path.isfile(aero_options['gridFile']):
+            return None
+        return get_cache_key(aero_options['gridFile'], aero_options, exp_info, case_info['geometry_info'], aoa)
+
+    def get_point_status(self, hierarchy_info, case_info, exp_set, ii, aoa, input_hash):
+        """
+        Returns whether the existing simulation of an angle of attack can be reused.
+
+        Inputs
+        ------
+        - **hierarchy_info** : dict
+            Information about the hierarchy, including hierarchy name.
+        - **case_info** : dict
+            Details about the simulation case.
+        - **exp_set** : int
+            Index of the experimental set in the case.
+        - **ii** : int
+            Index of the refinement level.
+        - **aoa** : float
+            Angle of attack.
+        - **input_hash** : str or None
+            Hash of the current inputs of the simulation, as returned by `get_input_hash()`.
+
+        Outputs
+        -------
+        **str**
+            `reused` if there is a successful simulation with the same inputs, `stale` if there is a successful simulation with different inputs, `exhausted` if the simulation failed on every rung of the retry ladder of the case with the same inputs, and `new` otherwise.
+
+        Notes
+        -----
+        - Simulations run before the inputs were recorded are reused, as their inputs are unknown.
+        - Exhausted simulations are only run again up the retry ladder when `retry_failed` is `yes`, or when their inputs change.
+        """
+        aoa_level_dict = self.get_aoa_results(hierarchy_info, case_info, exp_set, ii, aoa)
+        if aoa_level_dict is None:
+            return 'new'
+        if aoa_level_dict['fail_flag'] != 0:
+            if case_info.get('retry_ladder') and self.sim_info.get('retry_failed', 'no') != 'yes' and input_hash is not None:
+                attempts = read_aoa_attempts(f"{aoa_level_dict['out_dir']}/aoa_{aoa}.yaml", input_hash)
+                if attempts and get_next_rung(attempts, case_info['retry_ladder']) is None:
+                    return 'exhausted'
+            return 'new'
+        recorded_hash = self.get_recorded_input_hash(hierarchy_info, case_info, exp_set, ii, aoa)
+        if recorded_hash is not None and input_hash is not None and recorded_hash != input_hash:
+            return 'stale'
+        return 'reused'
+
+    def get_recorded_input_hash(self, hierarchy_info, case_info, exp_set, ii, aoa):
+        """
+        Returns the hash of the inputs recorded by the earlier simulation of an angle of attack, from the journal if it was replayed, and from its `aoa_<aoa>.yaml` file otherwise. None if no hash was recorded.
+        """
+        if self.journal is not None:
+            record = self.journal.get(get_journal_key(hierarchy_info['name'], case_info['name'], exp_set, ii, aoa), {})
+            return record.get('input_hash')
+        aoa_out_dir = f"{self.out_dir}/{hierarchy_info['name']}/{case_info['name']}/exp_set_{exp_set}/L{ii}/aoa_{aoa}"
+        return read_aoa_input_hash(f"{aoa_out_dir}/aoa_{aoa}.yaml")
+
+    def print_task_graph(self, graph):
+        """
+        Prints the number of tasks to run, and the critical path of the task graph.
+
+        Inputs
+        ------
+        - **graph** : TaskGraph
+            Task graph of the simulation series.
+        """
+        if comm.rank != 0:
+            return
+        solve_tasks = graph.get_tasks('solve')
+        pending_tasks = [task for task in solve_tasks if task.name not in graph.done]
+        critical_path, critical_cost = graph.get_critical_path()
+        total_cost = sum(task.cost for task in solve_tasks)
+        print(f"{'-' * 50}")
+        print(f"{'TASK GRAPH':^50}")
+        print(f"{'-' * 50}")
+        print(f"{'Solve tasks':<30}: {len(solve_tasks)} ({len(pending_tasks)} to run)")
+        print(f"{'Dependencies':<30}: {sum(len(task.deps) for task in solve_tasks)}")
+        print(f"{'Waves':<30}: {len(graph.get_waves('solve'))}")
+        print(f"{'Estimated total cost':<30}: {total_cost:.2f} sec")
+        print(f"{'Estimated critical path cost':<30}: {critical_cost:.2f} sec")
+        print("Critical path:")
+        for task in critical_path:
+            if task.kind == 'solve':
+                print(f"  {task.name} ({task.cost:.2f} sec)")
+        print(f"{'-' * 50}")
+
+    ################################################################################
+    # Code for running simulations concurrently in groups of processors
+    ################################################################################
+    def run_in_groups(self, graph, groups):
+        """
+        Runs the solve tasks of the task graph concurrently in groups of processors.
+
+        Rank 0 dispatches the tasks, and the other ranks of `MPI.COMM_WORLD` are split into `groups` sub-communicators of contiguous ranks that run them. As in the worker pool, the root of each group asks rank 0 for a task as soon as its group is idle, and a task is dispatched once its dependencies are done, with `dispatch_tasks()`. Rank 0 runs no simulation, so it always answers the groups without delay.
+
+        Inputs
+        ------
+        - **graph** : TaskGraph
+            Task graph of the simulation series.
+        - **groups** : int
+            Number of groups of processors. At most the number of ranks but one.
+
+        Outputs
+        -------
+        **dict**
+            Results of each experimental set keyed by `(hierarchy, case, exp_set)`, as returned by `run_exp_set()`. Only available on rank 0, and empty on the other ranks.
+
+        Notes
+        -----
+        - A task that raises an error on the processors of its group is reported to rank 0 in place of its results. The simulations it did not complete are recorded as failed, and the other tasks carry on.
+        """
+        color = MPI.UNDEFINED if comm.rank == 0 else (comm.rank - 1) * groups // (comm.size - 1)
+        group_comm = comm.Split(color, comm.rank)
+        # Tasks that are already done are collected by 'run_exp_set' on the world communicator
+        done_tasks = [task for task in graph.get_tasks('solve') if task.name in graph.done]
+        results = {}
+        errors = {}
+        if comm.rank == 0:
+            print(f"{'-' * 50}")
+            print(f"Running {len(graph.get_tasks('solve')) - len(done_tasks)} tasks on {groups} groups of processors")
+            print(f"{'-' * 50}")
+            with self.tracer.span('dispatch', category='barrier'):
+                results, errors = dispatch_tasks(comm, graph, groups)
+        else:
+            serve_tasks(self, comm, group_comm, color)
+            group_comm.Free()
+
+        # Collect the results of the tasks that were already done, and of the failed tasks from the simulations they completed
+        failed_tasks = comm.bcast(list(errors), root=0)
+        self.replay_journal() # Read the records appended by the groups
+        for task in done_tasks + [graph.tasks[name] for name in failed_tasks]:
+            hierarchy, case, exp_set, level_indices, aoa_list = task.get_unit()
+            hierarchy_info = self.sim_info['hierarchies'][hierarchy]
+            case_info = hierarchy_info['cases'][case]
+            exp_info = case_info['exp_sets'][exp_set]
+            self.collect_only = task.name in failed_tasks # The simulations that were not completed are recorded as failed
+            exp_results = self.run_exp_set(hierarchy_info, case_info, exp_set, exp_info, level_indices=level_indices, aoa_list=aoa_list)
+            self.collect_only = False
+            for refinement_level, level_results in exp_results.items():
+                results.setdefault((hierarchy, case, exp_set), {}).setdefault(refinement_level, {}).update(level_results)
+        if comm.rank != 0:
+            results = {}
+        return results
+
+    ################################################################################
+    # Code for running simulations as concurrent subprocesses
+    ################################################################################
+    def get_work_dir(self, hierarchy_info, case_info, exp_set, level_indices, aoa_list):
+        """
+        Returns the output directory of a unit of work: the angle of attack directory for a single angle of attack, the refinement level directory for a single refinement level, and the experimental set directory otherwise.
+
+        Inputs
+        ------
+        - **hierarchy_info** : dict
+            Information about the hierarchy, including hierarchy name.
+        - **case_info** : dict
+            Details about the simulation case.
+        - **exp_set** : int
+            Index of the experimental set in the case.
+        - **level_indices** : list or None
+            Indices of the refinement levels in the unit of work.
+        - **aoa_list** : list or None
+            Angles of attack in the unit of work.
+
+        Outputs
+        -------
+        **str**
+            Path to the output directory of the unit of work.
+        """
+        work_dir = f"{self.out_dir}/{hierarchy_info['name']}/{case_info['name']}/exp_set_{exp_set}"
+        if level_indices is not None and len(level_indices) == 1:
+            work_dir = f"{work_dir}/L{level_indices[0]}"
+            if aoa_list is not None and len(aoa_list) == 1:
+                work_dir = f"{work_dir}/aoa_{aoa_list[0]}"
+        return work_dir
+
+    def run_tasks_as_subprocesses(self, graph):
+        """
+        Runs the solve tasks of the task graph as concurrent subprocesses.
+
+        Each solve task that is not done is run by a subprocess, once the subprocesses of its dependencies are completed. The subprocesses use `nproc` processors each, or the number of processors given for their refinement level in `level_nproc`, and as many of them run at the same time as fit in `subprocess_cores`. The ready tasks with the largest expected cost are started first. The standard output and error of each subprocess are written to `subprocess_out.txt` in the output directory of its task. When `watchdog` is `yes`, a subprocess running a hopeless simulation is stopped and started again for its remaining angles of attack.
+
+        On an HPC cluster, the subprocesses are run as concurrent `srun --exact` job steps within the allocation of the job.
+
+        Inputs
+        ------
+        - **graph** : TaskGraph
+            Task graph of the simulation series.
+        """
+        nproc = self.sim_info['nproc']
+        level_nproc = self.sim_info.get('level_nproc') or [] # Number of processors of the subprocesses at each refinement level
+        default_cores = self.sim_info['hpc_info']['nproc'] if self.sim_info['hpc'] == 'yes' else nproc
+        total_cores = self.sim_info.get('subprocess_cores') or default_cores
+        python_fname = f"{self.out_dir}/script_for_subprocess.py"
+        if comm.rank == 0 and not os.path.exists(python_fname):
+            write_python_file(python_fname)
+
+        jobs = []
+        job_indices = {} # Index of the job running each task
+        for task in graph.get_tasks('solve'):
+            if task.name in graph.done:
+                continue
+            hierarchy, case, exp_set, level_indices, aoa_list = task.get_unit()
+            hierarchy_info = self.sim_info['hierarchies'][hierarchy]
+            case_info = hierarchy_info['cases'][case]
+            exp_info = case_info['exp_sets'][exp_set]
+
+            work_dir = self.get_work_dir(hierarchy_info, case_info, exp_set, level_indices, aoa_list)
+            input_file = f"{work_dir}/temp_input_file.yaml"
+            if comm.rank == 0:
+                os.makedirs(work_dir, exist_ok=True)
+                write_subprocess_input(self.sim_info, hierarchy_info, case_info, exp_info, aoa_list, level_indices, input_file)
+            task_nproc = max(level_nproc[ii] if ii < len(level_nproc) else nproc for ii in level_indices)
+            job_indices[task.name] = len(jobs)
+            jobs.append({
+                'command': get_subprocess_command(self.sim_info, python_fname, input_file, task_nproc),
+                'nproc': task_nproc,
+                'cost': task.cost,
+                'log_file': f"{work_dir}/subprocess_out.txt",
+                'label': task.name,
+                'input_file': input_file,
+                'max_restarts': len(level_indices) * len(aoa_list) * (len(case_info.get('retry_ladder') or []) + 1), # Each restart after a watchdog stop moves the stopped simulation up the retry ladder
+                'deps': [job_indices[dep] for dep in task.deps if dep in job_indices], # Tasks are added after their dependencies
+            })
 
-        # Store the final simulation out file.
         if comm.rank == 0:
-            with open(self.final_out_file, 'w') as final_out_yaml_handle:
-                yaml.dump(sim_out_info, final_out_yaml_handle, sort_keys=False)
+            print(f"{'-' * 50}")
+            print(f"Running {len(jobs)} subprocesses, with {total_cores} cores available")
+            print(f"{'-' * 50}")
+        criteria = get_watchdog_criteria(self.sim_info)
+        run_subprocesses(jobs, total_cores, comm, tracer=self.tracer, watchdog=Watchdog(criteria) if criteria is not None else None)
+
+        # Delete the input files
+        if comm.rank == 0:
+            for job in jobs:
+                os.remove(job['input_file'])
+
+    def run_tasks_in_worker_pool(self, graph):
+        """
+        Runs the solve tasks of the task graph on a pool of long-lived MPI workers.
+
+        The workers are spawned once with `MPI.Comm.Spawn` and split into groups of `nproc` processors. As many groups are spawned as fit in `subprocess_cores`. Each group imports the solver stack once, receives ready tasks over MPI, runs them in-process, and sends their results back.
+
+        Inputs
+        ------
+        - **graph** : TaskGraph
+            Task graph of the simulation series.
+
+        Outputs
+        -------
+        **dict**
+            Results of each experimental set keyed by `(hierarchy, case, exp_set)`, as returned by `run_exp_set()`. Only available on rank 0, and empty on the other ranks.
+        """
+        nproc = self.sim_info['nproc']
+        default_cores = self.sim_info['hpc_info']['nproc'] if self.sim_info['hpc'] == 'yes' else nproc
+        total_cores = self.sim_info.get('subprocess_cores') or default_cores
+        pending_tasks = [task for task in graph.get_tasks('solve') if task.name not in graph.done]
+        groups = max(1, min(total_cores // nproc, len(pending_tasks)))
+
+        results = {}
+        if comm.rank == 0 and pending_tasks:
+            # The workers run the simulations in-process
+            worker_input_file = f"{self.out_dir}/worker_pool_input.yaml"
+            worker_sim_info = copy.deepcopy(self.sim_info)
+            worker_sim_info['hpc'] = 'no'
+            worker_sim_info['run_as_subprocess'] = 'no'
+            write_yaml_file(worker_input_file, worker_sim_info)
+
+            print(f"{'-' * 50}")
+            print(f"Running {len(pending_tasks)} tasks on {groups} worker groups of {nproc} processors each")
+            print(f"{'-' * 50}")
+            results = run_worker_pool(worker_input_file, graph, groups, nproc)
+            os.remove(worker_input_file)
         comm.Barrier()
+        return results
     
+    ################################################################################
+    # Code for running simulations as several Slurm jobs
+    ################################################################################
+    def write_task_input(self):
+        """
+        Writes the input YAML file of the Slurm jobs running the solve tasks, in which the simulations are run in-process.
+
+        Outputs
+        -------
+        **str**
+            Path to the input YAML file.
+        """
+        task_input_file = f"{self.out_dir}/job_task_input.yaml"
+        task_sim_info = copy.deepcopy(self.sim_info)
+        task_sim_info['hpc'] = 'no'
+        task_sim_info['run_as_subprocess'] = 'no'
+        write_yaml_file(task_input_file, task_sim_info)
+        return task_input_file
+
+    def submit_merge_job(self, job_ids):
+        """
+        Submits the job that merges the results into the overall simulation info file, once the given jobs are completed, whether or not their simulations succeeded.
+
+        Inputs
+        ------
+        - **job_ids** : list
+            IDs of the jobs running the solve tasks.
+        """
+        merge_python_file = f"{self.out_dir}/run_merge.py"
+        write_python_file(merge_python_file, mode='merge')
+        job_script_path = write_merge_job_script(self.sim_info, self.out_dir, "overall_sim_out.txt", merge_python_file, self.info_file)
+        job_id = submit_job(job_script_path, dependency="afterany:" + ":".join(job_ids) if job_ids else None)
+        print(f"Submitted the merge job as job {job_id}")
+
+    def submit_job_array(self):
+        """
+        Submits the solve tasks of the task graph as Slurm job arrays, with one array task per solve task.
+
+        The solve tasks that are not done are split into waves, each wave holding the tasks whose dependencies are in earlier waves. The tasks are written to a task manifest, and each wave is submitted as a job array that starts once the previous wave is completed. A final job merges the results into the overall simulation info file once the last wave is completed, whether or not its tasks succeeded.
+
+        Notes
+        -----
+        - The task manifest is written to `task_manifest.yaml` in the output directory.
+        - The output of each array task is written to `array_wave<wave>_<index>.txt` in the output directory.
+        """
+        self.replay_journal()
+        if comm.rank != 0:
+            return
+        graph = build_task_graph(self.sim_info)
+        self.mark_completed_tasks(graph, collective=False)
+        self.print_task_graph(graph)
+
+        # Split the tasks to run into waves, ignoring the dependencies that are already done
+        wave_index = {}
+        waves = []
+        for task in graph.get_tasks('solve'): # Tasks are added after their dependencies
+            if task.name in graph.done:
+                continue
+            wave_index[task.name] = 1 + max((wave_index[dep] for dep in task.deps if dep in wave_index), default=-1)
+            if wave_index[task.name] == len(waves):
+                waves.append([])
+            waves[wave_index[task.name]].append(task.get_unit_info())
+
+        manifest_path = f"{self.out_dir}/task_manifest.yaml"
+        write_yaml_file(manifest_path, {'waves': waves})
+
+        task_input_file = self.write_task_input()
+        task_python_file = f"{self.out_dir}/run_array_task.py"
+        write_python_file(task_python_file, mode='array_task')
+
+        job_id = None
+        for wave, wave_tasks in enumerate(waves):
+            job_script_path = write_array_job_script(self.sim_info, self.out_dir, wave, len(wave_tasks), task_python_file, task_input_file, manifest_path)
+            job_id = submit_job(job_script_path, dependency=f"afterany:{job_id}" if job_id else None)
+            print(f"Submitted wave {wave} with {len(wave_tasks)} array tasks as job {job_id}")
+        self.submit_merge_job([job_id] if job_id else [])
+
+    def submit_split_jobs(self):
+        """
+        Splits the solve tasks of the task graph into Slurm jobs that each fit the target walltime, and submits them.
+
+        The wall time of each angle of attack is estimated from the wall times recorded by earlier runs, and from the number of cells of its mesh. The tasks are then packed into jobs whose estimated wall time, times `walltime_margin`, fits the `time` of `hpc_info`. Independent jobs are submitted together, and the jobs holding tasks that depend on other jobs are chained after them. Each job requests only its own estimated wall time, times the margin. A final job merges the results into the overall simulation info file once all the jobs are completed.
+
+        Notes
+        -----
+        - The jobs are written to `task_manifest.yaml` in the output directory.
+        - The output of each job is written to `job<index>_out.txt` in the output directory.
+        """
+        self.replay_journal()
+        if comm.rank != 0:
+            return
+        hpc_info = self.sim_info['hpc_info']
+        nproc = hpc_info.get('task_nproc') or hpc_info['nproc']
+        target_time = parse_slurm_time(hpc_info.get('time', '1:00:00'))
+        margin = hpc_info.get('walltime_margin') or 1.25
+        job_overhead = 120 # Seconds to start a job and import the solver stack
+
+        get_cost = get_cost_model(self.sim_info, nproc, hpc_info.get('core_sec_per_cell'), journal=self.journal)
+        graph = build_task_graph(self.sim_info, get_cost=get_cost)
+        self.mark_completed_tasks(graph, collective=False)
+        self.print_task_graph(graph)
+        jobs = pack_tasks(graph, target_time / margin - job_overhead)
+
+        manifest_jobs = []
+        for job_index, job in enumerate(jobs):
+            job_time = min(target_time, job['cost'] * margin + job_overhead)
+            manifest_jobs.append({
+                'estimated_wall_time': f"{job['cost']:.2f} sec",
+                'time': format_slurm_time(job_time),
+                'deps': job['deps'],
+                'tasks': [task.get_unit_info() for task in job['tasks']],
+            })
+            if job['cost'] * margin + job_overhead > target_time:
+                print(f"Warning: job {job_index} holds a task estimated to take {job['cost']:.2f} sec, which does not fit the time of {hpc_info.get('time', '1:00:00')}")
+
+        manifest_path = f"{self.out_dir}/task_manifest.yaml"
+        write_yaml_file(manifest_path, {'jobs': manifest_jobs})
+
+        task_input_file = self.write_task_input()
+        task_python_file = f"{self.out_dir}/run_job.py"
+        write_python_file(task_python_file, mode='job')
+
+        job_ids = []
+        for job_index, job in enumerate(manifest_jobs): # Jobs only depend on earlier jobs
+            job_script_path = write_task_job_script(self.sim_info, self.out_dir, job_index, job['time'], task_python_file, task_input_file, manifest_path)
+            dependency = "afterany:" + ":".join(job_ids[dep] for dep in job['deps']) if job['deps'] else None
+            job_ids.append(submit_job(job_script_path, dependency=dependency))
+            print(f"Submitted job {job_index} with {len(job['tasks'])} tasks, estimated to take {job['estimated_wall_time']}, as job {job_ids[-1]} (time {job['time']})")
+        self.submit_merge_job(job_ids)
+
+    def run_manifest_task(self, task):
+        """
+        Runs a solve task of the task manifest.
+
+        Inputs
+        ------
+        - **task** : dict
+            Solve task as written to the task manifest by `Task.get_unit_info()`.
+        """
+        hierarchy_info = self.sim_info['hierarchies'][task['hierarchy']]
+        case_info = hierarchy_info['cases'][task['case']]
+        exp_info = case_info['exp_sets'][task['exp_set']]
+        if comm.rank == 0:
+            print(f"Running task {task['name']}")
+        self.run_exp_set(hierarchy_info, case_info, task['exp_set'], exp_info, level_indices=task['level_indices'], aoa_list=task['aoa_list'])
+
+    def run_array_task(self, manifest_path, wave, task_index):
+        """
+        Runs a single solve task of a Slurm job array.
+
+        Inputs
+        ------
+        - **manifest_path** : str
+            Path to the task manifest written by `submit_job_array()`.
+        - **wave** : int
+            Index of the wave in the task manifest.
+        - **task_index** : int
+            Index of the task in the wave, given by `SLURM_ARRAY_TASK_ID`.
+        """
+        manifest = load_yaml_file(manifest_path, comm)
+        self.tracer.process_name = f"array wave {wave} task {task_index} rank {comm.rank}" # The tasks of the array run at the same time
+        self.run_manifest_task(manifest['waves'][wave][task_index])
+
+    def run_manifest_job(self, manifest_path, job_index):
+        """
+        Runs the solve tasks of a single job of the task manifest, in order.
+
+        Inputs
+        ------
+        - **manifest_path** : str
+            Path to the task manifest written by `submit_split_jobs()`.
+        - **job_index** : int
+            Index of the job in the task manifest.
+        """
+        manifest = load_yaml_file(manifest_path, comm)
+        self.tracer.process_name = f"job {job_index} rank {comm.rank}" # The jobs may run at the same time
+        for task in manifest['jobs'][job_index]['tasks']:
+            self.run_manifest_task(task)
+
     ################################################################################
     # Code for user to run simulations
     ################################################################################
@@ -445,10 +1724,16 @@ class run_sim():
         -----
         - For local execution (`hpc: no`), it directly calls `run_problem()`.
         - For HPC execution (`hpc: yes`), it creates a Python file and a job script, then submits the job using `sbatch`.
+        - If `submission` is `array` in `hpc_info`, each simulation is submitted as a task of a Slurm job array instead, see `submit_job_array()`.
+        - If `submission` is `split` in `hpc_info`, the simulations are split into several jobs that each fit the requested time, see `submit_split_jobs()`.
         """
         sim_info_copy = copy.deepcopy(self.sim_info)
         if sim_info_copy['hpc'] == "no":
             self.run_problem()
+        elif sim_info_copy['hpc_info'].get('submission', 'single') == "array":
+            self.submit_job_array()
+        elif sim_info_copy['hpc_info'].get('submission', 'single') == "split":
+            self.submit_split_jobs()
         elif sim_info_copy['hpc'] == "yes":
             python_file_path = f"{self.out_dir}/run_sim.py"
             slrum_out_file = f"overall_sim_out.txt"
@@ -479,6 +1764,9 @@ class run_sim():
         - Experimental data is optional. If not provided, only simulation results are plotted.
         - Plots are saved with clear labels and legends for easy interpretation.
         """
+        import matplotlib.pyplot as plt # Imported here, as only plotting needs it
+        import matplotlib.cm as cm
+
         sim_out_info = load_yaml_file(self.final_out_file, comm)
 
         for hierarchy, hierarchy_info in enumerate(sim_out_info['hierarchies']): # loop for Hierarchy level
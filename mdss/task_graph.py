@@ -0,0 +1,277 @@
+from mdss.helpers import get_continuation_order, get_nearest_aoa
+
+################################################################################
+# Task graph of a simulation series
+################################################################################
+class Task():
+    """
+    A node of the task graph.
+
+    Inputs
+    ------
+    - **name** : str
+        Unique name of the task.
+    - **kind** : str
+        `solve` for a unit of simulations, `level_csv` for writing the CSV file of a refinement level, and `exp_set_summary` for gathering the results of an experimental set.
+    - **info** : dict
+        Location of the task in the input YAML file: `hierarchy`, `case`, `exp_set` indices, and for solve tasks, `level_indices` and `aoa_list`. For `level_csv` tasks, `level` is the refinement level index.
+    - **deps** : list
+        Names of the tasks that must be completed before this task can start.
+    - **cost** : float
+        Estimated cost of the task, used to find the critical path.
+    """
+    def __init__(self, name, kind, info, deps, cost):
+        self.name = name
+        self.kind = kind
+        self.info = info
+        self.deps = list(deps)
+        self.cost = cost
+
+    def get_unit(self):
+        """
+        Returns the unit of work of a solve task as a tuple `(hierarchy, case, exp_set, level_indices, aoa_list)`.
+        """
+        return (self.info['hierarchy'], self.info['case'], self.info['exp_set'], self.info['level_indices'], self.info['aoa_list'])
+
+    def get_unit_info(self):
+        """
+        Returns the name and the unit of work of a solve task as a dictionary, to be written to a task manifest.
+        """
+        hierarchy, case, exp_set, level_indices, aoa_list = self.get_unit()
+        return {
+            'name': self.name,
+            'hierarchy': hierarchy,
+            'case': case,
+            'exp_set': exp_set,
+            'level_indices': list(level_indices),
+            'aoa_list': list(aoa_list),
+        }
+
+class TaskGraph():
+    """
+    Directed acyclic graph of the tasks of a simulation series.
+
+    Methods
+    -------
+    **add_task()**
+        Adds a task to the graph.
+
+    **get_ready_tasks()**
+        Returns the tasks whose dependencies are all completed.
+
+    **mark_started(), mark_done()**
+        Tracks the state of the tasks while they are dispatched.
+
+    **get_waves()**
+        Splits the tasks into waves that can each be run concurrently.
+
+    **get_critical_path()**
+        Returns the chain of dependent tasks with the largest total cost.
+    """
+    def __init__(self):
+        self.tasks = {} # Tasks keyed by name, in the order they were added
+        self.started = set()
+        self.done = set()
+
+    def add_task(self, name, kind, info, deps=(), cost=0.0):
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Task '{name}' depends on '{dep}', which is not in the task graph")
+        self.tasks[name] = Task(name, kind, info, deps, cost)
+        return self.tasks[name]
+
+    def get_tasks(self, kind=None):
+        return [task for task in self.tasks.values() if kind is None or task.kind == kind]
+
+    def get_ready_tasks(self, kind=None):
+        return [task for task in self.get_tasks(kind) if task.name not in self.started and all(dep in self.done for dep in task.deps)]
+
+    def mark_started(self, name):
+        self.started.add(name)
+
+    def mark_done(self, name):
+        self.started.add(name)
+        self.done.add(name)
+
+    def is_done(self, kind=None):
+        return all(task.name in self.done for task in self.get_tasks(kind))
+
+    def get_waves(self, kind=None):
+        """
+        Splits the tasks into waves. The tasks of a wave depend only on tasks of earlier waves, so each wave can be run concurrently once the previous one is completed.
+
+        Inputs
+        ------
+        - **kind** : str, optional
+            Only return the tasks of this kind. Dependencies on other kinds of tasks are still accounted for.
+
+        Outputs
+        -------
+        **list**
+            List of waves, each one a list of tasks.
+        """
+        depth = {}
+        for task in self.tasks.values(): # Tasks are added after their dependencies
+            depth[task.name] = 1 + max((depth[dep] for dep in task.deps), default=-1)
+        waves = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for task in self.tasks.values():
+            if kind is None or task.kind == kind:
+                waves[depth[task.name]].append(task)
+        return [wave for wave in waves if wave]
+
+    def get_critical_path(self):
+        """
+        Finds the chain of dependent tasks with the largest total cost. No schedule can complete the graph faster than this chain, whatever the resources.
+
+        Outputs
+        -------
+        **tuple**
+            List of the tasks on the critical path, and their total cost.
+        """
+        path_cost = {}
+        previous = {}
+        for task in self.tasks.values(): # Tasks are added after their dependencies
+            previous[task.name] = max(task.deps, key=lambda dep: path_cost[dep], default=None)
+            path_cost[task.name] = task.cost + (path_cost[previous[task.name]] if previous[task.name] else 0.0)
+        if not path_cost:
+            return [], 0.0
+        name = max(path_cost, key=path_cost.get)
+        total_cost = path_cost[name]
+        path = []
+        while name is not None:
+            path.append(self.tasks[name])
+            name = previous[name]
+        return path[::-1], total_cost
+
+def build_task_graph(sim_info, get_cost=None):
+    """
+    Compiles the input YAML file into a task graph.
+
+    The graph has a solve task for each angle of attack at each refinement level, or for each refinement level when `reuse_problem` is `yes` so that its problem is set up once. When `warm_start` is `yes`, each angle of attack depends on its neighbor in the continuation sweep, and when `mesh_sequencing` is `yes`, each refinement level depends on the next coarser level. A `level_csv` task for each refinement level depends on its solve tasks, and an `exp_set_summary` task for each experimental set depends on its `level_csv` tasks.
+
+    Inputs
+    ------
+    - **sim_info** : dict
+        Dictionary containing the information of the input YAML file.
+    - **get_cost** : callable, optional
+        Function of `(hierarchy, case, exp_set, level_index, aoa)` that returns the estimated cost of an angle of attack. Defaults to 1 for every angle of attack.
+
+    Outputs
+    -------
+    **TaskGraph**
+        Task graph of the simulation series.
+    """
+    reuse_problem = sim_info.get('reuse_problem', 'no') == 'yes'
+    warm_start = sim_info.get('warm_start', 'no') == 'yes'
+    mesh_sequencing = sim_info.get('mesh_sequencing', 'no') == 'yes'
+    levels = sim_info.get('levels') # Indices of the refinement levels to run, all of them if not given
+    if get_cost is None:
+        get_cost = lambda hierarchy, case, exp_set, ii, aoa: 1.0
+
+    graph = TaskGraph()
+    for hierarchy, hierarchy_info in enumerate(sim_info['hierarchies']): # loop for Hierarchy level
+        for case, case_info in enumerate(hierarchy_info['cases']): # loop for cases in hierarchy
+            for exp_set, exp_info in enumerate(case_info['exp_sets']): # loop for experimental datasets that may present
+                exp_name = f"{hierarchy_info['name']}/{case_info['name']}/exp_set_{exp_set}"
+                exp_location = {'hierarchy': hierarchy, 'case': case, 'exp_set': exp_set}
+                aoa_order = get_continuation_order(exp_info['aoa_list']) if warm_start else exp_info['aoa_list']
+                level_indices = [ii for ii in range(len(case_info['mesh_files'])) if levels is None or ii in levels]
+                if mesh_sequencing:
+                    level_indices = level_indices[::-1] # Coarser levels are added first as the finer levels depend on them
+
+                solve_task_names = {} # Name of the solve task running each (level, aoa)
+                csv_task_names = []
+                for ii in level_indices: # Loop for refinement levels
+                    level_task_names = []
+                    coarse_ii = ii + 1 # Index of the coarser level that this level starts from when mesh sequencing
+                    if reuse_problem: # A single task sets up the problem and runs all the angles of attack
+                        deps = [solve_task_names[(coarse_ii, aoa)] for aoa in aoa_order if mesh_sequencing and (coarse_ii, aoa) in solve_task_names]
+                        name = f"{exp_name}/L{ii}"
+                        cost = sum(get_cost(hierarchy, case, exp_set, ii, aoa) for aoa in aoa_order)
+                        graph.add_task(name, 'solve', dict(exp_location, level_indices=[ii], aoa_list=list(aoa_order)), sorted(set(deps)), cost)
+                        for aoa in aoa_order:
+                            solve_task_names[(ii, aoa)] = name
+                        level_task_names.append(name)
+                    else:
+                        for kk, aoa in enumerate(aoa_order): # loop for angles of attack
+                            deps = []
+                            if mesh_sequencing and (coarse_ii, aoa) in solve_task_names:
+                                deps.append(solve_task_names[(coarse_ii, aoa)])
+                            if warm_start and kk > 0: # Neighbor in the continuation sweep
+                                deps.append(solve_task_names[(ii, get_nearest_aoa(aoa, aoa_order[:kk]))])
+                            name = f"{exp_name}/L{ii}/aoa_{aoa}"
+                            graph.add_task(name, 'solve', dict(exp_location, level_indices=[ii], aoa_list=[aoa]), deps, get_cost(hierarchy, case, exp_set, ii, aoa))
+                            solve_task_names[(ii, aoa)] = name
+                            level_task_names.append(name)
+
+                    csv_task_name = f"{exp_name}/L{ii}/csv"
+                    graph.add_task(csv_task_name, 'level_csv', dict(exp_location, level=ii), level_task_names)
+                    csv_task_names.append(csv_task_name)
+
+                graph.add_task(f"{exp_name}/summary", 'exp_set_summary', exp_location, csv_task_names)
+    return graph
+
+def pack_tasks(graph, capacity):
+    """
+    Packs the solve tasks that are not done into jobs whose total cost fits a capacity, such as a target walltime.
+
+    Tasks that depend on each other are kept in the same job and run in order, and the independent groups of tasks are packed first-fit decreasing. A group of dependent tasks that does not fit is split, in order, into a chain of jobs, each one depending on the previous one.
+
+    Inputs
+    ------
+    - **graph** : TaskGraph
+        Task graph of the simulation series.
+    - **capacity** : float
+        Maximum total cost of the tasks of a job. A single task costing more than the capacity gets its own job.
+
+    Outputs
+    -------
+    **list**
+        List of jobs, each one a dictionary with its `tasks` in the order they are run, their total `cost`, and the indices of the jobs it depends on (`deps`). A job only depends on earlier jobs of the list.
+    """
+    pending_tasks = [task for task in graph.get_tasks('solve') if task.name not in graph.done]
+    pending_names = set(task.name for task in pending_tasks)
+
+    # Group the tasks that depend on each other
+    group_of = {}
+    groups = []
+    for task in pending_tasks: # Tasks are added after their dependencies
+        dep_groups = sorted(set(group_of[dep] for dep in task.deps if dep in pending_names))
+        if not dep_groups:
+            group_of[task.name] = len(groups)
+            groups.append([task])
+            continue
+        group = dep_groups[0]
+        for other in dep_groups[1:]: # Merge the groups joined by this task
+            for other_task in groups[other]:
+                group_of[other_task.name] = group
+            groups[group].extend(groups[other])
+            groups[other] = []
+        groups[group].append(task)
+        group_of[task.name] = group
+    order = {task.name: index for index, task in enumerate(pending_tasks)}
+    groups = [sorted(group, key=lambda task: order[task.name]) for group in groups if group]
+
+    # Pack the groups that fit first-fit decreasing, and split the others into chains of jobs
+    jobs = []
+    for group in sorted(groups, key=lambda group: -sum(task.cost for task in group)):
+        group_cost = sum(task.cost for task in group)
+        if group_cost <= capacity:
+            for job in jobs:
+                if job['packed'] and job['cost'] + group_cost <= capacity:
+                    job['tasks'].extend(group)
+                    job['cost'] += group_cost
+                    break
+            else:
+                jobs.append({'tasks': list(group), 'cost': group_cost, 'deps': [], 'packed': True})
+        else:
+            previous = None
+            for task in group:
+                if previous is None or (jobs[previous]['cost'] + task.cost > capacity and jobs[previous]['tasks']):
+                    jobs.append({'tasks': [], 'cost': 0.0, 'deps': [previous] if previous is not None else [], 'packed': False})
+                    previous = len(jobs) - 1
+                jobs[previous]['tasks'].append(task)
+                jobs[previous]['cost'] += task.cost
+    for job in jobs:
+        del job['packed']
+    return jobs
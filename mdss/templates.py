@@ -17,3 +17,49 @@ gl_job_script = """#!/bin/bash
 
 srun python {python_file_path} --inputFile {yaml_file_path}
 """
+
+gl_array_job_script = """#!/bin/bash
+#SBATCH --job-name={job_name}
+#SBATCH --array=0-{last_index}{array_limit}
+#SBATCH --ntasks={nproc}
+#SBATCH --cpus-per-task=1
+#SBATCH --mem-per-cpu={mem_per_cpu}
+#SBATCH --time={time}
+#SBATCH --account={account_name}
+#SBATCH --partition=standard
+#SBATCH --mail-type=FAIL
+#SBATCH --mail-user={email_id}
+#SBATCH --output={out_dir}/{out_file}
+
+srun python {python_file_path} --inputFile {yaml_file_path} --manifest {manifest_path} --wave {wave} --taskIndex $SLURM_ARRAY_TASK_ID
+"""
+
+gl_task_job_script = """#!/bin/bash
+#SBATCH --job-name={job_name}
+#SBATCH --ntasks={nproc}
+#SBATCH --cpus-per-task=1
+#SBATCH --mem-per-cpu={mem_per_cpu}
+#SBATCH --time={time}
+#SBATCH --account={account_name}
+#SBATCH --partition=standard
+#SBATCH --mail-type=FAIL
+#SBATCH --mail-user={email_id}
+#SBATCH --output={out_dir}/{out_file}
+
+srun python {python_file_path} --inputFile {yaml_file_path} --manifest {manifest_path} --job {job_index}
+"""
+
+gl_merge_job_script = """#!/bin/bash
+#SBATCH --job-name={job_name}
+#SBATCH --ntasks=1
+#SBATCH --cpus-per-task=1
+#SBATCH --mem-per-cpu={mem_per_cpu}
+#SBATCH --time={time}
+#SBATCH --account={account_name}
+#SBATCH --partition=standard
+#SBATCH --mail-type=END,FAIL
+#SBATCH --mail-user={email_id}
+#SBATCH --output={out_dir}/{out_file}
+
+python {python_file_path} --inputFile {yaml_file_path}
+"""
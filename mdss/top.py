@@ -0,0 +1,96 @@
+import time
+from mphys.multipoint import Multipoint
+from mphys.scenario_aerodynamic import ScenarioAerodynamic
+from adflow.mphys import ADflowBuilder
+from baseclasses import AeroProblem
+import openmdao.api as om
+
+################################################################################
+# Multipoint class definition
+################################################################################
+
+class Top(Multipoint):
+
+    """
+    Sets up an OpenMDAO problem using MPhys and ADflow for aerodynamic simulations.
+
+    This class is designed to integrate OpenMDAO with MPhys and ADflow to perform aerodynamic simulations. It sets up the problem environment, manages inputs and outputs, and configures scenarios for simulation.
+
+    Methods
+    --------
+    **setup()**
+        Initializes and sets up the required subsystems and scenarios.
+
+    **configure()**
+        Configures the aerodynamic problem (e.g., reference area, chord, angle of attack) and connects design variables to the system.
+
+    Inputs
+    -------
+    - **case_info** : dict
+        Dictionary containing geometry and configuration details for the case being analyzed.
+    - **exp_info** : dict
+        Dictionary with experimental conditions such as Mach number, Reynolds number, and temperature.
+    - **aero_options** : dict
+        ADflow solver parameters that control aerodynamic analysis.
+
+    Outputs
+    --------
+    None. This class directly modifies the OpenMDAO problem structure to include aerodynamic analysis subsystems.
+
+    """
+
+    def __init__(self, case_info, exp_info, aero_options):
+        super().__init__()
+        self.case_info = case_info
+        self.exp_info = exp_info
+        self.aero_options = aero_options
+
+    def setup(self):
+                        
+        adflow_builder = ADflowBuilder(self.aero_options, scenario="aerodynamic")
+        mesh_load_start_time = time.time()
+        adflow_builder.initialize(self.comm)
+        self.mesh_load_time = time.time() - mesh_load_start_time # Time spent by ADflow loading the mesh and initializing
+        adflow_builder.err_on_convergence_fail = True
+        self.adflow_builder = adflow_builder # Keep a handle to the builder to access the ADflow solver when the problem is reused
+
+        ################################################################################
+        # MPHY setup
+        ################################################################################
+
+        # ivc to keep the top level DVs
+        self.add_subsystem("dvs", om.IndepVarComp(), promotes=["*"])
+
+        # create the mesh and cruise scenario because we only have one analysis point
+        self.add_subsystem("mesh", adflow_builder.get_mesh_coordinate_subsystem())
+        self.mphys_add_scenario("cruise", ScenarioAerodynamic(aero_builder=adflow_builder))
+        self.connect("mesh.x_aero0", "cruise.x_aero")
+
+    def configure(self):
+        aoa = 0.0 # Set default Angle of attack
+
+        geometry_info = self.case_info['geometry_info'] # Load geometry info
+        chordRef = geometry_info['chordRef']
+        areaRef = geometry_info['areaRef']
+
+        ap0 = AeroProblem(
+            name="ap0",
+            # Experimental Conditions 
+            mach = self.exp_info['mach'], reynolds=self.exp_info['Re'], reynoldsLength=chordRef, T=self.exp_info['Temp'], 
+            alpha=aoa,
+            # Geometry Info
+            areaRef=areaRef, 
+            chordRef=chordRef, 
+            evalFuncs=["cl", "cd"]
+        )
+        ap0.addDV("alpha", value=aoa, name="aoa", units="deg")
+        self.ap0 = ap0 # Keep a handle to the aero problem to reset the flow when the problem is reused
+
+
+        # set the aero problem in the coupling and post coupling groups
+        self.cruise.coupling.mphys_set_ap(ap0)
+        self.cruise.aero_post.mphys_set_ap(ap0)
+
+        # add dvs to ivc and connect
+        self.dvs.add_output("aoa", val=aoa, units="deg")
+        self.connect("aoa", ["cruise.coupling.aoa", "cruise.aero_post.aoa"])
@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import zlib
+import fcntl
+import atexit
+from contextlib import contextmanager
+
+################################################################################
+# Timeline of a simulation series in the Chrome trace format
+################################################################################
+class Tracer():
+    """
+    Records span events of a process, and appends them to a trace file shared by all the ranks and subprocesses of a simulation series.
+
+    The trace file is in the Chrome trace event format, as a JSON array of events that is left open, so that every process can append to it. It can be opened with Perfetto (https://ui.perfetto.dev) or `chrome://tracing`. Each process is shown as its own track, named by `process_name`.
+
+    Inputs
+    ------
+    - **trace_file** : str, optional
+        Path to the trace file. Defaults to None, in which case tracing is disabled and recording events costs nothing.
+    - **process_name** : str, optional
+        Name of the track of this process, such as the rank or the subprocess it is. Defaults to the process id.
+
+    Notes
+    -----
+    - The events are kept in memory and appended to the trace file by `flush()`, which is also called when the process exits. The file is locked while it is appended to.
+    - The events of several runs in the same output directory are appended to the same trace file. Delete it to start a new timeline.
+    - The track of a process is identified by a hash of `process_name` rather than by its process id, which ranks on different nodes and spawned workers often share. Processes must therefore have distinct names.
+    """
+    def __init__(self, trace_file=None, process_name=None):
+        self.trace_file = trace_file
+        self.process_name = process_name or f"process {os.getpid()}"
+        self.events = []
+        self.thread_names = {} # Names of the extra tracks of this process, keyed by track id
+        self.named = None # Name of the track written to the trace file
+        if trace_file is not None:
+            atexit.register(self.flush)
+
+    @property
+    def enabled(self):
+        return self.trace_file is not None
+
+    def complete(self, name, start_time, end_time=None, category='mdss', tid=0, **args):
+        """
+        Records a span that has already ended.
+
+        Inputs
+        ------
+        - **name** : str
+            Name of the span.
+        - **start_time** : float
+            Start of the span, as returned by `time.time()`.
+        - **end_time** : float, optional
+            End of the span. Defaults to now.
+        - **category** : str, optional
+            Category of the span, such as `solve`, `io` or `barrier`.
+        - **tid** : int, optional
+            Track of the span within this process. Defaults to 0, the track of the process itself.
+        - **args** : optional
+            Values shown with the span, such as the case or the angle of attack.
+        """
+        if not self.enabled:
+            return
+        end_time = time.time() if end_time is None else end_time
+        self.events.append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round(start_time * 1e6),
+            'dur': round(max(end_time - start_time, 0.0) * 1e6),
+            'tid': tid,
+            'args': args,
+        })
+
+    @contextmanager
+    def span(self, name, category='mdss', **args):
+        """
+        Records the span of the code run within the context. The inputs are the same as `complete()`.
+        """
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.complete(name, start_time, category=category, **args)
+
+    def name_track(self, tid, name):
+        """
+        Names an extra track of this process, such as the track of a subprocess it runs.
+        """
+        if self.enabled and self.thread_names.get(tid) != name:
+            self.thread_names[tid] = name
+            self.events.append({'name': 'thread_name', 'ph': 'M', 'tid': tid, 'args': {'name': name}})
+
+    @property
+    def pid(self):
+        return zlib.crc32(self.process_name.encode()) & 0x7fffffff # Same track for the same process name, whichever process records it
+
+    def flush(self):
+        """
+        Appends the recorded events to the trace file.
+        """
+        if not self.enabled or not self.events:
+            return
+        if self.named != self.process_name:
+            self.events.insert(0, {'name': 'process_name', 'ph': 'M', 'tid': 0, 'args': {'name': self.process_name}})
+            self.named = self.process_name
+        lines = "".join(json.dumps(dict(event, pid=self.pid)) + ",\n" for event in self.events) # Set here, as the process may be renamed after recording events
+        with open(self.trace_file, 'a') as trace_handle:
+            fcntl.flock(trace_handle, fcntl.LOCK_EX)
+            try:
+                if os.fstat(trace_handle.fileno()).st_size == 0:
+                    trace_handle.write("[\n") # The array is left open, as the trace format allows
+                trace_handle.write(lines)
+                trace_handle.flush()
+            finally:
+                fcntl.flock(trace_handle, fcntl.LOCK_UN)
+        self.events = []
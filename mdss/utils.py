@@ -1,27 +1,61 @@
 import copy
 
-from mpi4py import MPI
 from enum import Enum
 import os
+import glob
 import shutil
 import yaml
 import importlib.resources as pkg_resources
 import random
+import numpy as np
+import pandas as pd
 from pydantic import BaseModel
 from typing import Optional, Literal
 
-from mdss.run_sim import run_sim
-from mdss.helpers import load_yaml_file, load_csv_data, check_input_yaml
+from mdss.helpers import load_yaml_file, load_csv_data, load_input_yaml, get_comm, read_yaml_file
+from mdss.results_db import query_results
+from mdss.task_graph import TaskGraph
 
 
-comm = MPI.COMM_WORLD
-size = comm.Get_size()
-
 class RunFlag(Enum):
     skip = 0  # Exit without running the simulation
     run = 1   # Run the simulation and populate the data
 
-def get_sim_data(info_file, run_flag=RunFlag.skip):
+# Columns of the columnar formats returned by get_sim_data, the first five identify a result
+sim_data_columns = ['hierarchy', 'case', 'exp_set', 'level', 'alpha', 'cl', 'cd', 'wall_time', 'fail_flag']
+
+def format_sim_data(columns, output_format):
+    """
+    Converts the columns of simulation data to the format requested from `get_sim_data`.
+
+    Inputs
+    ------
+    - **columns** : dict
+        Lists of values keyed by the names in `sim_data_columns`, with one entry per angle of attack.
+    - **output_format** : str
+        `dataframe` for a pandas DataFrame indexed by (hierarchy, case, exp_set, level, alpha), or `arrays` for a dictionary of NumPy arrays.
+
+    Outputs
+    -------
+    **pandas.DataFrame or dict**
+        Simulation data in the requested format.
+    """
+    arrays = {
+        'hierarchy': np.array(columns['hierarchy'], dtype=str),
+        'case': np.array(columns['case'], dtype=str),
+        'exp_set': np.array(columns['exp_set'], dtype=int),
+        'level': np.array(columns['level'], dtype=int),
+        'alpha': np.array(columns['alpha'], dtype=float),
+        'cl': np.array(columns['cl'], dtype=float), # Missing values become NaN
+        'cd': np.array(columns['cd'], dtype=float),
+        'wall_time': np.array(columns['wall_time'], dtype=float),
+        'fail_flag': np.array(columns['fail_flag'], dtype=float),
+    }
+    if output_format == 'arrays':
+        return arrays
+    return pd.DataFrame(arrays).set_index(sim_data_columns[:5])
+
+def get_sim_data(info_file, run_flag=RunFlag.skip, output_format='dict'):
     """
     Generates a dictionary containing simulation data organized hierarchically.
 
@@ -30,6 +64,9 @@ def get_sim_data(info_file, run_flag=RunFlag.skip):
     experiment sets, refinement levels, and angles of attack. It also provides an
     option to run a simulation if the required data does not exist.
 
+    The results are read from the results database (`results.db`) in a single query
+    when it exists, and from the overall simulation info file otherwise.
+
     Inputs
     ------
     - **info_file** : str
@@ -38,23 +75,35 @@ def get_sim_data(info_file, run_flag=RunFlag.skip):
         Enum to determine behavior if required simulation data is not found:
         - `RunFlag.skip` (default): Exit without running the simulation.
         - `RunFlag.run`: Run the simulation and populate the data.
+    - **output_format** : str, optional
+        Format of the returned data:
+        - `dict` (default): Nested dictionary keyed by hierarchy, case, `exp_set_<index>`, `L<index>` and `aoa_<aoa>`.
+        - `dataframe`: pandas DataFrame with a (hierarchy, case, exp_set, level, alpha) MultiIndex, and `cl`, `cd`, `wall_time` and `fail_flag` columns.
+        - `arrays`: Dictionary of NumPy arrays with one entry per angle of attack, keyed by the names in `sim_data_columns`.
 
     Outputs
     -------
-    **sim_data**: dict
-        A dictionary contating simulation data.
+    **sim_data**: dict or pandas.DataFrame
+        Simulation data in the requested format. Missing results are None in the dictionary and NaN in the other formats.
     """
-    check_input_yaml(info_file)
+    if output_format not in ('dict', 'dataframe', 'arrays'):
+        raise ValueError(f"output_format must be 'dict', 'dataframe' or 'arrays', not '{output_format}'")
+
+    comm = get_comm()
+
+    info = load_input_yaml(info_file, comm) # Read and validated on the root rank only
     if comm.rank == 0:
         print(f"{'-' * 50}")
         print("YAML file validation is successful")
         print(f"{'-' * 50}")
-    info = load_yaml_file(info_file, comm)
     sim_data = {} # Initiating a dictionary to store simulation data
+    columns = {column: [] for column in sim_data_columns} # Simulation data for the columnar formats
+    db_file = None # Results database, if it exists
 
     try:  # Check if the file is overall sim info file and stores the simulation info
         overall_sim_info = info["overall_sim_info"]
         sim_info = copy.deepcopy(info)
+        db_file = overall_sim_info.get('results_db')
         print(f"{'-' * 50}")
         print(f"File provided is an ouput yaml file. Continuing to read data")
         print(f"{'-' * 50}")
@@ -66,7 +115,12 @@ def get_sim_data(info_file, run_flag=RunFlag.skip):
             print(f"{'-' * 50}")
         out_yaml_file_path = f"{info['out_dir']}/overall_sim_info.yaml"
 
-        if os.path.isfile(out_yaml_file_path):
+        # Checked on the root rank, so all the ranks take the same branch
+        db_exists, out_yaml_exists = comm.bcast((os.path.isfile(f"{info['out_dir']}/results.db"), os.path.isfile(out_yaml_file_path)) if comm.rank == 0 else None, root=0)
+        if db_exists: # The input file gives the structure, and the results are read from the database
+            sim_info = info
+            db_file = f"{info['out_dir']}/results.db"
+        elif out_yaml_exists:
             sim_info = load_yaml_file(f"{info['out_dir']}/overall_sim_info.yaml", comm)
         else:
             if comm.rank == 0:
@@ -78,17 +132,25 @@ def get_sim_data(info_file, run_flag=RunFlag.skip):
                     print(f"{'-' * 50}")
                     print("Continuing to run simulation")
                     print(f"{'-' * 50}")
+                from mdss.run_sim import run_sim # Imported here, as reading existing results does not need it
                 sim = run_sim(info_file)
                 sim.run()
                 sim_info = load_yaml_file(f"{info['out_dir']}/overall_sim_info.yaml", comm)
+                db_file = sim_info['overall_sim_info'].get('results_db')
             elif run_flag == RunFlag.skip:
                 if comm.rank == 0:
                     print(f"{'-' * 50}")
                     print("Exiting without running sumulations")
                     print(f"{'-' * 50}")
-                return sim_data
+                return sim_data if output_format == 'dict' else format_sim_data(columns, output_format)
         
-    
+
+    # Read all the results from the database at once
+    db_results = None
+    if db_file is not None and os.path.isfile(db_file):
+        db_data = query_results(db_file)
+        db_results = {(row.hierarchy, row.case_name, row.exp_set, row.level, row.alpha): row for row in db_data.itertuples(index=False)}
+
     # Loop through hierarchy levels
     for hierarchy_index, hierarchy_info in enumerate(sim_info['hierarchies']):
         hierarchy_name = hierarchy_info['name']
@@ -116,8 +178,23 @@ def get_sim_data(info_file, run_flag=RunFlag.skip):
                     # Loop through angles of attack
                     for aoa in exp_info['aoa_list']:
                         aoa_key = f"aoa_{aoa}"
-                        cl = exp_info['sim_info'][refinement_level][aoa_key].get("cl")
-                        cd = exp_info['sim_info'][refinement_level][aoa_key].get("cd")
+                        if db_results is not None:
+                            row = db_results.get((hierarchy_name, case_name, exp_index, ii, float(aoa)))
+                            cl = float(row.cl) if row is not None else None
+                            cd = float(row.cd) if row is not None else None
+                            wall_time = float(row.wall_time) if row is not None else None
+                            fail_flag = row.fail_flag if row is not None else None
+                        else:
+                            aoa_level_dict = exp_info['sim_info'][refinement_level][aoa_key]
+                            cl = aoa_level_dict.get("cl")
+                            cd = aoa_level_dict.get("cd")
+                            wall_time = float(str(aoa_level_dict.get("wall_time", "nan")).replace(" sec", ""))
+                            fail_flag = aoa_level_dict.get("fail_flag")
+
+                        if output_format != 'dict': # Add a row to the columns
+                            for column, value in zip(sim_data_columns, [hierarchy_name, case_name, exp_index, ii, float(aoa), cl, cd, wall_time, fail_flag]):
+                                columns[column].append(np.nan if value is None else value)
+                            continue
 
                         # Populate the dictionary
                         if aoa_key not in sim_data[hierarchy_name][case_name][exp_set_key][refinement_level]:
@@ -126,8 +203,224 @@ def get_sim_data(info_file, run_flag=RunFlag.skip):
                         sim_data[hierarchy_name][case_name][exp_set_key][refinement_level][aoa_key]['cl'] = cl
                         sim_data[hierarchy_name][case_name][exp_set_key][refinement_level][aoa_key]['cd'] = cd
 
+    if output_format != 'dict':
+        return format_sim_data(columns, output_format)
     return sim_data
 
+def get_convergence_histories(info_file, variables=None):
+    """
+    Merges the convergence histories of all the simulations of a series into campaign-wide arrays.
+
+    Inputs
+    ------
+    - **info_file** : str
+        Path to the input YAML file, or to the `overall_sim_info.yaml` file, of the simulation series.
+    - **variables** : list, optional
+        Variables of the histories to merge, such as `resrho` or `cl`. Defaults to all the numeric variables.
+
+    Outputs
+    -------
+    **dict**
+        Dictionary of NumPy arrays with one row per simulation:
+        - `hierarchy`, `case`, `exp_set`, `level`, `alpha` and `fail_flag`: the simulation of each row.
+        - `n_iterations`: number of iterations in the history of each row.
+        - One 2D array per variable, with one column per iteration. Rows shorter than the longest history are padded with NaN.
+
+    Notes
+    -----
+    - The histories are read from the `aoa_<aoa>_history.npz` files written next to the `aoa_<aoa>.yaml` files, when the `history` artifact of the output profile is written.
+    - Only the files are read, so the function needs neither MPI nor the solver.
+    """
+    out_dir = read_yaml_file(info_file)['out_dir']
+    history_files = sorted(glob.glob(f"{out_dir}/*/*/exp_set_*/L*/aoa_*/aoa_*_history.npz"))
+
+    point_keys = ['hierarchy', 'case', 'exp_set', 'level', 'alpha', 'fail_flag']
+    points = {key: [] for key in point_keys}
+    histories = [] # Numeric arrays of each history file, keyed by variable
+    for history_file in history_files:
+        with np.load(history_file) as history:
+            for key in point_keys:
+                points[key].append(history[f"point_{key}"].item())
+            histories.append({variable: history[variable].astype(float) for variable in history.files
+                              if not variable.startswith('point_') and history[variable].dtype.kind in 'biuf'
+                              and (variables is None or variable in variables)})
+
+    n_iterations = [max((len(history[variable]) for variable in history), default=0) for history in histories]
+    max_iterations = max(n_iterations, default=0)
+    histories_arrays = {
+        'hierarchy': np.array(points['hierarchy'], dtype=str),
+        'case': np.array(points['case'], dtype=str),
+        'exp_set': np.array(points['exp_set'], dtype=int),
+        'level': np.array(points['level'], dtype=int),
+        'alpha': np.array(points['alpha'], dtype=float),
+        'fail_flag': np.array(points['fail_flag'], dtype=int),
+        'n_iterations': np.array(n_iterations, dtype=int),
+    }
+    for variable in sorted({variable for history in histories for variable in history}):
+        variable_array = np.full((len(histories), max_iterations), np.nan)
+        for row, history in enumerate(histories):
+            if variable in history:
+                variable_array[row, :len(history[variable])] = history[variable]
+        histories_arrays[variable] = variable_array
+    return histories_arrays
+
+class SimResults():
+    """
+    Lazy access to the results of a simulation series, running only the simulations that are missing.
+
+    Results are answered from the existing simulations in the output directory when they were run with the same inputs, and the missing or stale ones are run on demand. Angles of attack that are not in the `aoa_list` of the experimental set can also be requested. Every result is memoized, so asking again does not read or run anything.
+
+    Methods
+    -------
+    **get()**
+        Returns the result of a single angle of attack.
+
+    **get_many()**
+        Returns the results of several angles of attack, running the missing ones together.
+
+    Inputs
+    ------
+    - **info_file** : str
+        Path to the input YAML file of the simulation series.
+
+    Notes
+    -----
+    - The missing simulations are run in-process on all the ranks, or as concurrent subprocesses if `run_as_subprocess` is `yes`.
+    - The results of the new simulations are added to the journal and to the results database of the output directory.
+    """
+    def __init__(self, info_file):
+        from mdss.run_sim import run_sim # Imported here, as reading existing results does not need it
+        self.sim = run_sim(info_file)
+        self.sim.replay_journal()
+        self.memo = {} # Results keyed by (hierarchy, case, exp_set, level, alpha)
+
+    def get(self, case, exp_set, level, alpha, hierarchy=None):
+        """
+        Returns the result of a single angle of attack, running its simulation if it is missing.
+
+        Inputs
+        ------
+        - **case** : str
+            Name of the case.
+        - **exp_set** : int
+            Index of the experimental set in the case.
+        - **level** : int
+            Index of the refinement level.
+        - **alpha** : float
+            Angle of attack.
+        - **hierarchy** : str, optional
+            Name of the hierarchy, only needed if several hierarchies have a case with this name.
+
+        Outputs
+        -------
+        **dict**
+            Dictionary with `cl`, `cd`, `wall_time`, `fail_flag` and `out_dir`.
+        """
+        return self.get_many([(case, exp_set, level, alpha)], hierarchy=hierarchy)[0]
+
+    def get_many(self, points, hierarchy=None):
+        """
+        Returns the results of several angles of attack, running the missing simulations together.
+
+        Inputs
+        ------
+        - **points** : list
+            List of `(case, exp_set, level, alpha)` tuples.
+        - **hierarchy** : str, optional
+            Name of the hierarchy, only needed if several hierarchies have a case with the requested names.
+
+        Outputs
+        -------
+        **list**
+            Results of the points in the order they were requested, each one a dictionary as returned by `get()`.
+        """
+        comm = get_comm()
+        sim_info = self.sim.sim_info
+        locations = [self.find_point(case, exp_set, level, alpha, hierarchy) for case, exp_set, level, alpha in points]
+
+        # Answer from the existing simulations, and gather the missing ones by refinement level
+        missing = {} # Angles of attack to run, keyed by (hierarchy, case, exp_set, level) indices
+        for hierarchy_index, case_index, exp_set, level, aoa in locations:
+            hierarchy_info = sim_info['hierarchies'][hierarchy_index]
+            case_info = hierarchy_info['cases'][case_index]
+            exp_info = case_info['exp_sets'][exp_set]
+            memo_key = (hierarchy_info['name'], case_info['name'], exp_set, level, float(aoa))
+            if memo_key in self.memo:
+                continue
+            point_status = None
+            if comm.rank == 0:
+                point_status = self.sim.get_point_status(hierarchy_info, case_info, exp_set, level, aoa, self.sim.get_input_hash(case_info, exp_info, level, aoa))
+            point_status = comm.bcast(point_status, root=0)
+            if point_status in ('reused', 'exhausted'): # An exhausted point is a known failure
+                self.memo[memo_key] = self.sim.get_aoa_results(hierarchy_info, case_info, exp_set, level, aoa)
+            elif aoa not in missing.setdefault((hierarchy_index, case_index, exp_set, level), []):
+                missing[(hierarchy_index, case_index, exp_set, level)].append(aoa)
+
+        if missing:
+            self.run_missing(missing)
+        return [self.memo[(sim_info['hierarchies'][h]['name'], sim_info['hierarchies'][h]['cases'][c]['name'], e, l, float(aoa))] for h, c, e, l, aoa in locations]
+
+    def find_point(self, case, exp_set, level, alpha, hierarchy=None):
+        """
+        Finds the indices of a point in the input YAML file, as `(hierarchy, case, exp_set, level, aoa)`. The angle of attack is taken from the `aoa_list` of the experimental set if it is there, so that the existing output directories are used.
+        """
+        sim_info = self.sim.sim_info
+        matches = [(hierarchy_index, case_index) for hierarchy_index, hierarchy_info in enumerate(sim_info['hierarchies']) for case_index, case_info in enumerate(hierarchy_info['cases'])
+                   if case_info['name'] == case and (hierarchy is None or hierarchy_info['name'] == hierarchy)]
+        if len(matches) != 1:
+            raise ValueError(f"Case '{case}' matches {len(matches)} cases in the input file. Give the name of an existing case, and its hierarchy if the name is not unique.")
+        hierarchy_index, case_index = matches[0]
+        case_info = sim_info['hierarchies'][hierarchy_index]['cases'][case_index]
+        if not 0 <= exp_set < len(case_info['exp_sets']) or not 0 <= level < len(case_info['mesh_files']):
+            raise ValueError(f"Case '{case}' has {len(case_info['exp_sets'])} experimental sets and {len(case_info['mesh_files'])} refinement levels, experimental set {exp_set} at level {level} was requested.")
+        aoa = next((aoa for aoa in case_info['exp_sets'][exp_set]['aoa_list'] if float(aoa) == float(alpha)), alpha)
+        return hierarchy_index, case_index, exp_set, level, aoa
+
+    def run_missing(self, missing):
+        """
+        Runs the missing simulations, and memoizes their results.
+
+        Inputs
+        ------
+        - **missing** : dict
+            Angles of attack to run, keyed by `(hierarchy, case, exp_set, level)` indices.
+        """
+        comm = get_comm()
+        sim = self.sim
+        graph = TaskGraph()
+        for (hierarchy_index, case_index, exp_set, level), aoa_list in missing.items():
+            hierarchy_info = sim.sim_info['hierarchies'][hierarchy_index]
+            case_info = hierarchy_info['cases'][case_index]
+            graph.add_task(f"{hierarchy_info['name']}/{case_info['name']}/exp_set_{exp_set}/L{level}", 'solve',
+                           {'hierarchy': hierarchy_index, 'case': case_index, 'exp_set': exp_set, 'level_indices': [level], 'aoa_list': aoa_list}, cost=len(aoa_list))
+
+        if sim.sim_info['run_as_subprocess'] == 'yes':
+            sim.run_tasks_as_subprocesses(graph)
+            sim.replay_journal() # Read the records appended by the subprocesses
+        else:
+            for task in graph.get_tasks('solve'):
+                hierarchy_index, case_index, exp_set, level_indices, aoa_list = task.get_unit()
+                hierarchy_info = sim.sim_info['hierarchies'][hierarchy_index]
+                case_info = hierarchy_info['cases'][case_index]
+                sim.run_exp_set(hierarchy_info, case_info, exp_set, case_info['exp_sets'][exp_set], level_indices=level_indices, aoa_list=aoa_list)
+            comm.Barrier()
+            sim.replay_journal()
+
+        results = {}
+        for task in graph.get_tasks('solve'):
+            hierarchy_index, case_index, exp_set, level_indices, aoa_list = task.get_unit()
+            hierarchy_info = sim.sim_info['hierarchies'][hierarchy_index]
+            case_info = hierarchy_info['cases'][case_index]
+            for aoa in aoa_list:
+                aoa_level_dict = sim.get_aoa_results(hierarchy_info, case_info, exp_set, level_indices[0], aoa)
+                if aoa_level_dict is None: # The simulation did not write its results
+                    aoa_level_dict = {'cl': float('nan'), 'cd': float('nan'), 'wall_time': "0.00 sec", 'fail_flag': 1, 'out_dir': None}
+                self.memo[(hierarchy_info['name'], case_info['name'], exp_set, level_indices[0], float(aoa))] = aoa_level_dict
+                results.setdefault((hierarchy_index, case_index, exp_set), {}).setdefault(f"L{level_indices[0]}", {})[f"aoa_{aoa}"] = aoa_level_dict
+        if comm.rank == 0:
+            sim.write_results_db(results)
+        comm.Barrier()
+
 ################################################################################
 # Functions to run predetermined simulations
 ################################################################################
@@ -139,6 +432,7 @@ class ref_case_info(BaseModel):
     mesh_files: list[str]
     aoa_list: list[float]
     solver_parameters: Optional[dict]=None
+    cache_dir: Optional[str]=None
 
 class ref_hpc_info:
     job_name: Optional[str]
@@ -172,6 +466,7 @@ def run_case(case, case_info):
         - `mesh_files` (list[str]): List of mesh file names.
         - `aoa_list` (list[float]): List of angles of attack for the simulation.
         - `solver_parameters` (Optional[dict]): Dictionary of solver-specific parameters (optional).
+        - `cache_dir` (Optional[str]): Path to a result cache shared across runs (optional).
 
     Outputs:
     -------
@@ -183,6 +478,8 @@ def run_case(case, case_info):
     - Creates a temporary directory for the simulation input and output files.
     - Deletes the temporary directory after the simulation run.
     """
+    from mdss.run_sim import run_sim # Imported here, as reading existing results does not need it
+    comm = get_comm()
     ref_case_info.model_validate(case_info)
     # Validate or set default for 'hpc'
     if 'hpc' not in case_info:
@@ -210,8 +507,11 @@ def run_case(case, case_info):
 
 
     input_file  = f"{case}_simInfo.yaml"
-    with pkg_resources.open_text('mdss.resources', input_file) as f:
-        sim_info = yaml.safe_load(f)
+    sim_info = None
+    if comm.rank == 0: # Read on the root rank, and shared with the other ranks
+        with pkg_resources.open_text('mdss.resources', input_file) as f:
+            sim_info = yaml.safe_load(f)
+    sim_info = comm.bcast(sim_info, root=0)
     try:
         sim_info['hpc'] = case_info['hpc']
     except:
@@ -235,6 +535,9 @@ def run_case(case, case_info):
     
     comm.Barrier()
 
+    if case_info.get('cache_dir'):
+        sim_info['cache_dir'] = case_info['cache_dir']
+
     if 'out_dir' in case_info:
         sim_info['out_dir'] = case_info['out_dir']
     else:
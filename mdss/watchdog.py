@@ -0,0 +1,181 @@
+import os
+import math
+import time
+import yaml
+from mdss.output_writer import write_yaml_file
+
+################################################################################
+# Watchdog of stalled and diverging simulations
+################################################################################
+watchdog_criteria = {
+    'min_iterations': 500, # Iterations run before stalls and divergence are checked
+    'stall_iterations': 2000, # Iterations over which the residual must drop
+    'stall_decades': 0.5, # Orders of magnitude the residual must drop over 'stall_iterations'
+    'divergence_decades': 4.0, # Orders of magnitude the residual may grow above its lowest value
+}
+watchdog_stop_file = "watchdog_stop.yaml" # Written in the output directory of an angle of attack stopped by the watchdog
+watchdog_point_prefix = "Output directory: " # Printed by the simulation of each angle of attack, before its solver iterations
+watchdog_columns = {'totalres': 'totalres', 'resrho': 'resrho', 'clift': 'cl', 'cdrag': 'cd'} # ADflow iteration columns watched, keyed by their normalized header
+
+def get_watchdog_criteria(sim_info):
+    """
+    Returns the criteria of the watchdog, from the defaults and the criteria set by the user.
+
+    Inputs
+    ------
+    - **sim_info** : dict
+        Dictionary containing simulation details, with the optional `watchdog` and `watchdog_criteria` entries.
+
+    Outputs
+    -------
+    **dict or None**
+        Criteria of the watchdog, as in `watchdog_criteria`, or None if the watchdog is off.
+    """
+    if sim_info.get('watchdog', 'no') != 'yes':
+        return None
+    criteria = dict(watchdog_criteria)
+    for criterion, value in (sim_info.get('watchdog_criteria') or {}).items():
+        if criterion not in criteria:
+            raise ValueError(f"'{criterion}' in 'watchdog_criteria' is not a criterion. Available criteria are {list(criteria)}")
+        if not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"'{criterion}' in 'watchdog_criteria' must be a positive number, not '{value}'")
+        criteria[criterion] = value
+    return criteria
+
+def check_history(history, criteria):
+    """
+    Checks the convergence history of a simulation for NaNs, a stalled residual or a diverging residual.
+
+    Inputs
+    ------
+    - **history** : dict
+        Values of the solver variables at each iteration, keyed by variable name, such as `totalRes`, `resrho`, `cl` and `cd`. Names are not case-sensitive.
+    - **criteria** : dict
+        Criteria of the watchdog, as returned by `get_watchdog_criteria()`.
+
+    Outputs
+    -------
+    **str or None**
+        `nan`, `stall` or `divergence`, or None if the simulation may still converge.
+
+    Notes
+    -----
+    - The residual is `totalRes`, or `resrho` if `totalRes` is not in the history.
+    - The residual stalls when its lowest value over the last `stall_iterations` iterations is not `stall_decades` orders of magnitude below its lowest value before them.
+    """
+    history = {variable.lower(): values for variable, values in history.items()}
+    residuals = history.get('totalres', history.get('resrho'))
+    if residuals is None or len(residuals) == 0:
+        return None
+    residuals = [float(value) for value in residuals]
+    for variable in ('cl', 'cd'):
+        if variable in history and len(history[variable]) > 0 and not math.isfinite(float(history[variable][-1])):
+            return 'nan'
+    if not all(math.isfinite(value) for value in residuals):
+        return 'nan'
+    if len(residuals) < criteria['min_iterations']:
+        return None
+    residual_log = [math.log10(max(value, 1e-300)) for value in residuals]
+    if residual_log[-1] - min(residual_log) > criteria['divergence_decades']:
+        return 'divergence'
+    window = int(criteria['stall_iterations'])
+    if window > 0 and len(residual_log) > window:
+        if min(residual_log[:-window]) - min(residual_log[-window:]) < criteria['stall_decades']:
+            return 'stall'
+    return None
+
+def read_watchdog_stop(aoa_out_dir):
+    """
+    Reads the stop written by the watchdog in the output directory of an angle of attack. Returns None if the simulation was not stopped.
+    """
+    try:
+        with open(f"{aoa_out_dir}/{watchdog_stop_file}", 'r') as stop_file:
+            return yaml.safe_load(stop_file)
+    except (OSError, yaml.YAMLError):
+        return None
+
+class Watchdog():
+    """
+    Watches the solver iterations printed by simulation subprocesses, and tells when the simulation they are running is hopeless.
+
+    Each subprocess prints the output directory of each angle of attack before solving it, and ADflow prints one line per iteration. The watchdog reads the new lines of the log file of a subprocess at each check, and checks the history of the current angle of attack with `check_history()`.
+
+    Inputs
+    ------
+    - **criteria** : dict
+        Criteria of the watchdog, as returned by `get_watchdog_criteria()`.
+
+    Notes
+    -----
+    - ADflow must print its iterations (`printIterations`), which the simulations do when the watchdog is on.
+    - The columns of the iterations are read from the header printed by ADflow. The residual and forces are only watched if they are in `monitorvariables`.
+    """
+    def __init__(self, criteria):
+        self.criteria = criteria
+        self.logs = {} # State of each log file: read offset, unfinished line, columns, current output directory and history
+
+    def check_log(self, log_file):
+        """
+        Reads the new lines of the log file of a subprocess, and checks the simulation it is running.
+
+        Inputs
+        ------
+        - **log_file** : str
+            Path to the file the standard output of the subprocess is written to.
+
+        Outputs
+        -------
+        **dict or None**
+            Stop of the simulation, with the `reason`, the output directory of the angle of attack (`out_dir`), the number of iterations run and the wall time, or None if the simulation may carry on.
+        """
+        log = self.logs.setdefault(log_file, {'offset': 0, 'partial': "", 'columns': None, 'out_dir': None, 'start_time': None, 'history': {}})
+        try:
+            with open(log_file, 'r', errors='replace') as log_handle:
+                log_handle.seek(log['offset'])
+                text = log_handle.read()
+                log['offset'] = log_handle.tell()
+        except OSError:
+            return None
+        lines = (log['partial'] + text).split("\n")
+        log['partial'] = lines.pop() # Kept until the line is complete
+        for line in lines:
+            self.read_line(log, line)
+        if log['out_dir'] is None:
+            return None
+        reason = check_history(log['history'], self.criteria)
+        if reason is None:
+            return None
+        stop = {
+            'reason': reason,
+            'out_dir': log['out_dir'],
+            'iterations': max((len(values) for values in log['history'].values()), default=0),
+            'wall_time': round(time.time() - log['start_time'], 3),
+        }
+        log['out_dir'] = None # Nothing more to watch until the next angle of attack starts
+        log['history'] = {}
+        return stop
+
+    def read_line(self, log, line):
+        if line.startswith(watchdog_point_prefix):
+            log['out_dir'] = line[len(watchdog_point_prefix):].strip()
+            log['start_time'] = time.time()
+            log['history'] = {}
+        elif line.startswith('#') and '|' in line and 'Iter' in line and 'Grid' in line: # First row of the iteration header
+            log['columns'] = [column.strip().lstrip('#').strip().lower().replace(' ', '').replace('_', '') for column in line.split('|')[:-1]]
+        elif log['columns'] is not None and log['out_dir'] is not None:
+            values = line.split()
+            if len(values) != len(log['columns']) or not values[0].isdigit():
+                return
+            try:
+                row = {watchdog_columns[column]: float(value) for column, value in zip(log['columns'], values) if column in watchdog_columns}
+            except ValueError: # Not an iteration line
+                return
+            for variable, value in row.items():
+                log['history'].setdefault(variable, []).append(value)
+
+    def write_stop(self, stop):
+        """
+        Writes the stop of a simulation in the output directory of its angle of attack, so that the subprocess run again after it records the simulation as failed instead of running it again.
+        """
+        if os.path.isdir(stop['out_dir']):
+            write_yaml_file(f"{stop['out_dir']}/{watchdog_stop_file}", stop)
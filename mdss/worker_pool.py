@@ -0,0 +1,194 @@
+import sys
+import time
+import traceback
+from mpi4py import MPI
+
+################################################################################
+# Persistent pool of MPI workers
+################################################################################
+def run_worker_pool(info_file, graph, groups, nproc):
+    """
+    Spawns a pool of MPI workers and runs the solve tasks of a task graph on it.
+
+    The workers are spawned once by the calling process, and split into `groups` groups of `nproc` processors. The root of each group asks for a task, runs it with its group, and sends the results back along with the request for the next task. A task is only dispatched once its dependencies are done, and groups that ask for work while no task is ready wait until one is.
+
+    Inputs
+    ------
+    - **info_file** : str
+        Path to the YAML file used by the workers to set up `run_sim`. The simulations are run in-process, so `run_as_subprocess` must be `no` in this file.
+    - **graph** : TaskGraph
+        Task graph of the simulation series. The solve tasks that are done are not run, and the others are marked as done as they complete.
+    - **groups** : int
+        Number of worker groups.
+    - **nproc** : int
+        Number of processors in each worker group.
+
+    Outputs
+    -------
+    **dict**
+        Results of each experimental set keyed by `(hierarchy, case, exp_set)`, as returned by `run_sim.run_exp_set()`.
+
+    Notes
+    -----
+    - Must be called by a single process, as the workers are spawned on `MPI.COMM_SELF`.
+    - The MPI implementation must support dynamic process management (`MPI_Comm_spawn`).
+    - A task that raises an error, or a group that cannot set up `run_sim`, is reported by the workers instead of leaving the parent waiting for it.
+    """
+    spawn_time = time.time() # The workers measure their start-up time from this
+    intercomm = MPI.COMM_SELF.Spawn(sys.executable, args=['-m', 'mdss.worker_pool'], maxprocs=groups * nproc)
+    intercomm.bcast({'info_file': info_file, 'nproc': nproc, 'spawn_time': spawn_time}, root=MPI.ROOT)
+    results = dispatch_tasks(intercomm, graph, groups)[0] # The simulations of the failed tasks are recorded as failed when the results are collected
+    intercomm.Disconnect()
+    return results
+
+def dispatch_tasks(task_comm, graph, groups):
+    """
+    Dispatches the ready solve tasks of a task graph to groups of processors, and collects their results.
+
+    The root of each group sends the result of its previous task, or None for its first request, and receives its next task, or None once there is no more work. A task is only dispatched once its dependencies are done, and groups that ask for work while no task is ready wait until one is.
+
+    Inputs
+    ------
+    - **task_comm** : MPI communicator
+        Communicator reaching the roots of the groups, such as the intercommunicator of the spawned workers. The tasks are dispatched from rank 0.
+    - **graph** : TaskGraph
+        Task graph of the simulation series. The solve tasks that are done are not run, and the others are marked as done as they complete or fail.
+    - **groups** : int
+        Number of groups running the tasks.
+
+    Outputs
+    -------
+    **tuple**
+        Results of each experimental set keyed by `(hierarchy, case, exp_set)`, as returned by `run_sim.run_exp_set()`, and the error of each failed task keyed by task name.
+
+    Notes
+    -----
+    - A failed task is marked as done, so that the tasks depending on it still run, starting from free stream.
+    - A group that could not be set up is not sent any task. The tasks left when no group is left are not run.
+    """
+    results = {}
+    errors = {}
+    active_groups = groups
+    idle_workers = [] # Group roots waiting for a task
+    status = MPI.Status()
+    while active_groups > 0:
+        # Each message is the result of the previous task of a group, or None for its first request
+        message = task_comm.recv(source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG, status=status)
+        worker = status.Get_source()
+        if message is not None:
+            task_name, exp_key, exp_results, run_time, error = message
+            if task_name is None: # The group could not be set up
+                print(f"Worker {worker:<4} | Could not be set up: {error}")
+                active_groups -= 1
+                continue
+            graph.mark_done(task_name)
+            for refinement_level, level_results in exp_results.items():
+                results.setdefault(exp_key, {}).setdefault(refinement_level, {}).update(level_results)
+                for aoa_key, aoa_level_dict in level_results.items():
+                    print(f"Worker {worker:<4} | {refinement_level} {aoa_key:<10} | CL: {aoa_level_dict['cl']:8.4f} | CD: {aoa_level_dict['cd']:8.4f} | Fail flag: {aoa_level_dict['fail_flag']}")
+            if error is not None:
+                errors[task_name] = error
+                print(f"Worker {worker:<4} | {task_name} | Failed after {run_time:.2f} sec: {error}")
+            else:
+                print(f"Worker {worker:<4} | {task_name} | Completed in {run_time:.2f} sec")
+        idle_workers.append(worker)
+
+        # Dispatch the ready tasks to the idle groups
+        ready_tasks = graph.get_ready_tasks('solve')
+        while idle_workers and ready_tasks:
+            task = ready_tasks.pop(0)
+            graph.mark_started(task.name)
+            task_comm.send((task.name, task.get_unit()), dest=idle_workers.pop(0))
+
+        # Release the idle groups once all the tasks are dispatched
+        if all(task.name in graph.started for task in graph.get_tasks('solve')):
+            for idle_worker in idle_workers:
+                task_comm.send(None, dest=idle_worker) # No more work, the group exits
+                active_groups -= 1
+            idle_workers = []
+    return results, errors
+
+def serve_tasks(sim, task_comm, group_comm, group):
+    """
+    Runs the tasks sent by `dispatch_tasks()` on a group of processors, until there is no more work.
+
+    Inputs
+    ------
+    - **sim** : run_sim
+        Simulation series set up on the processors of the group.
+    - **task_comm** : MPI communicator
+        Communicator reaching the dispatcher, as rank 0, from the root of the group.
+    - **group_comm** : MPI communicator
+        Communicator of the processors of the group.
+    - **group** : int
+        Index of the group, recorded in the timeline.
+
+    Notes
+    -----
+    - An error raised by a task is sent to the dispatcher in place of its results, and the group carries on with the next task. The error must be raised on all the processors of the group, as the others would otherwise wait for it.
+    """
+    message = None # Result of the previous unit of work
+    while True:
+        task = None
+        if group_comm.rank == 0:
+            task_comm.send(message, dest=0)
+            task = task_comm.recv(source=0)
+        task = group_comm.bcast(task, root=0)
+        if task is None:
+            break
+
+        task_name, (hierarchy, case, exp_set, level_indices, aoa_list) = task
+        hierarchy_info = sim.sim_info['hierarchies'][hierarchy]
+        case_info = hierarchy_info['cases'][case]
+        exp_info = case_info['exp_sets'][exp_set]
+        start_time = time.time()
+        error = None
+        try:
+            exp_results = sim.run_exp_set(hierarchy_info, case_info, exp_set, exp_info, comm=group_comm, level_indices=level_indices, aoa_list=aoa_list)
+        except Exception as task_error: # Reported to the dispatcher, whose other groups carry on
+            if group_comm.rank == 0:
+                traceback.print_exc()
+            error = f"{type(task_error).__name__}: {task_error}"
+            exp_results = {}
+            try:
+                sim.writer.flush() # The simulations completed before the error are collected from their files
+            except Exception as write_error:
+                error += f". Then could not write the output files, {type(write_error).__name__}: {write_error}"
+        message = (task_name, (hierarchy, case, exp_set), exp_results, time.time() - start_time, error)
+        sim.tracer.complete(task_name, start_time, category='task', group=group, failed=error is not None)
+
+def worker_main():
+    """
+    Entry point of the spawned workers.
+
+    The workers split into groups of `nproc` processors and set up `run_sim` once. The root of each group then requests tasks from the parent process, broadcasts them to its group, and sends back the results, until the parent has no more work. If `run_sim` cannot be set up, the error is sent to the parent instead.
+    """
+    from mdss.run_sim import run_sim # Imported here, as run_sim imports this module
+
+    parent = MPI.Comm.Get_parent()
+    world = MPI.COMM_WORLD
+    pool_info = parent.bcast(None, root=0)
+    nproc = pool_info['nproc']
+    group = world.rank // nproc
+    group_comm = world.Split(group, world.rank)
+
+    try:
+        sim = run_sim(pool_info['info_file'])
+    except Exception as error: # Raised on all the workers, as the input file is loaded on all of them
+        if group_comm.rank == 0:
+            traceback.print_exc()
+            parent.send((None, None, {}, 0.0, f"{type(error).__name__}: {error}"), dest=0)
+        group_comm.Free()
+        parent.Disconnect()
+        return
+    sim.spawn_time = max(0.0, time.time() - pool_info['spawn_time']) # Counted for the first angle of attack run by the group
+    sim.tracer.process_name = f"worker {group} rank {group_comm.rank}"
+    sim.tracer.complete('spawn', pool_info['spawn_time'], category='spawn')
+    serve_tasks(sim, parent, group_comm, group)
+
+    sim.tracer.flush()
+    group_comm.Free()
+    parent.Disconnect()
+
+if __name__ == '__main__':
+    worker_main()
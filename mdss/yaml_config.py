@@ -6,6 +6,25 @@ class ref_sim_info(BaseModel):
     hpc: str
     run_as_subprocess: str
     nproc: int = None
+    reuse_problem: str = 'no'
+    warm_start: str = 'no'
+    mesh_sequencing: str = 'no'
+    mesh_sequencing_L2Convergence: float = None
+    groups: int = 1
+    subprocess_cores: int = None
+    level_nproc: list[int] = None
+    worker_pool: str = 'no'
+    levels: list[int] = None
+    resume: str = 'journal'
+    cache_dir: str = None
+    cache_quota: float = None
+    output_profile: str = 'standard'
+    output_artifacts: dict = None
+    trace: str = 'no'
+    watchdog: str = 'no'
+    watchdog_criteria: dict = None
+    retry_budget: int = None
+    retry_failed: str = 'no'
 
 class ref_hpc_info(BaseModel):
     cluster: str
@@ -14,6 +33,13 @@ class ref_hpc_info(BaseModel):
     nproc: int
     account_name: str
     email_id: str
+    submission: str = 'single'
+    task_nproc: int = None
+    task_time: str = None
+    array_limit: int = None
+    merge_time: str = None
+    walltime_margin: float = None
+    core_sec_per_cell: float = None
 
 
 class ref_hierarchy_info(BaseModel):
@@ -26,6 +52,7 @@ class ref_case_info(BaseModel):
     mesh_files: list[str]
     geometry_info: dict
     solver_parameters: dict
+    retry_ladder: list[dict] = None
     exp_sets: list
 
 class ref_geometry_info(BaseModel):
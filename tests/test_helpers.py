@@ -0,0 +1,388 @@
+import os
+import sys
+
+import pytest
+
+import mdss.helpers
+from mdss.helpers import get_continuation_order, parse_slurm_time, format_slurm_time, run_subprocesses, run_as_subprocess, get_cost_model, get_journal_key, \
+    default_core_sec_per_cell, bytes_per_cell, get_output_artifacts, get_artifact_size, output_profiles, \
+    timing_phases, gather_timings, add_timings, load_yaml_file, load_csv_data, load_input_yaml, find_restart_file, get_converged_solutions, get_nearest_aoa, \
+    check_retry_ladder, get_retry_options, get_next_rung, read_aoa_attempts, add_attempts
+from mdss.output_writer import write_yaml_file
+
+class SerialComm():
+    """
+    Stands for the communicator of a single rank.
+    """
+    rank = 0
+    size = 1
+
+    def Barrier(self):
+        pass
+
+    def bcast(self, data, root=0):
+        return data
+
+################################################################################
+# get_continuation_order
+################################################################################
+@pytest.mark.parametrize('aoa_list, order', [
+    ([-4.0, -2.0, 0.0, 2.0, 4.0], [0.0, 2.0, 4.0, -2.0, -4.0]),
+    ([6.0, 2.0, 4.0], [2.0, 4.0, 6.0]), # Starts at the smallest angle when all are positive
+    ([-1.0, -3.0], [-1.0, -3.0]),
+    (['3.0', '-0.5', '1.0'], ['-0.5', '1.0', '3.0']), # Angles given as strings are ordered by value
+    ([2.5], [2.5]),
+])
+def test_continuation_order(aoa_list, order):
+    assert get_continuation_order(aoa_list) == order
+
+def test_continuation_order_neighbors():
+    aoa_list = [-3.0, 5.0, 1.0, -1.0, 3.0]
+    order = get_continuation_order(aoa_list)
+    assert sorted(order) == sorted(aoa_list)
+    for kk, aoa in enumerate(order[1:], start=1): # Each angle follows its nearest neighbor
+        assert min(abs(aoa - previous) for previous in order[:kk]) == 2.0
+
+################################################################################
+# find_restart_file, get_converged_solutions and get_nearest_aoa
+################################################################################
+def write_aoa_solution(refinement_level_dir, aoa, fail_flag=0, vol_files=('naca0012_000_vol.cgns',)):
+    """
+    Writes the `aoa_<aoa>.yaml` file and the volume solutions of an earlier simulation, and returns its output directory.
+    """
+    aoa_out_dir = refinement_level_dir / f"aoa_{aoa}"
+    os.makedirs(aoa_out_dir)
+    write_yaml_file(str(aoa_out_dir / f"aoa_{aoa}.yaml"), {'AOA': aoa, 'fail_flag': fail_flag})
+    for mtime, vol_file in enumerate(vol_files, start=1):
+        with open(aoa_out_dir / vol_file, 'w') as vol_handle:
+            vol_handle.write('solution')
+        os.utime(aoa_out_dir / vol_file, (mtime, mtime))
+    return aoa_out_dir
+
+def test_find_restart_file(tmp_path):
+    aoa_out_dir = write_aoa_solution(tmp_path, 2.0, vol_files=('naca0012_001_vol.cgns', 'naca0012_000_vol.cgns', 'naca0012_000_surf.cgns'))
+    assert find_restart_file(str(aoa_out_dir)) == f"{aoa_out_dir}/naca0012_000_vol.cgns" # The most recent volume solution
+    assert find_restart_file(str(tmp_path)) is None
+
+def test_converged_solutions(tmp_path):
+    write_aoa_solution(tmp_path, 0.0)
+    write_aoa_solution(tmp_path, -2.0)
+    write_aoa_solution(tmp_path, 2.0, fail_flag=1) # Not converged
+    write_aoa_solution(tmp_path, 4.0, vol_files=()) # No volume solution
+    os.makedirs(tmp_path / 'aoa_6.0') # No simulation info file
+    assert get_converged_solutions(str(tmp_path)) == {0.0: f"{tmp_path}/aoa_0.0/naca0012_000_vol.cgns", -2.0: f"{tmp_path}/aoa_-2.0/naca0012_000_vol.cgns"}
+    assert get_converged_solutions(str(tmp_path / 'missing')) == {}
+
+@pytest.mark.parametrize('aoa, converged_aoa_list, nearest_aoa', [
+    (3.0, [0.0, 2.0, 6.0], 2.0),
+    (-3.0, [0.0, 2.0], 0.0),
+    ('5.0', [0.0, '4.0'], '4.0'), # Angles given as strings are compared by value
+    (2.0, [], None),
+])
+def test_nearest_aoa(aoa, converged_aoa_list, nearest_aoa):
+    assert get_nearest_aoa(aoa, converged_aoa_list) == nearest_aoa
+
+################################################################################
+# parse_slurm_time and format_slurm_time
+################################################################################
+@pytest.mark.parametrize('slurm_time, seconds', [
+    ('30', 1800),
+    ('05:30', 330),
+    ('02:00:00', 7200),
+    ('1-00:00:00', 86400),
+    ('2-03', 183600),
+    ('1-02:03', 93780),
+    ('1-02:03:04', 93784),
+    (45, 2700),
+])
+def test_parse_slurm_time(slurm_time, seconds):
+    assert parse_slurm_time(slurm_time) == seconds
+
+@pytest.mark.parametrize('seconds, slurm_time', [
+    (0, '0-00:00:00'),
+    (60, '0-00:01:00'),
+    (61, '0-00:02:00'), # Rounded up to the minute
+    (7200, '0-02:00:00'),
+    (93784, '1-02:04:00'),
+])
+def test_format_slurm_time(seconds, slurm_time):
+    assert format_slurm_time(seconds) == slurm_time
+
+@pytest.mark.parametrize('slurm_time', ['0-00:01:00', '0-12:30:00', '3-23:59:00', '10-00:00:00'])
+def test_slurm_time_round_trip(slurm_time):
+    assert format_slurm_time(parse_slurm_time(slurm_time)) == slurm_time
+
+@pytest.mark.parametrize('seconds', [60, 3600, 5400, 86400, 90060])
+def test_seconds_round_trip(seconds):
+    assert parse_slurm_time(format_slurm_time(seconds)) == seconds
+
+################################################################################
+# run_subprocesses and run_as_subprocess
+################################################################################
+def make_job(tmp_path, label, nproc=1, duration=0.2, return_code=0, **options):
+    """
+    Returns a job whose subprocess writes its start and end times to its log file.
+    """
+    code = f"import time, sys; print(time.time(), flush=True); time.sleep({duration}); print(time.time()); sys.exit({return_code})"
+    return dict({'command': [sys.executable, '-c', code], 'nproc': nproc, 'log_file': str(tmp_path / f"{label}.txt"), 'label': label}, **options)
+
+def read_times(job):
+    with open(job['log_file'], 'r') as log_handle:
+        return [float(line) for line in log_handle.read().split()]
+
+def get_max_concurrency(jobs):
+    events = sorted([(read_times(job)[0], job['nproc']) for job in jobs] + [(read_times(job)[1], -job['nproc']) for job in jobs])
+    used_cores = max_cores = 0
+    for _, cores in events:
+        used_cores += cores
+        max_cores = max(max_cores, used_cores)
+    return max_cores
+
+def test_subprocesses_core_budget(tmp_path):
+    jobs = [make_job(tmp_path, f"job{index}") for index in range(4)]
+    assert run_subprocesses(jobs, 2, SerialComm(), poll_interval=0.02) == [0, 0, 0, 0]
+    assert get_max_concurrency(jobs) == 2
+
+def test_subprocesses_dependencies(tmp_path):
+    jobs = [make_job(tmp_path, 'coarse'), make_job(tmp_path, 'fine', deps=[0]), make_job(tmp_path, 'other', duration=0.0)]
+    run_subprocesses(jobs, 4, SerialComm(), poll_interval=0.02)
+    assert read_times(jobs[1])[0] >= read_times(jobs[0])[1]
+    assert read_times(jobs[2])[0] < read_times(jobs[0])[1] # Independent jobs do not wait
+
+def test_subprocesses_largest_cost_first(tmp_path):
+    jobs = [make_job(tmp_path, f"job{index}", duration=0.05, cost=cost) for index, cost in enumerate([1.0, 3.0, 2.0])]
+    run_subprocesses(jobs, 1, SerialComm(), poll_interval=0.02)
+    assert sorted(range(3), key=lambda index: read_times(jobs[index])[0]) == [1, 2, 0]
+
+def test_subprocesses_oversize_job_runs_alone(tmp_path):
+    jobs = [make_job(tmp_path, 'large', nproc=4), make_job(tmp_path, 'small')]
+    assert run_subprocesses(jobs, 2, SerialComm(), poll_interval=0.02) == [0, 0]
+    assert get_max_concurrency(jobs) == 4
+
+def test_subprocesses_return_codes(tmp_path):
+    jobs = [make_job(tmp_path, 'failed', duration=0.0, return_code=3), make_job(tmp_path, 'after', duration=0.0, deps=[0])]
+    assert run_subprocesses(jobs, 2, SerialComm(), poll_interval=0.02) == [3, 0] # A failed job still releases the jobs depending on it
+
+def test_run_as_subprocess(tmp_path, monkeypatch):
+    launched = []
+    def run_jobs(jobs, total_cores, comm):
+        launched.append((jobs, total_cores))
+        assert os.path.isfile(jobs[0]['command'][-1]) # Input file of the subprocess
+    monkeypatch.setattr(mdss.helpers, 'run_subprocesses', run_jobs)
+    sim_info = {'out_dir': str(tmp_path), 'hpc': 'no', 'warm_start': 'yes'}
+    case_info = {'name': 'naca0012', 'meshes_folder_path': 'grids', 'mesh_files': ['L0.cgns'], 'geometry_info': {}, 'solver_parameters': {}}
+    exp_info = {'Re': 1e6, 'mach': 0.3, 'Temp': 300.0, 'exp_data': None}
+    aoa_out_dir = str(tmp_path / 'aoa_2.0')
+    run_as_subprocess(sim_info, {'name': '2d_clean'}, case_info, exp_info, 2.0, aoa_out_dir, 4, SerialComm())
+    jobs, total_cores = launched[0]
+    assert total_cores == 4
+    assert jobs[0]['command'][:3] == ['mpirun', '-np', '4']
+    assert jobs[0]['log_file'] == f"{aoa_out_dir}/subprocess_out.txt"
+    assert os.path.isfile(tmp_path / 'script_for_subprocess.py')
+    assert os.listdir(aoa_out_dir) == [] # The input file is deleted once the subprocess is completed
+
+################################################################################
+# get_cost_model
+################################################################################
+def get_cost_sim_info(tmp_path, n_cells=(1000, 250), aoa_list=(0.0, 2.0)):
+    """
+    Returns the information of an input YAML file with a case of plain mesh files, whose sizes stand for their numbers of cells.
+    """
+    os.makedirs(tmp_path / 'grids', exist_ok=True)
+    for ii, cells in enumerate(n_cells):
+        with open(tmp_path / 'grids' / f"L{ii}.cgns", 'wb') as mesh_handle:
+            mesh_handle.write(b'x' * int(cells * bytes_per_cell))
+    case_info = {'name': 'naca0012', 'meshes_folder_path': str(tmp_path / 'grids'), 'mesh_files': [f"L{ii}.cgns" for ii in range(len(n_cells))], 'exp_sets': [{'aoa_list': list(aoa_list)}]}
+    return {'out_dir': str(tmp_path / 'output'), 'hierarchies': [{'name': '2d_clean', 'cases': [case_info]}]}
+
+def test_cost_from_mesh_size(tmp_path):
+    get_cost = get_cost_model(get_cost_sim_info(tmp_path), 4, core_sec_per_cell=2.0)
+    assert get_cost(0, 0, 0, 0, 0.0) == pytest.approx(500.0)
+    assert get_cost(0, 0, 0, 1, 0.0) == pytest.approx(125.0)
+    assert get_cost_model(get_cost_sim_info(tmp_path), 4)(0, 0, 0, 0, 0.0) == pytest.approx(default_core_sec_per_cell * 250.0)
+
+def test_cost_from_journal(tmp_path):
+    journal = {get_journal_key('2d_clean', 'naca0012', 0, 1, 0.0): {'wall_time': 50.0, 'nproc': 2}}
+    get_cost = get_cost_model(get_cost_sim_info(tmp_path), 4, core_sec_per_cell=2.0, journal=journal)
+    assert get_cost(0, 0, 0, 1, 0.0) == pytest.approx(25.0) # Recorded on 2 processors, run on 4
+    assert get_cost(0, 0, 0, 0, 2.0) == pytest.approx(100.0) # Rate of 0.4 core-seconds per cell of the earlier simulation
+
+def test_cost_from_aoa_files(tmp_path):
+    sim_info = get_cost_sim_info(tmp_path)
+    aoa_out_dir = tmp_path / 'output' / '2d_clean' / 'naca0012' / 'exp_set_0' / 'L0' / 'aoa_2.0'
+    os.makedirs(aoa_out_dir)
+    write_yaml_file(str(aoa_out_dir / 'aoa_2.0.yaml'), {'wall_time': "100.00 sec", 'nproc': 8})
+    get_cost = get_cost_model(sim_info, 8)
+    assert get_cost(0, 0, 0, 0, 2.0) == pytest.approx(100.0)
+    assert get_cost(0, 0, 0, 1, 2.0) == pytest.approx(25.0)
+
+def test_cost_without_mesh(tmp_path):
+    sim_info = get_cost_sim_info(tmp_path)
+    sim_info['hierarchies'][0]['cases'][0]['mesh_files'].append('missing.cgns')
+    assert get_cost_model(sim_info, 4)(0, 0, 0, 2, 0.0) == 3600.0 # A typical simulation
+    journal = {get_journal_key('2d_clean', 'naca0012', 0, 0, 0.0): {'wall_time': 40.0, 'nproc': 4}, get_journal_key('2d_clean', 'naca0012', 0, 0, 2.0): {'wall_time': 0.0, 'nproc': 4}}
+    assert get_cost_model(sim_info, 4, journal=journal)(0, 0, 0, 2, 0.0) == pytest.approx(40.0) # The simulation that did not run is left out
+
+################################################################################
+# get_output_artifacts and get_artifact_size
+################################################################################
+@pytest.mark.parametrize('profile, artifacts', [
+    (None, {'n2': 'first', 'listings': 'none', 'tecplot_surface': 'all', 'history': 'all'}), # Standard profile
+    ('lean', {'n2': 'none', 'listings': 'none', 'tecplot_surface': 'none', 'history': 'all'}),
+    ('debug', {'n2': 'all', 'listings': 'all', 'tecplot_surface': 'all', 'history': 'all'}),
+])
+def test_output_profiles(profile, artifacts):
+    assert get_output_artifacts({} if profile is None else {'output_profile': profile}) == artifacts
+
+def test_output_artifacts_override_profile():
+    artifacts = get_output_artifacts({'output_profile': 'lean', 'output_artifacts': {'n2': 'first', 'history': 'none'}})
+    assert artifacts == {'n2': 'first', 'listings': 'none', 'tecplot_surface': 'none', 'history': 'none'}
+    assert output_profiles['lean']['n2'] == 'none' # The profile itself is left unchanged
+
+@pytest.mark.parametrize('sim_info', [
+    {'output_profile': 'verbose'},
+    {'output_artifacts': {'volume': 'all'}},
+    {'output_artifacts': {'n2': 'yes'}},
+])
+def test_output_artifacts_not_valid(sim_info):
+    with pytest.raises(ValueError):
+        get_output_artifacts(sim_info)
+
+def test_artifact_size(tmp_path):
+    for file_name, size in [('mphys_aero.html', 100), ('naca0012_surf.plt', 20), ('aoa_2.0_history.npz', 3), ('naca0012_vol.cgns', 1000), ('aoa_2.0.yaml', 10)]:
+        with open(tmp_path / file_name, 'wb') as file_handle:
+            file_handle.write(b'x' * size)
+    assert get_artifact_size(str(tmp_path)) == 123 # The volume solution and the simulation info are not artifacts
+    assert get_artifact_size(str(tmp_path / 'missing')) == 0
+
+################################################################################
+# gather_timings and add_timings
+################################################################################
+class GatherComm(SerialComm):
+    """
+    Stands for the rank of a communicator of several ranks, gathering the given data of the other ranks after its own.
+    """
+    def __init__(self, rank=0, other_data=()):
+        self.rank = rank
+        self.size = 1 + len(other_data)
+        self.other_data = list(other_data)
+
+    def gather(self, data, root=0):
+        return [data] + self.other_data if self.rank == root else None
+
+def test_gather_timings():
+    timings = gather_timings({'setup': 1.0, 'solve': 10.0}, GatherComm(other_data=[{'setup': 2.0, 'solve': 11.0}, {'setup': 3.0, 'solve': 12.0, 'post': 0.3}]))
+    assert list(timings) == timing_phases
+    assert timings['setup'] == {'min': 1.0, 'max': 3.0, 'mean': 2.0}
+    assert timings['solve'] == {'min': 10.0, 'max': 12.0, 'mean': 11.0}
+    assert timings['post'] == {'min': 0.0, 'max': 0.3, 'mean': 0.1} # Phases a rank did not record count as 0
+    assert gather_timings({'solve': 10.0}, GatherComm(rank=1, other_data=[{}])) is None
+
+def test_add_timings():
+    timing_rollup = {}
+    add_timings(timing_rollup, {'setup': {'min': 1.0, 'max': 2.0, 'mean': 1.5}, 'solve': {'min': 9.0, 'max': 10.0, 'mean': 9.5}}, 4)
+    add_timings(timing_rollup, {'solve': {'min': 5.0, 'max': 5.0, 'mean': 5.0}}, 8)
+    assert timing_rollup == {
+        'setup': {'wall_time': 2.0, 'core_sec': 8.0}, # The processors are held until the slowest rank is done
+        'solve': {'wall_time': 15.0, 'core_sec': 80.0},
+        'total': {'wall_time': 17.0, 'core_sec': 88.0},
+    }
+
+################################################################################
+# load_yaml_file, load_csv_data and load_input_yaml
+################################################################################
+class RootComm(SerialComm):
+    """
+    Stands for a communicator of several ranks, seen from a rank other than the root, which receives the data broadcast by the root.
+    """
+    rank = 1
+    size = 2
+
+    def __init__(self, root_data):
+        self.root_data = root_data
+
+    def bcast(self, data, root=0):
+        return self.root_data
+
+def write_input_yaml(tmp_path, **options):
+    """
+    Writes an input YAML file with a single experimental set, and returns its path.
+    """
+    case_info = {'name': 'naca0012', 'meshes_folder_path': str(tmp_path), 'mesh_files': ['L0.cgns'], 'geometry_info': {'chordRef': 1.0, 'areaRef': 1.0}, 'solver_parameters': {},
+                 'exp_sets': [{'aoa_list': [0.0, 2.0], 'Re': 1e6, 'mach': 0.3, 'Temp': 300.0}]}
+    info_file = str(tmp_path / 'input.yaml')
+    write_yaml_file(info_file, dict({'out_dir': str(tmp_path / 'output'), 'hpc': 'no', 'run_as_subprocess': 'no', 'hierarchies': [{'name': '2d_clean', 'cases': [case_info]}]}, **options))
+    return info_file
+
+def test_load_yaml_file(tmp_path):
+    write_yaml_file(str(tmp_path / 'aoa_2.0.yaml'), {'cl': 0.25})
+    assert load_yaml_file(str(tmp_path / 'aoa_2.0.yaml'), SerialComm()) == {'cl': 0.25}
+    assert load_yaml_file(str(tmp_path / 'missing.yaml'), SerialComm()) is None
+    assert load_yaml_file(str(tmp_path / 'missing.yaml'), RootComm({'cl': 0.25})) == {'cl': 0.25} # Broadcast from the root
+
+def test_load_csv_data(tmp_path):
+    with open(tmp_path / 'exp_data.csv', 'w') as csv_handle:
+        csv_handle.write("Alpha,CL\n0.0,0.0\n2.0,0.25\n")
+    assert load_csv_data(str(tmp_path / 'exp_data.csv'), SerialComm())['CL'].tolist() == [0.0, 0.25]
+    assert load_csv_data(str(tmp_path / 'missing.csv'), SerialComm()) is None
+
+def test_load_input_yaml(tmp_path):
+    sim_info = load_input_yaml(write_input_yaml(tmp_path), SerialComm())
+    assert sim_info['hierarchies'][0]['cases'][0]['exp_sets'][0]['aoa_list'] == [0.0, 2.0]
+    assert load_input_yaml(str(tmp_path / 'other.yaml'), RootComm((sim_info, None))) == sim_info # Only the root reads the file
+
+def test_load_input_yaml_not_valid(tmp_path):
+    info_file = write_input_yaml(tmp_path, run_as_subprocess='yes') # Without 'nproc'
+    with pytest.raises(ValueError, match="'nproc' must be provided"):
+        load_input_yaml(info_file, SerialComm()) # The root raises the original error
+    with pytest.raises(FileNotFoundError):
+        load_input_yaml(str(tmp_path / 'missing.yaml'), SerialComm())
+    with pytest.raises(ValueError, match="could not be loaded on the root rank. ValueError: 'nproc' must be provided"):
+        load_input_yaml(info_file, RootComm((None, "ValueError: 'nproc' must be provided as an integer"))) # The other ranks are not left waiting
+
+################################################################################
+# Retry ladder
+################################################################################
+retry_ladder = [{'CFL': 0.5}, {'CFL': 0.25, 'warm_start': 'no'}]
+
+@pytest.mark.parametrize('retry_ladder_info', [
+    {'CFL': 0.5}, # Not a list of rungs
+    [{'CFL': 0.5}, {}],
+    [{'warm_start': 'maybe'}],
+])
+def test_retry_ladder_not_valid(retry_ladder_info):
+    with pytest.raises(ValueError):
+        check_retry_ladder({'name': 'naca0012', 'retry_ladder': retry_ladder_info})
+
+@pytest.mark.parametrize('rung, retry_options', [
+    (0, {}), # The solver parameters of the case
+    (1, {'CFL': 0.5}),
+    (2, {'CFL': 0.25, 'warm_start': 'no'}), # Each rung adds its options on top of the rungs below it
+])
+def test_retry_options(rung, retry_options):
+    assert get_retry_options(retry_ladder, rung) == retry_options
+
+@pytest.mark.parametrize('rungs, next_rung', [
+    ([], 0),
+    ([0], 1),
+    ([0, 1], 2),
+    ([0, 1, 2], None), # The top rung of the ladder was tried
+])
+def test_next_rung(rungs, next_rung):
+    assert get_next_rung([{'rung': rung} for rung in rungs], retry_ladder) == next_rung
+
+def test_aoa_attempts(tmp_path):
+    attempts = [{'rung': 0, 'fail_flag': 1, 'wall_time': 10.0, 'core_sec': 40.0}]
+    write_yaml_file(str(tmp_path / 'aoa_2.0.yaml'), {'fail_flag': 1, 'input_hash': 'hash', 'attempts': attempts})
+    assert read_aoa_attempts(str(tmp_path / 'aoa_2.0.yaml'), 'hash') == attempts
+    assert read_aoa_attempts(str(tmp_path / 'aoa_2.0.yaml'), 'changed') == [] # Run with other inputs
+    assert read_aoa_attempts(str(tmp_path / 'missing.yaml'), 'hash') == []
+
+def test_add_attempts():
+    retry_rollup = {}
+    add_attempts(retry_rollup, [{'rung': 0, 'fail_flag': 1, 'wall_time': 10.0, 'core_sec': 40.0}, {'rung': 1, 'fail_flag': 0, 'wall_time': 20.0, 'core_sec': 80.0}], retry_ladder)
+    add_attempts(retry_rollup, [{'rung': 0, 'fail_flag': 0, 'wall_time': 5.0, 'core_sec': 20.0}], retry_ladder)
+    assert retry_rollup == {
+        'rung_0': {'options': {}, 'attempts': 2, 'successes': 1, 'wall_time': 15.0, 'core_sec': 60.0},
+        'rung_1': {'options': {'CFL': 0.5}, 'attempts': 1, 'successes': 1, 'wall_time': 20.0, 'core_sec': 80.0},
+    }
@@ -0,0 +1,60 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+# Modules that reading results, validating inputs and writing job scripts must not load
+heavy_modules = ['adflow', 'mphys', 'openmdao', 'baseclasses', 'matplotlib', 'mpi4py']
+
+import_time_budget = 5.0 # Seconds, for importing mdss.utils and mdss.helpers in a fresh interpreter
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_python(code, *options):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [repo_dir, os.environ.get('PYTHONPATH')])))
+    return subprocess.run([sys.executable, *options, '-c', code], capture_output=True, text=True, env=env, cwd=repo_dir, timeout=120)
+
+def get_import_time(stderr):
+    """
+    Returns the total import time in seconds, from the output of `python -X importtime`, as the sum of the cumulative times of the top-level imports.
+    """
+    import_time = 0.0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit() and not fields[2].startswith('  '): # Nested imports are indented
+            import_time += int(fields[1]) * 1e-6
+    return import_time
+
+def test_no_heavy_modules_loaded():
+    result = run_python("import sys, mdss.utils, mdss.helpers; print(','.join(sorted(m for m in sys.modules if m.split('.')[0] in %r)))" % (heavy_modules,))
+    assert result.returncode == 0, result.stderr
+    loaded = [module for module in result.stdout.strip().split(',') if module]
+    assert loaded == []
+
+def test_import_time_budget():
+    result = run_python("import mdss.utils, mdss.helpers", '-X', 'importtime')
+    assert result.returncode == 0, result.stderr
+    import_time = get_import_time(result.stderr)
+    assert 0.0 < import_time < import_time_budget, f"Importing mdss.utils and mdss.helpers took {import_time:.2f} s, over the budget of {import_time_budget} s"
+
+def test_run_sim_defers_solver_stack():
+    pytest.importorskip('mpi4py')
+    solver_modules = [module for module in heavy_modules if module != 'mpi4py'] # run_sim sets up MPI when it is imported
+    result = run_python("import sys, mdss.run_sim; print(','.join(sorted(m for m in sys.modules if m.split('.')[0] in %r)))" % (solver_modules,))
+    assert result.returncode == 0, result.stderr
+    assert [module for module in result.stdout.strip().split(',') if module] == []
+
+def test_top_importable_from_run_sim(monkeypatch):
+    pytest.importorskip('mpi4py')
+    import types
+    import mdss.run_sim
+    top_module = types.ModuleType('mdss.top')
+    top_module.Top = type('Top', (), {})
+    monkeypatch.setitem(sys.modules, 'mdss.top', top_module) # The solver stack is not installed with the tests
+    from mdss.run_sim import Top
+    assert Top is top_module.Top
+    with pytest.raises(AttributeError):
+        mdss.run_sim.Bottom
@@ -0,0 +1,159 @@
+import os
+
+import pytest
+import yaml
+
+from mdss.helpers import write_array_job_script, write_task_job_script, write_merge_job_script, get_subprocess_command, bytes_per_cell
+from mdss.task_graph import build_task_graph
+from mdss.output_writer import write_yaml_file
+
+def get_hpc_info(**options):
+    return dict({'cluster': 'GL', 'job_name': 'naca0012', 'nodes': 1, 'nproc': 36, 'account_name': 'aero', 'email_id': 'user@example.com'}, **options)
+
+def read_job_script(job_script_path):
+    """
+    Returns the `#SBATCH` options of a job script, and the command it runs.
+    """
+    with open(job_script_path, 'r') as script_handle:
+        lines = script_handle.read().strip().splitlines()
+    options = dict(line[len("#SBATCH --"):].split('=', 1) for line in lines if line.startswith("#SBATCH --"))
+    return options, lines[-1]
+
+################################################################################
+# Job script writers
+################################################################################
+def test_array_job_script(tmp_path):
+    sim_info = {'hpc_info': get_hpc_info(task_nproc=8, task_time='0:30:00', array_limit=4)}
+    job_script_path = write_array_job_script(sim_info, str(tmp_path), 2, 10, 'run_array_task.py', 'input.yaml', 'task_manifest.yaml')
+    assert job_script_path == f"{tmp_path}/naca0012_wave2.sh"
+    options, command = read_job_script(job_script_path)
+    assert options['job-name'] == 'naca0012_wave2'
+    assert options['array'] == '0-9%4'
+    assert options['ntasks'] == '8'
+    assert options['time'] == '0:30:00'
+    assert options['output'] == f"{tmp_path}/array_wave2_%a.txt"
+    assert command == "srun python run_array_task.py --inputFile input.yaml --manifest task_manifest.yaml --wave 2 --taskIndex $SLURM_ARRAY_TASK_ID"
+
+def test_array_job_script_defaults(tmp_path):
+    options, _ = read_job_script(write_array_job_script({'hpc_info': get_hpc_info(time='2:00:00')}, str(tmp_path), 0, 3, 'task.py', 'input.yaml', 'manifest.yaml'))
+    assert options['array'] == '0-2' # No limit on the array tasks running at the same time
+    assert options['ntasks'] == '36'
+    assert options['time'] == '2:00:00'
+
+def test_task_job_script(tmp_path):
+    job_script_path = write_task_job_script({'hpc_info': get_hpc_info(task_nproc=12)}, str(tmp_path), 3, '0-00:45:00', 'run_job.py', 'input.yaml', 'task_manifest.yaml')
+    assert job_script_path == f"{tmp_path}/naca0012_job3.sh"
+    options, command = read_job_script(job_script_path)
+    assert options['job-name'] == 'naca0012_job3'
+    assert options['ntasks'] == '12'
+    assert options['time'] == '0-00:45:00'
+    assert options['output'] == f"{tmp_path}/job3_out.txt"
+    assert command == "srun python run_job.py --inputFile input.yaml --manifest task_manifest.yaml --job 3"
+
+def test_merge_job_script(tmp_path):
+    options, command = read_job_script(write_merge_job_script({'hpc_info': get_hpc_info()}, str(tmp_path), 'overall_sim_out.txt', 'run_merge.py', 'input.yaml'))
+    assert options['ntasks'] == '1'
+    assert options['time'] == '0:30:00'
+    assert command == "python run_merge.py --inputFile input.yaml" # The results are merged on a single processor
+
+################################################################################
+# submit_job_array and submit_split_jobs
+################################################################################
+def make_hpc_sim(tmp_path, aoa_list, n_cells=(1000,), **options):
+    """
+    Returns a `run_sim` submitting a single experimental set to the cluster, with plain mesh files whose sizes stand for their numbers of cells.
+    """
+    from mdss.run_sim import run_sim
+    os.makedirs(tmp_path / 'grids', exist_ok=True)
+    for ii, cells in enumerate(n_cells):
+        with open(tmp_path / 'grids' / f"L{ii}.cgns", 'wb') as mesh_handle:
+            mesh_handle.write(b'x' * (cells * bytes_per_cell))
+    case_info = {
+        'name': 'naca0012',
+        'meshes_folder_path': str(tmp_path / 'grids'),
+        'mesh_files': [f"L{ii}.cgns" for ii in range(len(n_cells))],
+        'geometry_info': {'chordRef': 1.0, 'areaRef': 1.0},
+        'solver_parameters': {},
+        'exp_sets': [{'aoa_list': list(aoa_list), 'Re': 1e6, 'mach': 0.3, 'Temp': 300.0, 'exp_data': str(tmp_path / 'exp_data.csv')}],
+    }
+    hpc_info = get_hpc_info(**options.pop('hpc_info', {}))
+    sim_info = dict({'out_dir': str(tmp_path / 'output'), 'hpc': 'yes', 'run_as_subprocess': 'no', 'hpc_info': hpc_info, 'hierarchies': [{'name': '2d_clean', 'cases': [case_info]}]}, **options)
+    info_file = str(tmp_path / 'input.yaml')
+    write_yaml_file(info_file, sim_info)
+    return run_sim(info_file)
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """
+    Records the job scripts submitted with `submit_job()` and their dependencies, instead of submitting them.
+    """
+    pytest.importorskip('mpi4py')
+    import mdss.run_sim
+    submitted = []
+    def submit_job(job_script_path, dependency=None):
+        submitted.append((os.path.basename(job_script_path), dependency))
+        return str(len(submitted))
+    monkeypatch.setattr(mdss.run_sim, 'submit_job', submit_job)
+    return submitted
+
+def read_manifest(sim):
+    with open(f"{sim.out_dir}/task_manifest.yaml", 'r') as manifest_handle:
+        return yaml.safe_load(manifest_handle)
+
+def test_submit_job_array(tmp_path, submitted):
+    sim = make_hpc_sim(tmp_path, (4.0, -2.0, 2.0, 0.0), warm_start='yes', hpc_info={'submission': 'array'})
+    sim.run()
+    assert [[task['aoa_list'] for task in wave] for wave in read_manifest(sim)['waves']] == [[[0.0]], [[2.0], [-2.0]], [[4.0]]]
+    assert submitted == [
+        ('naca0012_wave0.sh', None),
+        ('naca0012_wave1.sh', 'afterany:1'), # Each wave starts once the previous one is completed
+        ('naca0012_wave2.sh', 'afterany:2'),
+        ('naca0012_merge.sh', 'afterany:3'),
+    ]
+    with open(f"{sim.out_dir}/job_task_input.yaml", 'r') as input_handle:
+        task_sim_info = yaml.safe_load(input_handle)
+    assert (task_sim_info['hpc'], task_sim_info['run_as_subprocess']) == ('no', 'no') # The array tasks run their simulation in-process
+
+def test_submit_split_jobs(tmp_path, submitted):
+    # 1000 core-seconds per angle of attack on 4 processors, so two fit in the time of a job with the margin and start-up time
+    sim = make_hpc_sim(tmp_path, (0.0, 2.0, 4.0, 6.0, 8.0), hpc_info={'submission': 'split', 'task_nproc': 4, 'time': '1:00:00', 'core_sec_per_cell': 4.0})
+    sim.run()
+    jobs = read_manifest(sim)['jobs']
+    assert [len(job['tasks']) for job in jobs] == [2, 2, 1]
+    assert [job['time'] for job in jobs] == ['0-00:44:00', '0-00:44:00', '0-00:23:00'] # Estimated time, times the margin, and the start-up time
+    assert all(job['deps'] == [] for job in jobs)
+    assert submitted == [('naca0012_job0.sh', None), ('naca0012_job1.sh', None), ('naca0012_job2.sh', None), ('naca0012_merge.sh', 'afterany:1:2:3')]
+
+def test_submit_split_jobs_chains_warm_start(tmp_path, submitted):
+    sim = make_hpc_sim(tmp_path, (0.0, 2.0, 4.0, 6.0), warm_start='yes', hpc_info={'submission': 'split', 'task_nproc': 4, 'time': '1:00:00', 'core_sec_per_cell': 4.0})
+    sim.run()
+    jobs = read_manifest(sim)['jobs']
+    assert [[task['aoa_list'][0] for task in job['tasks']] for job in jobs] == [[0.0, 2.0], [4.0, 6.0]]
+    assert [job['deps'] for job in jobs] == [[], [0]]
+    assert submitted == [('naca0012_job0.sh', None), ('naca0012_job1.sh', 'afterany:1'), ('naca0012_merge.sh', 'afterany:1:2')]
+
+################################################################################
+# Subprocesses run as job steps within the allocation
+################################################################################
+@pytest.mark.parametrize('hpc, launcher', [
+    ('yes', ['srun', '--exact', '-n', '4', '--cpus-per-task=1']), # Only the processors of the step, so that several steps share the nodes
+    ('no', ['mpirun', '-np', '4']),
+])
+def test_subprocess_command(hpc, launcher):
+    assert get_subprocess_command({'hpc': hpc}, 'script.py', 'input.yaml', 4) == launcher + ['python', 'script.py', '--inputFile', 'input.yaml']
+
+def test_level_nproc(tmp_path, monkeypatch):
+    pytest.importorskip('mpi4py')
+    import mdss.run_sim
+    launched = []
+    monkeypatch.setattr(mdss.run_sim, 'run_subprocesses', lambda jobs, total_cores, comm, **options: launched.append((jobs, total_cores)))
+    sim = make_hpc_sim(tmp_path, (0.0,), n_cells=(1000, 250), run_as_subprocess='yes', nproc=8, level_nproc=[8, 2], mesh_sequencing='yes')
+    sim.run_tasks_as_subprocesses(build_task_graph(sim.sim_info, get_cost=lambda hierarchy, case, exp_set, ii, aoa: 10.0 ** -ii))
+    jobs, total_cores = launched[0]
+    assert total_cores == 36 # Processors of the allocation
+    assert [job['label'].split('/')[-2] for job in jobs] == ['L1', 'L0']
+    assert [job['nproc'] for job in jobs] == [2, 8] # The coarser level runs on fewer processors
+    assert [job['command'][3] for job in jobs] == ['2', '8']
+    assert [job['cost'] for job in jobs] == [0.1, 1.0]
+    assert [job['deps'] for job in jobs] == [[], [0]]
+    assert not any(os.path.exists(job['input_file']) for job in jobs) # Deleted once the subprocesses are completed
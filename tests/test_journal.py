@@ -0,0 +1,214 @@
+import os
+import json
+
+import pytest
+import yaml
+
+from mdss.helpers import get_journal_key, append_journal_record, load_journal, read_aoa_results
+from mdss.output_writer import write_yaml_file
+
+def make_record(aoa, cl=0.25, fail_flag=0, level=0, **fields):
+    """
+    Returns the journal record of an angle of attack of the first experimental set of the case `naca0012`.
+    """
+    return dict({'hierarchy': '2d_clean', 'case': 'naca0012', 'exp_set': 0, 'level': level, 'aoa': aoa, 'cl': cl, 'cd': 0.0125, 'wall_time': 12.345, 'nproc': 4, 'fail_flag': fail_flag}, **fields)
+
+################################################################################
+# append_journal_record and load_journal
+################################################################################
+def test_journal_round_trip(tmp_path):
+    journal_file = str(tmp_path / 'journal.jsonl')
+    append_journal_record(journal_file, make_record(0.0))
+    append_journal_record(journal_file, make_record(2.0, cl=0.45))
+    journal = load_journal(journal_file)
+    assert sorted(journal) == [('2d_clean', 'naca0012', 0, 0, 0.0), ('2d_clean', 'naca0012', 0, 0, 2.0)]
+    assert journal[get_journal_key('2d_clean', 'naca0012', 0, 0, 2.0)] == make_record(2.0, cl=0.45)
+
+def test_latest_record_wins(tmp_path):
+    journal_file = str(tmp_path / 'journal.jsonl')
+    append_journal_record(journal_file, make_record(2.0, cl=float('nan'), fail_flag=1))
+    append_journal_record(journal_file, make_record(2.0, cl=0.45)) # Successful rerun
+    journal = load_journal(journal_file)
+    assert len(journal) == 1
+    assert journal[get_journal_key('2d_clean', 'naca0012', 0, 0, 2.0)]['fail_flag'] == 0
+
+def test_damaged_lines_ignored(tmp_path):
+    journal_file = str(tmp_path / 'journal.jsonl')
+    append_journal_record(journal_file, make_record(0.0))
+    with open(journal_file, 'a') as journal_handle:
+        journal_handle.write(json.dumps({'hierarchy': '2d_clean'}) + "\n") # Record without its key
+        journal_handle.write(json.dumps(make_record(2.0))[:20]) # Line cut short when the job was killed
+    assert list(load_journal(journal_file)) == [('2d_clean', 'naca0012', 0, 0, 0.0)]
+
+def test_missing_journal(tmp_path):
+    assert load_journal(str(tmp_path / 'journal.jsonl')) is None
+
+def test_journal_key():
+    assert get_journal_key('2d_clean', 'naca0012', '1', 2.0, '-2') == ('2d_clean', 'naca0012', 1, 2, -2.0)
+
+################################################################################
+# Replay of the journal by run_sim
+################################################################################
+def make_sim(tmp_path, aoa_list=(0.0, 2.0), **options):
+    """
+    Returns a `run_sim` of a single experimental set, with a mesh file that is never read by a solver.
+    """
+    from mdss.run_sim import run_sim
+    os.makedirs(tmp_path / 'grids', exist_ok=True)
+    with open(tmp_path / 'grids' / 'L0.cgns', 'w') as mesh_handle:
+        mesh_handle.write('mesh')
+    case_info = {
+        'name': 'naca0012',
+        'meshes_folder_path': str(tmp_path / 'grids'),
+        'mesh_files': ['L0.cgns'],
+        'geometry_info': {'chordRef': 1.0, 'areaRef': 1.0},
+        'solver_parameters': {},
+        'exp_sets': [{'aoa_list': list(aoa_list), 'Re': 1e6, 'mach': 0.3, 'Temp': 300.0}],
+    }
+    sim_info = dict({'out_dir': str(tmp_path / 'output'), 'hpc': 'no', 'run_as_subprocess': 'no', 'hierarchies': [{'name': '2d_clean', 'cases': [case_info]}]}, **options)
+    info_file = str(tmp_path / 'input.yaml')
+    write_yaml_file(info_file, sim_info)
+    return run_sim(info_file)
+
+def write_earlier_run(sim, aoa, cl=0.25, fail_flag=0):
+    """
+    Writes the `aoa_<aoa>.yaml` file of an earlier simulation with the current inputs, and returns its output directory.
+    """
+    hierarchy_info = sim.sim_info['hierarchies'][0]
+    case_info = hierarchy_info['cases'][0]
+    exp_info = case_info['exp_sets'][0]
+    aoa_out_dir = f"{sim.out_dir}/2d_clean/naca0012/exp_set_0/L0/aoa_{aoa}"
+    os.makedirs(aoa_out_dir, exist_ok=True)
+    aoa_out_dic = sim.build_aoa_out_dic(case_info, exp_info, 0, aoa, aoa_out_dir, cl=cl, cd=0.0125, wall_time=12.345, nproc=4, fail_flag=fail_flag,
+                                        input_hash=sim.get_input_hash(case_info, exp_info, 0, aoa), timings={'solve': {'max': 10.0, 'mean': 10.0, 'min': 10.0}})
+    write_yaml_file(f"{aoa_out_dir}/aoa_{aoa}.yaml", dict(aoa_out_dic, wall_time="12.35 sec"))
+    return aoa_out_dir
+
+def test_journal_seeded_from_earlier_run(tmp_path):
+    pytest.importorskip('mpi4py')
+    sim = make_sim(tmp_path)
+    aoa_out_dir = write_earlier_run(sim, 0.0)
+    sim.replay_journal()
+    record = load_journal(sim.journal_file)[get_journal_key('2d_clean', 'naca0012', 0, 0, 0.0)]
+    assert record['wall_time'] == 12.35 # In seconds, as rounded in the file
+    assert record['out_dir'] == aoa_out_dir
+    assert record['timings'] == {'solve': {'max': 10.0, 'mean': 10.0, 'min': 10.0}}
+    assert sim.journal == load_journal(sim.journal_file)
+
+def test_deleted_directory_is_run_again(tmp_path):
+    pytest.importorskip('mpi4py')
+    import shutil
+    sim = make_sim(tmp_path)
+    aoa_out_dir = write_earlier_run(sim, 0.0)
+    sim.replay_journal()
+    hierarchy_info = sim.sim_info['hierarchies'][0]
+    case_info = hierarchy_info['cases'][0]
+    assert sim.get_aoa_results(hierarchy_info, case_info, 0, 0, 0.0)['cl'] == 0.25
+    shutil.rmtree(aoa_out_dir)
+    assert sim.get_aoa_results(hierarchy_info, case_info, 0, 0, 0.0) is None
+
+def test_scan_does_not_replay(tmp_path):
+    pytest.importorskip('mpi4py')
+    sim = make_sim(tmp_path, resume='scan')
+    write_earlier_run(sim, 0.0)
+    sim.replay_journal()
+    assert sim.journal is None
+    assert not os.path.exists(sim.journal_file)
+
+def test_point_status(tmp_path):
+    pytest.importorskip('mpi4py')
+    sim = make_sim(tmp_path, aoa_list=(0.0, 2.0, 4.0))
+    write_earlier_run(sim, 0.0)
+    write_earlier_run(sim, 2.0, cl=float('nan'), fail_flag=1)
+    sim.replay_journal()
+    hierarchy_info = sim.sim_info['hierarchies'][0]
+    case_info = hierarchy_info['cases'][0]
+    exp_info = case_info['exp_sets'][0]
+    get_status = lambda aoa, input_hash: sim.get_point_status(hierarchy_info, case_info, 0, 0, aoa, input_hash)
+    assert get_status(0.0, sim.get_input_hash(case_info, exp_info, 0, 0.0)) == 'reused'
+    assert get_status(0.0, 'changed') == 'stale'
+    assert get_status(2.0, sim.get_input_hash(case_info, exp_info, 0, 2.0)) == 'new' # Failed without a retry ladder
+    assert get_status(4.0, sim.get_input_hash(case_info, exp_info, 0, 4.0)) == 'new'
+
+def test_run_problem_replays_journal(tmp_path):
+    pytest.importorskip('mpi4py')
+    sim = make_sim(tmp_path)
+    for aoa, cl in [(0.0, 0.0), (2.0, 0.25)]:
+        write_earlier_run(sim, aoa, cl=cl)
+    sim.run_problem() # Every simulation is reused, so no solver is set up
+    with open(sim.final_out_file, 'r') as out_handle:
+        level_info = yaml.safe_load(out_handle)['hierarchies'][0]['cases'][0]['exp_sets'][0]['sim_info']['L0']
+    assert level_info['aoa_2.0'] == {'cl': 0.25, 'cd': 0.0125, 'wall_time': "12.35 sec", 'fail_flag': 0, 'out_dir': f"{sim.out_dir}/2d_clean/naca0012/exp_set_0/L0/aoa_2.0"}
+    assert level_info['timings']['solve']['wall_time'] > 0.0
+    assert len(load_journal(sim.journal_file)) == 2
+
+@pytest.mark.parametrize('resume', ['journal', 'scan'])
+def test_timing_rollups(tmp_path, resume):
+    pytest.importorskip('mpi4py')
+    sim = make_sim(tmp_path, aoa_list=(0.0, 2.0, 4.0), resume=resume)
+    aoa_out_dirs = {aoa: write_earlier_run(sim, aoa) for aoa in (0.0, 2.0)}
+    results = {(0, 0, 0): {'L0': {f"aoa_{aoa}": read_aoa_results(f"{aoa_out_dir}/aoa_{aoa}.yaml", aoa_out_dir) for aoa, aoa_out_dir in aoa_out_dirs.items()}}}
+    results[(0, 0, 0)]['L0']['aoa_4.0'] = {'cl': 0.5, 'cd': 0.0125, 'wall_time': "0.00 sec", 'fail_flag': 0, 'out_dir': None} # Taken from the cache
+    sim.replay_journal()
+    level_timings, case_timings, series_timings = sim.get_timing_rollups(results)
+    assert level_timings[(0, 0, 0, 'L0')]['solve'] == {'wall_time': 20.0, 'core_sec': 80.0}
+    assert case_timings[(0, 0)] == series_timings == level_timings[(0, 0, 0, 'L0')]
+
+################################################################################
+# Inputs of the earlier simulations
+################################################################################
+def test_input_hash(tmp_path):
+    pytest.importorskip('mpi4py')
+    sim = make_sim(tmp_path)
+    case_info = sim.sim_info['hierarchies'][0]['cases'][0]
+    exp_info = case_info['exp_sets'][0]
+    input_hash = sim.get_input_hash(case_info, exp_info, 0, 2.0)
+    assert sim.get_input_hash(case_info, dict(exp_info), 0, 2.0) == input_hash
+    assert sim.get_input_hash(case_info, exp_info, 0, 4.0) != input_hash
+    assert sim.get_input_hash(case_info, dict(exp_info, mach=0.15), 0, 2.0) != input_hash
+    assert sim.get_input_hash(dict(case_info, solver_parameters={'nCycles': 100}), exp_info, 0, 2.0) != input_hash
+    with open(tmp_path / 'grids' / 'L0.cgns', 'w') as mesh_handle:
+        mesh_handle.write('refined mesh')
+    assert sim.get_input_hash(case_info, exp_info, 0, 2.0) != input_hash
+    assert sim.get_input_hash(dict(case_info, mesh_files=['missing.cgns']), exp_info, 0, 2.0) is None
+
+@pytest.mark.parametrize('resume', ['journal', 'scan'])
+def test_stale_point(tmp_path, resume):
+    pytest.importorskip('mpi4py')
+    sim = make_sim(tmp_path, resume=resume)
+    write_earlier_run(sim, 0.0)
+    sim.replay_journal()
+    hierarchy_info = sim.sim_info['hierarchies'][0]
+    case_info = hierarchy_info['cases'][0]
+    changed_case_info = dict(case_info, solver_parameters={'nCycles': 100})
+    input_hash = sim.get_input_hash(changed_case_info, case_info['exp_sets'][0], 0, 0.0)
+    assert sim.get_point_status(hierarchy_info, case_info, 0, 0, 0.0, input_hash) == 'stale'
+
+def test_point_without_input_hash_is_reused(tmp_path):
+    pytest.importorskip('mpi4py')
+    sim = make_sim(tmp_path, resume='scan')
+    aoa_out_dir = write_earlier_run(sim, 0.0)
+    with open(f"{aoa_out_dir}/aoa_0.0.yaml", 'r') as aoa_handle:
+        aoa_sim_info = yaml.safe_load(aoa_handle)
+    del aoa_sim_info['input_hash'] # Simulated before the inputs were recorded
+    write_yaml_file(f"{aoa_out_dir}/aoa_0.0.yaml", aoa_sim_info)
+    hierarchy_info = sim.sim_info['hierarchies'][0]
+    case_info = hierarchy_info['cases'][0]
+    assert sim.get_point_status(hierarchy_info, case_info, 0, 0, 0.0, 'changed') == 'reused'
+
+def test_exhausted_point(tmp_path):
+    pytest.importorskip('mpi4py')
+    sim = make_sim(tmp_path, resume='scan')
+    hierarchy_info = sim.sim_info['hierarchies'][0]
+    case_info = hierarchy_info['cases'][0]
+    case_info['retry_ladder'] = [{'CFL': 0.5}]
+    input_hash = sim.get_input_hash(case_info, case_info['exp_sets'][0], 0, 0.0)
+    aoa_out_dir = write_earlier_run(sim, 0.0, cl=float('nan'), fail_flag=1)
+    with open(f"{aoa_out_dir}/aoa_0.0.yaml", 'r') as aoa_handle:
+        aoa_sim_info = yaml.safe_load(aoa_handle)
+    for attempts, status in [([0], 'new'), ([0, 1], 'exhausted')]: # Failed on the first rung, then on every rung
+        aoa_sim_info['attempts'] = [{'rung': rung, 'fail_flag': 1, 'wall_time': 10.0, 'core_sec': 40.0} for rung in attempts]
+        write_yaml_file(f"{aoa_out_dir}/aoa_0.0.yaml", aoa_sim_info)
+        assert sim.get_point_status(hierarchy_info, case_info, 0, 0, 0.0, input_hash) == status
+    sim.sim_info['retry_failed'] = 'yes'
+    assert sim.get_point_status(hierarchy_info, case_info, 0, 0, 0.0, input_hash) == 'new'
@@ -0,0 +1,90 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from mdss.output_writer import OutputWriter, write_file_atomic, write_yaml_file
+
+class RankComm():
+    """
+    Stands for a communicator of several ranks, seen from one of them.
+    """
+    def __init__(self, rank, size):
+        self.rank = rank
+        self.size = size
+
+################################################################################
+# write_file_atomic
+################################################################################
+def test_atomic_write(tmp_path):
+    file_path = str(tmp_path / 'aoa_2.0.yaml')
+    write_file_atomic(file_path, "cl: 0.25\n")
+    write_file_atomic(file_path, "cl: 0.5\n") # Replaces the earlier file
+    with open(file_path, 'r') as file_handle:
+        assert file_handle.read() == "cl: 0.5\n"
+    assert os.listdir(tmp_path) == ['aoa_2.0.yaml'] # No temporary file is left
+
+def test_failed_write_keeps_earlier_file(tmp_path):
+    file_path = str(tmp_path / 'history.npz')
+    write_file_atomic(file_path, b'earlier')
+    with pytest.raises(TypeError):
+        write_file_atomic(file_path, 3.0) # Not text or bytes
+    with open(file_path, 'rb') as file_handle:
+        assert file_handle.read() == b'earlier'
+    assert os.listdir(tmp_path) == ['history.npz']
+
+def test_yaml_key_order(tmp_path):
+    file_path = str(tmp_path / 'aoa_2.0.yaml')
+    write_yaml_file(file_path, {'case': 'naca0012', 'AOA': 2.0, 'cl': 0.25})
+    with open(file_path, 'r') as file_handle:
+        assert [line.split(':')[0] for line in file_handle] == ['case', 'AOA', 'cl']
+
+################################################################################
+# OutputWriter
+################################################################################
+def test_writes_after_flush(tmp_path):
+    writer = OutputWriter()
+    data = {'cl': 0.25, 'timings': {'solve': 1.0}}
+    writer.write_yaml(str(tmp_path / 'aoa_2.0.yaml'), data)
+    writer.write_csv(str(tmp_path / 'ADflow_output.csv'), pd.DataFrame({'Alpha': [2.0], 'CL': [0.25]}), index=False)
+    writer.write_npz(str(tmp_path / 'history.npz'), {'totalRes': np.array([1.0, 0.1])})
+    data['cl'] = 0.5 # Changed after it was queued
+    writer.flush()
+    with open(tmp_path / 'aoa_2.0.yaml', 'r') as file_handle:
+        assert yaml.safe_load(file_handle) == {'cl': 0.25, 'timings': {'solve': 1.0}}
+    assert pd.read_csv(tmp_path / 'ADflow_output.csv')['CL'].tolist() == [0.25]
+    assert np.load(tmp_path / 'history.npz')['totalRes'].tolist() == [1.0, 0.1]
+
+def test_written_in_background(tmp_path):
+    writer = OutputWriter()
+    writer.write(str(tmp_path / 'out.txt'), "text")
+    writer.flush()
+    assert writer.thread is not threading.current_thread() and writer.thread.daemon
+    writer.write(str(tmp_path / 'out.txt'), "more text") # The same thread is kept
+    thread = writer.thread
+    writer.flush()
+    assert writer.thread is thread
+
+@pytest.mark.parametrize('writer_rank, rank, size, written', [
+    (0, 0, 4, True),
+    (0, 3, 4, False),
+    (2, 2, 4, True),
+    (5, 1, 4, True), # The writer rank wraps around smaller communicators
+])
+def test_writer_rank(tmp_path, writer_rank, rank, size, written):
+    writer = OutputWriter(writer_rank)
+    writer.write(str(tmp_path / 'out.txt'), "text", RankComm(rank, size))
+    writer.flush()
+    assert os.path.exists(tmp_path / 'out.txt') == written
+
+def test_flush_raises_write_error(tmp_path):
+    writer = OutputWriter()
+    writer.write(str(tmp_path / 'missing' / 'out.txt'), "text") # The directory does not exist
+    writer.write(str(tmp_path / 'out.txt'), "text")
+    with pytest.raises(FileNotFoundError):
+        writer.flush()
+    assert os.path.exists(tmp_path / 'out.txt') # The other files are still written
+    writer.flush() # The error is only raised once
@@ -0,0 +1,56 @@
+import os
+import json
+import time
+
+from mdss.result_cache import ResultCache
+
+def make_aoa_dir(aoa_dir, size=100):
+    os.makedirs(aoa_dir, exist_ok=True)
+    with open(f"{aoa_dir}/naca0012_vol.cgns", 'w') as file_handle:
+        file_handle.write('x' * size)
+    return str(aoa_dir)
+
+def test_store_and_lookup(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    cache.store('ab12', {'cl': 0.25, 'cd': 0.0125}, make_aoa_dir(tmp_path / 'aoa_2.0'))
+    assert cache.lookup('ab12', str(tmp_path / 'copy')) == {'cl': 0.25, 'cd': 0.0125}
+    assert os.listdir(tmp_path / 'copy') == ['naca0012_vol.cgns']
+    with open(cache.index_file, 'r') as index_handle:
+        assert 'pins' not in json.load(index_handle)['ab12'] # Released after the copy
+
+def test_miss_leaves_index_unchanged(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    cache.store('ab12', {'cl': 0.25}, make_aoa_dir(tmp_path / 'aoa_2.0'))
+    index_time = os.stat(cache.index_file).st_mtime_ns
+    time.sleep(0.01)
+    assert cache.lookup('cd34', str(tmp_path / 'copy')) is None
+    assert os.stat(cache.index_file).st_mtime_ns == index_time
+
+def test_entry_removed_by_hand(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    cache.store('ab12', {'cl': 0.25}, make_aoa_dir(tmp_path / 'aoa_2.0'))
+    os.remove(f"{cache.get_entry_dir('ab12')}/result.json")
+    assert cache.lookup('ab12', str(tmp_path / 'copy')) is None
+    with open(cache.index_file, 'r') as index_handle:
+        assert json.load(index_handle) == {}
+
+def test_pinned_entry_is_not_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), quota=1e-9) # Smaller than any entry
+    aoa_dir = make_aoa_dir(tmp_path / 'aoa_2.0')
+    cache.store('ab12', {'cl': 0.25}, aoa_dir)
+    with cache.locked_index() as index: # As held by a simulation copying its files
+        index['ab12']['pins'] = {'reader': time.time()}
+    cache.store('cd34', {'cl': 0.5}, aoa_dir)
+    with open(cache.index_file, 'r') as index_handle:
+        assert sorted(json.load(index_handle)) == ['ab12', 'cd34']
+    assert os.path.isdir(cache.get_entry_dir('ab12'))
+
+def test_stale_pin_is_ignored(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), quota=1e-9)
+    aoa_dir = make_aoa_dir(tmp_path / 'aoa_2.0')
+    cache.store('ab12', {'cl': 0.25}, aoa_dir)
+    with cache.locked_index() as index: # Left by a reader that was killed
+        index['ab12']['pins'] = {'reader': 0.0}
+    cache.store('cd34', {'cl': 0.5}, aoa_dir)
+    with open(cache.index_file, 'r') as index_handle:
+        assert sorted(json.load(index_handle)) == ['cd34']
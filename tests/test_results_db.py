@@ -0,0 +1,62 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from mdss.results_db import result_columns, store_results, query_results, export_csv
+
+def make_result(alpha, cl, case_name='naca0012', level=0, mach=0.3, **columns):
+    return dict({'hierarchy': '2d_clean', 'case_name': case_name, 'exp_set': 0, 'level': level, 'alpha': alpha, 'mach': mach, 'Re': 1e6, 'Temp': 300.0, 'cl': cl, 'cd': 0.0125, 'wall_time': 12.345678, 'nproc': 4, 'fail_flag': 0}, **columns)
+
+################################################################################
+# store_results and query_results
+################################################################################
+def test_store_and_query(tmp_path):
+    db_file = str(tmp_path / 'results.db')
+    store_results(db_file, [make_result(2.0, 0.25), make_result(0.0, 0.0), make_result(2.0, 0.24, level=1)])
+    df = query_results(db_file)
+    assert list(df.columns) == result_columns
+    assert list(zip(df['level'], df['alpha'])) == [(0, 0.0), (0, 2.0), (1, 2.0)] # Sorted by refinement level and angle of attack
+    assert df['wall_time'][0] == 12.345678 # Full precision
+    assert df['out_dir'].isna().all() # Missing columns are stored as NULL
+    assert df['updated'].notna().all()
+
+def test_rerun_replaces_result(tmp_path):
+    db_file = str(tmp_path / 'results.db')
+    store_results(db_file, [make_result(2.0, float('nan'), fail_flag=1)])
+    store_results(db_file, [make_result(2.0, 0.25)])
+    df = query_results(db_file)
+    assert len(df) == 1
+    assert (df['cl'][0], df['fail_flag'][0]) == (0.25, 0)
+
+def test_query_filters(tmp_path):
+    db_file = str(tmp_path / 'results.db')
+    store_results(db_file, [make_result(0.0, 0.0), make_result(2.0, 0.25, mach=0.15), make_result(2.0, 0.3, case_name='30p-30n'), make_result(4.0, 0.5, level=1)])
+    assert list(query_results(db_file, case_name='naca0012', level=0)['alpha']) == [0.0, 2.0]
+    assert list(query_results(db_file, mach=0.15)['cl']) == [0.25]
+    assert list(query_results(db_file, alpha=[2.0, 4.0], case_name='naca0012')['alpha']) == [2.0, 4.0] # Any of the values
+    assert query_results(db_file, case_name='missing').empty
+
+def test_query_unknown_column(tmp_path):
+    with pytest.raises(ValueError):
+        query_results(str(tmp_path / 'results.db'), aoa=2.0)
+
+def test_indexes(tmp_path):
+    db_file = str(tmp_path / 'results.db')
+    store_results(db_file, [make_result(0.0, 0.0)])
+    with sqlite3.connect(db_file) as connection:
+        indexes = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'results_%'")]
+    assert sorted(indexes) == ['results_Re', 'results_alpha', 'results_case', 'results_mach']
+
+################################################################################
+# export_csv
+################################################################################
+def test_export_csv(tmp_path):
+    db_file = str(tmp_path / 'results.db')
+    store_results(db_file, [make_result(0.0, 0.1 + 0.2), make_result(2.0, 0.25, level=1)])
+    csv_file = str(tmp_path / 'results.csv')
+    export_csv(db_file, csv_file, level=0)
+    df = pd.read_csv(csv_file, float_precision='round_trip')
+    assert list(df.columns) == result_columns
+    assert len(df) == 1
+    assert df['cl'][0] == 0.1 + 0.2 # Written with full precision
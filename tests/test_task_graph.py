@@ -0,0 +1,148 @@
+import pytest
+
+from mdss.task_graph import TaskGraph, build_task_graph, pack_tasks
+
+def get_sim_info(aoa_list=(0.0, 2.0, -2.0), mesh_files=('L0.cgns', 'L1.cgns'), **options):
+    """
+    Returns the information of an input YAML file with a single experimental set.
+    """
+    case_info = {'name': 'naca0012', 'mesh_files': list(mesh_files), 'exp_sets': [{'aoa_list': list(aoa_list)}]}
+    return dict({'hierarchies': [{'name': '2d_clean', 'cases': [case_info]}]}, **options)
+
+def get_deps(graph):
+    return {task.name.split('exp_set_0/')[1]: sorted(dep.split('exp_set_0/')[1] for dep in task.deps) for task in graph.get_tasks('solve')}
+
+def make_chain(graph, names, cost=1.0):
+    """
+    Adds solve tasks to the graph, each one depending on the previous one.
+    """
+    for index, name in enumerate(names):
+        graph.add_task(name, 'solve', {}, [names[index - 1]] if index > 0 else [], cost)
+
+################################################################################
+# build_task_graph
+################################################################################
+def test_independent_tasks():
+    graph = build_task_graph(get_sim_info())
+    assert get_deps(graph) == {f"L{ii}/aoa_{aoa}": [] for ii in (0, 1) for aoa in (0.0, 2.0, -2.0)}
+    assert [task.name for task in graph.get_tasks('level_csv')] == ['2d_clean/naca0012/exp_set_0/L0/csv', '2d_clean/naca0012/exp_set_0/L1/csv']
+    summary = graph.get_tasks('exp_set_summary')[0]
+    assert summary.deps == ['2d_clean/naca0012/exp_set_0/L0/csv', '2d_clean/naca0012/exp_set_0/L1/csv']
+    assert len(graph.get_waves('solve')) == 1
+
+def test_warm_start_edges():
+    graph = build_task_graph(get_sim_info(aoa_list=(4.0, -2.0, 2.0, 0.0), mesh_files=('L0.cgns',), warm_start='yes'))
+    assert get_deps(graph) == {
+        'L0/aoa_0.0': [],
+        'L0/aoa_2.0': ['L0/aoa_0.0'],
+        'L0/aoa_4.0': ['L0/aoa_2.0'],
+        'L0/aoa_-2.0': ['L0/aoa_0.0'],
+    }
+    assert [[task.info['aoa_list'][0] for task in wave] for wave in graph.get_waves('solve')] == [[0.0], [2.0, -2.0], [4.0]]
+
+def test_mesh_sequencing_edges():
+    graph = build_task_graph(get_sim_info(aoa_list=(0.0, 2.0), mesh_files=('L0.cgns', 'L1.cgns', 'L2.cgns'), mesh_sequencing='yes'))
+    assert get_deps(graph) == {
+        'L2/aoa_0.0': [], 'L2/aoa_2.0': [],
+        'L1/aoa_0.0': ['L2/aoa_0.0'], 'L1/aoa_2.0': ['L2/aoa_2.0'],
+        'L0/aoa_0.0': ['L1/aoa_0.0'], 'L0/aoa_2.0': ['L1/aoa_2.0'],
+    }
+    assert [[task.info['level_indices'][0] for task in wave] for wave in graph.get_waves('solve')] == [[2, 2], [1, 1], [0, 0]]
+
+def test_warm_start_and_mesh_sequencing_edges():
+    graph = build_task_graph(get_sim_info(aoa_list=(0.0, 2.0), warm_start='yes', mesh_sequencing='yes'))
+    assert get_deps(graph) == {
+        'L1/aoa_0.0': [], 'L1/aoa_2.0': ['L1/aoa_0.0'],
+        'L0/aoa_0.0': ['L1/aoa_0.0'], 'L0/aoa_2.0': ['L0/aoa_0.0', 'L1/aoa_2.0'],
+    }
+
+def test_reuse_problem():
+    graph = build_task_graph(get_sim_info(reuse_problem='yes', mesh_sequencing='yes'), get_cost=lambda hierarchy, case, exp_set, ii, aoa: 10.0 ** ii)
+    assert get_deps(graph) == {'L1': [], 'L0': ['L1']}
+    assert [task.cost for task in graph.get_tasks('solve')] == [30.0, 3.0]
+    assert graph.get_tasks('solve')[0].info['aoa_list'] == [0.0, 2.0, -2.0]
+
+def test_levels():
+    graph = build_task_graph(get_sim_info(mesh_files=('L0.cgns', 'L1.cgns', 'L2.cgns'), levels=[0, 2], mesh_sequencing='yes'))
+    assert sorted(set(task.info['level_indices'][0] for task in graph.get_tasks('solve'))) == [0, 2]
+    assert all(deps == [] for deps in get_deps(graph).values()) # The skipped level breaks the sequencing
+
+def test_unknown_dependency():
+    graph = TaskGraph()
+    with pytest.raises(ValueError):
+        graph.add_task('b', 'solve', {}, ['a'])
+
+################################################################################
+# TaskGraph waves, ready tasks and critical path
+################################################################################
+def test_waves_and_critical_path():
+    graph = TaskGraph()
+    make_chain(graph, ['a1', 'a2', 'a3'], cost=1.0)
+    make_chain(graph, ['b1', 'b2'], cost=5.0)
+    graph.add_task('c', 'solve', {}, ['a3', 'b2'], 2.0)
+    assert [[task.name for task in wave] for wave in graph.get_waves()] == [['a1', 'b1'], ['a2', 'b2'], ['a3'], ['c']]
+    path, cost = graph.get_critical_path()
+    assert [task.name for task in path] == ['b1', 'b2', 'c']
+    assert cost == 12.0
+
+def test_empty_critical_path():
+    assert TaskGraph().get_critical_path() == ([], 0.0)
+    assert TaskGraph().get_waves() == []
+
+def test_ready_tasks():
+    graph = TaskGraph()
+    make_chain(graph, ['a1', 'a2'])
+    graph.add_task('b1', 'solve', {})
+    assert [task.name for task in graph.get_ready_tasks('solve')] == ['a1', 'b1']
+    graph.mark_started('a1')
+    assert [task.name for task in graph.get_ready_tasks('solve')] == ['b1']
+    graph.mark_done('a1')
+    assert [task.name for task in graph.get_ready_tasks('solve')] == ['a2', 'b1']
+    assert not graph.is_done('solve')
+
+################################################################################
+# pack_tasks
+################################################################################
+def get_job_names(jobs):
+    return [[task.name for task in job['tasks']] for job in jobs]
+
+def test_pack_first_fit_decreasing():
+    graph = TaskGraph()
+    for name, cost in [('a', 2.0), ('b', 5.0), ('c', 4.0), ('d', 3.0), ('e', 1.0)]:
+        graph.add_task(name, 'solve', {}, [], cost)
+    jobs = pack_tasks(graph, 6.0)
+    assert get_job_names(jobs) == [['b', 'e'], ['c', 'a'], ['d']]
+    assert [job['cost'] for job in jobs] == [6.0, 6.0, 3.0]
+    assert all(job['deps'] == [] for job in jobs)
+
+def test_pack_keeps_dependent_tasks_together():
+    graph = TaskGraph()
+    make_chain(graph, ['a1', 'a2'], cost=2.0)
+    graph.add_task('b', 'solve', {}, [], 3.0)
+    graph.add_task('c', 'solve', {}, ['a2', 'b'], 1.0) # Joins the two groups
+    graph.add_task('d', 'solve', {}, [], 2.0)
+    jobs = pack_tasks(graph, 10.0)
+    assert get_job_names(jobs) == [['a1', 'a2', 'b', 'c', 'd']]
+
+def test_pack_chains_oversize_group():
+    graph = TaskGraph()
+    make_chain(graph, ['a1', 'a2', 'a3', 'a4', 'a5'], cost=2.0)
+    graph.add_task('b', 'solve', {}, [], 1.0)
+    jobs = pack_tasks(graph, 4.0)
+    assert get_job_names(jobs) == [['a1', 'a2'], ['a3', 'a4'], ['a5'], ['b']]
+    assert [job['deps'] for job in jobs] == [[], [0], [1], []]
+    assert [job['cost'] for job in jobs] == [4.0, 4.0, 2.0, 1.0]
+
+def test_pack_task_over_capacity():
+    graph = TaskGraph()
+    make_chain(graph, ['a1', 'a2', 'a3'], cost=1.0)
+    graph.tasks['a2'].cost = 8.0
+    jobs = pack_tasks(graph, 4.0)
+    assert get_job_names(jobs) == [['a1'], ['a2'], ['a3']]
+    assert [job['deps'] for job in jobs] == [[], [0], [1]]
+
+def test_pack_skips_done_tasks():
+    graph = TaskGraph()
+    make_chain(graph, ['a1', 'a2', 'a3'], cost=3.0)
+    graph.mark_done('a1')
+    assert get_job_names(pack_tasks(graph, 6.0)) == [['a2', 'a3']]
@@ -0,0 +1,48 @@
+import json
+
+from mdss.tracing import Tracer
+
+def read_trace(trace_file):
+    with open(trace_file, 'r') as trace_handle:
+        return json.loads(trace_handle.read().rstrip().rstrip(',') + "]") # The array is left open
+
+def test_disabled():
+    tracer = Tracer()
+    tracer.complete('solve', 0.0, 1.0)
+    tracer.flush()
+    assert tracer.events == []
+
+def test_processes_get_their_own_tracks(tmp_path):
+    trace_file = str(tmp_path / 'trace.json')
+    tracers = [Tracer(trace_file, process_name=f"mdss rank {rank}") for rank in range(2)] # As ranks sharing a process id on different nodes
+    for rank, tracer in enumerate(tracers):
+        with tracer.span('solve', category='solve', aoa=float(rank)):
+            pass
+        tracer.flush()
+    events = read_trace(trace_file)
+    names = {event['pid']: event['args']['name'] for event in events if event['name'] == 'process_name'}
+    assert sorted(names.values()) == ['mdss rank 0', 'mdss rank 1']
+    solves = [event for event in events if event['name'] == 'solve']
+    assert [names[event['pid']] for event in solves] == ['mdss rank 0', 'mdss rank 1']
+    assert [event['args']['aoa'] for event in solves] == [0.0, 1.0]
+
+def test_same_name_same_track(tmp_path):
+    trace_file = str(tmp_path / 'trace.json')
+    for _ in range(2): # As two runs in the same output directory
+        tracer = Tracer(trace_file, process_name='mdss rank 0')
+        tracer.complete('solve', 0.0, 2.0, category='solve')
+        tracer.flush()
+    solves = [event for event in read_trace(trace_file) if event['name'] == 'solve']
+    assert solves[0]['pid'] == solves[1]['pid']
+    assert solves[0]['dur'] == 2000000
+
+def test_renamed_process(tmp_path):
+    trace_file = str(tmp_path / 'trace.json')
+    tracer = Tracer(trace_file, process_name='mdss rank 0')
+    tracer.complete('spawn', 0.0, 1.0, category='spawn')
+    tracer.process_name = 'worker 1 rank 0' # Renamed once the worker knows its group
+    tracer.name_track(1, 'subprocess')
+    tracer.flush()
+    events = read_trace(trace_file)
+    assert len(set(event['pid'] for event in events)) == 1
+    assert [event['args']['name'] for event in events if event['ph'] == 'M'] == ['worker 1 rank 0', 'subprocess']
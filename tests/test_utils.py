@@ -0,0 +1,209 @@
+import os
+
+import numpy as np
+import pytest
+import yaml
+
+from mdss.utils import get_sim_data, sim_data_columns, get_convergence_histories
+from mdss.results_db import store_results
+from mdss.output_writer import write_yaml_file
+
+def write_input_file(tmp_path, aoa_list=(0.0, 2.0), mesh_files=('L0.cgns', 'L1.cgns'), **options):
+    """
+    Writes an input YAML file of a single experimental set, with mesh files that are never read by a solver, and returns its path.
+    """
+    os.makedirs(tmp_path / 'grids', exist_ok=True)
+    for mesh_file in mesh_files:
+        with open(tmp_path / 'grids' / mesh_file, 'w') as mesh_handle:
+            mesh_handle.write(mesh_file)
+    case_info = {
+        'name': 'naca0012',
+        'meshes_folder_path': str(tmp_path / 'grids'),
+        'mesh_files': list(mesh_files),
+        'geometry_info': {'chordRef': 1.0, 'areaRef': 1.0},
+        'solver_parameters': {},
+        'exp_sets': [{'aoa_list': list(aoa_list), 'Re': 1e6, 'mach': 0.3, 'Temp': 300.0, 'exp_data': str(tmp_path / 'exp_data.csv')}],
+    }
+    info_file = str(tmp_path / 'input.yaml')
+    write_yaml_file(info_file, dict({'out_dir': str(tmp_path / 'output'), 'hpc': 'no', 'run_as_subprocess': 'no', 'hierarchies': [{'name': '2d_clean', 'cases': [case_info]}]}, **options))
+    return info_file
+
+def store_earlier_results(tmp_path, results):
+    """
+    Stores results of `(level, alpha, cl)` in the results database of the output directory, as written by an earlier run.
+    """
+    os.makedirs(tmp_path / 'output', exist_ok=True)
+    store_results(str(tmp_path / 'output' / 'results.db'), [{'hierarchy': '2d_clean', 'case_name': 'naca0012', 'exp_set': 0, 'level': level, 'alpha': alpha, 'cl': cl, 'cd': cl / 20, 'wall_time': 12.5, 'fail_flag': 0} for level, alpha, cl in results])
+
+################################################################################
+# get_sim_data
+################################################################################
+def test_sim_data_dict(tmp_path):
+    pytest.importorskip('mpi4py') # The input file is read on the root rank
+    info_file = write_input_file(tmp_path)
+    store_earlier_results(tmp_path, [(0, 0.0, 0.0), (0, 2.0, 0.25), (1, 0.0, 0.01)])
+    sim_data = get_sim_data(info_file)
+    assert sim_data['2d_clean']['naca0012']['exp_set_0']['L0'] == {'aoa_0.0': {'cl': 0.0, 'cd': 0.0}, 'aoa_2.0': {'cl': 0.25, 'cd': 0.0125}}
+    assert sim_data['2d_clean']['naca0012']['exp_set_0']['L1']['aoa_2.0'] == {'cl': None, 'cd': None} # Not simulated
+
+def test_sim_data_dataframe(tmp_path):
+    pytest.importorskip('mpi4py')
+    info_file = write_input_file(tmp_path)
+    store_earlier_results(tmp_path, [(0, 0.0, 0.0), (0, 2.0, 0.25), (1, 0.0, 0.01)])
+    df = get_sim_data(info_file, output_format='dataframe')
+    assert list(df.index.names) == sim_data_columns[:5]
+    assert list(df.columns) == sim_data_columns[5:]
+    assert df.loc[('2d_clean', 'naca0012', 0, 0, 2.0), 'cl'] == 0.25
+    assert df.loc[('2d_clean', 'naca0012', 0, 0, 2.0), 'wall_time'] == 12.5
+    assert np.isnan(df.loc[('2d_clean', 'naca0012', 0, 1, 2.0), 'cl']) # Not simulated
+    assert df.xs(0, level='level')['cl'].tolist() == [0.0, 0.25]
+
+def test_sim_data_arrays(tmp_path):
+    pytest.importorskip('mpi4py')
+    info_file = write_input_file(tmp_path)
+    store_earlier_results(tmp_path, [(0, 0.0, 0.0), (0, 2.0, 0.25)])
+    arrays = get_sim_data(info_file, output_format='arrays')
+    assert sorted(arrays) == sorted(sim_data_columns)
+    assert arrays['level'].tolist() == [0, 0, 1, 1]
+    assert arrays['alpha'].tolist() == [0.0, 2.0, 0.0, 2.0]
+    assert arrays['cl'][:2].tolist() == [0.0, 0.25]
+    assert np.isnan(arrays['fail_flag'][2:]).all()
+
+def test_sim_data_from_overall_sim_info(tmp_path):
+    pytest.importorskip('mpi4py')
+    info_file = write_input_file(tmp_path, mesh_files=('L0.cgns',))
+    with open(info_file, 'r') as info_handle:
+        sim_info = yaml.safe_load(info_handle)
+    sim_info['hierarchies'][0]['cases'][0]['exp_sets'][0]['sim_info'] = {'L0': {
+        'aoa_0.0': {'cl': 0.0, 'cd': 0.01, 'wall_time': "10.00 sec", 'fail_flag': 0},
+        'aoa_2.0': {'cl': 0.25, 'cd': 0.0125, 'wall_time': "12.50 sec", 'fail_flag': 0},
+    }}
+    os.makedirs(tmp_path / 'output')
+    write_yaml_file(str(tmp_path / 'output' / 'overall_sim_info.yaml'), sim_info) # Written without a results database
+    df = get_sim_data(info_file, output_format='dataframe')
+    assert df['cl'].tolist() == [0.0, 0.25]
+    assert df['wall_time'].tolist() == [10.0, 12.5]
+
+def test_sim_data_skip(tmp_path):
+    pytest.importorskip('mpi4py')
+    info_file = write_input_file(tmp_path)
+    assert get_sim_data(info_file) == {}
+    arrays = get_sim_data(info_file, output_format='arrays')
+    assert all(len(arrays[column]) == 0 for column in sim_data_columns)
+    assert not os.path.exists(tmp_path / 'output' / 'overall_sim_info.yaml') # Nothing is run
+
+def test_sim_data_format(tmp_path):
+    with pytest.raises(ValueError):
+        get_sim_data(write_input_file(tmp_path), output_format='csv')
+
+################################################################################
+# SimResults
+################################################################################
+def write_simulation(sim, level, aoa, cl):
+    """
+    Writes the results of a successful simulation with the current inputs, as `run_exp_set()` does once it is completed.
+    """
+    import mdss.run_sim
+    hierarchy_info = sim.sim_info['hierarchies'][0]
+    case_info = hierarchy_info['cases'][0]
+    exp_info = case_info['exp_sets'][0]
+    aoa_out_dir = f"{sim.out_dir}/2d_clean/naca0012/exp_set_0/L{level}/aoa_{aoa}"
+    os.makedirs(aoa_out_dir, exist_ok=True)
+    aoa_out_dic = sim.build_aoa_out_dic(case_info, exp_info, level, aoa, aoa_out_dir, cl=cl, cd=cl / 20, wall_time=12.5, nproc=1, fail_flag=0, input_hash=sim.get_input_hash(case_info, exp_info, level, aoa))
+    sim.write_aoa_results(hierarchy_info, case_info, 0, level, aoa, aoa_out_dic, mdss.run_sim.comm)
+    sim.writer.flush()
+
+@pytest.fixture
+def sim_results(tmp_path):
+    """
+    Returns `SimResults` of a series in which only the angle of attack 0.0 of the finest level was simulated, and records the simulations it runs instead of running them.
+    """
+    pytest.importorskip('mpi4py')
+    from mdss.run_sim import run_sim
+    from mdss.utils import SimResults
+    info_file = write_input_file(tmp_path)
+    earlier_sim = run_sim(info_file)
+    earlier_sim.replay_journal()
+    write_simulation(earlier_sim, 0, 0.0, 0.0)
+    sim_results = SimResults(info_file)
+    sim_results.runs = []
+    def run_exp_set(hierarchy_info, case_info, exp_set, exp_info, comm=None, level_indices=None, aoa_list=None):
+        sim_results.runs.append((level_indices, list(aoa_list)))
+        for aoa in aoa_list:
+            write_simulation(sim_results.sim, level_indices[0], aoa, 0.1 * float(aoa))
+    sim_results.sim.run_exp_set = run_exp_set
+    return sim_results
+
+def test_results_existing_point(sim_results):
+    assert sim_results.get('naca0012', 0, 0, 0.0)['cl'] == 0.0
+    assert sim_results.runs == []
+
+def test_results_missing_points_run_together(sim_results, tmp_path):
+    from mdss.results_db import query_results
+    points = [('naca0012', 0, 0, 0.0), ('naca0012', 0, 0, 2.0), ('naca0012', 0, 1, 2.0), ('naca0012', 0, 0, 3.0)] # 3.0 is not in 'aoa_list'
+    assert [result['cl'] for result in sim_results.get_many(points)] == pytest.approx([0.0, 0.2, 0.2, 0.3])
+    assert sim_results.runs == [([0], [2.0, 3.0]), ([1], [2.0])] # Gathered by refinement level
+    df = query_results(str(tmp_path / 'output' / 'results.db'))
+    assert list(zip(df['level'], df['alpha'])) == [(0, 2.0), (0, 3.0), (1, 2.0)]
+
+def test_results_memoized(sim_results):
+    sim_results.get('naca0012', 0, 0, 3.0)
+    sim_results.get('naca0012', 0, 0, 3) # Same angle of attack
+    assert sim_results.runs == [([0], [3.0])]
+
+def test_results_unknown_point(sim_results):
+    with pytest.raises(ValueError):
+        sim_results.get('30p-30n', 0, 0, 2.0)
+    with pytest.raises(ValueError):
+        sim_results.get('naca0012', 0, 2, 2.0) # Two refinement levels
+    with pytest.raises(ValueError):
+        sim_results.get('naca0012', 1, 0, 2.0)
+
+################################################################################
+# get_convergence_histories
+################################################################################
+def write_history(tmp_path, level, alpha, fail_flag=0, **history):
+    """
+    Writes the convergence history of a simulation, as written by `write_convergence_history()`.
+    """
+    aoa_out_dir = tmp_path / 'output' / '2d_clean' / 'naca0012' / 'exp_set_0' / f"L{level}" / f"aoa_{alpha}"
+    os.makedirs(aoa_out_dir, exist_ok=True)
+    point_info = {'hierarchy': '2d_clean', 'case': 'naca0012', 'exp_set': 0, 'level': level, 'alpha': alpha, 'fail_flag': fail_flag}
+    np.savez_compressed(aoa_out_dir / f"aoa_{alpha}_history.npz", **{variable: np.asarray(values) for variable, values in history.items()}, **{f"point_{key}": np.asarray(value) for key, value in point_info.items()})
+
+def test_histories_merged(tmp_path):
+    info_file = write_input_file(tmp_path)
+    write_history(tmp_path, 0, 0.0, resrho=[1.0, 0.1, 0.01], cl=[0.0, 0.0, 0.0])
+    write_history(tmp_path, 0, 2.0, fail_flag=1, resrho=[1.0, 0.5], cl=[0.2, 0.25])
+    write_history(tmp_path, 1, 2.0, resrho=[1.0], iterType=np.array(['RK']))
+    histories = get_convergence_histories(info_file)
+    assert list(zip(histories['level'], histories['alpha'], histories['fail_flag'])) == [(0, 0.0, 0), (0, 2.0, 1), (1, 2.0, 0)]
+    assert histories['n_iterations'].tolist() == [3, 2, 1]
+    assert histories['resrho'].shape == (3, 3)
+    np.testing.assert_array_equal(histories['resrho'][1], [1.0, 0.5, np.nan]) # Padded with NaN
+    assert np.isnan(histories['cl'][2]).all() # Not in the history of this simulation
+    assert 'iterType' not in histories # Not numeric
+
+def test_histories_variables(tmp_path):
+    info_file = write_input_file(tmp_path)
+    write_history(tmp_path, 0, 0.0, resrho=[1.0, 0.1], cl=[0.0, 0.0], cd=[0.01, 0.01])
+    assert sorted(get_convergence_histories(info_file, variables=['resrho', 'cd'])) == sorted(['hierarchy', 'case', 'exp_set', 'level', 'alpha', 'fail_flag', 'n_iterations', 'resrho', 'cd'])
+
+def test_no_histories(tmp_path):
+    histories = get_convergence_histories(write_input_file(tmp_path))
+    assert histories['alpha'].shape == (0,)
+    assert histories['n_iterations'].shape == (0,)
+
+def test_write_convergence_history(tmp_path):
+    pytest.importorskip('mpi4py')
+    import mdss.run_sim
+    info_file = write_input_file(tmp_path)
+    sim = mdss.run_sim.run_sim(info_file)
+    history_file = tmp_path / 'output' / '2d_clean' / 'naca0012' / 'exp_set_0' / 'L0' / 'aoa_2.0' / 'aoa_2.0_history.npz'
+    os.makedirs(history_file.parent)
+    history = {'resrho': [1.0, 0.1], 'iterType': ['RK', 'ANK'], 'convergenceInfo': [{'solver': 'ANK'}] * 2} # The dictionaries would need pickling
+    sim.write_convergence_history(history, str(history_file), {'hierarchy': '2d_clean', 'case': 'naca0012', 'exp_set': 0, 'level': 0, 'alpha': 2.0, 'fail_flag': 0}, mdss.run_sim.comm)
+    sim.writer.flush()
+    with np.load(history_file) as saved:
+        assert sorted(saved.files) == sorted(['resrho', 'iterType', 'point_hierarchy', 'point_case', 'point_exp_set', 'point_level', 'point_alpha', 'point_fail_flag'])
+    assert get_convergence_histories(info_file)['resrho'].tolist() == [[1.0, 0.1]]
@@ -0,0 +1,153 @@
+import os
+import math
+
+import pytest
+
+from mdss.watchdog import Watchdog, watchdog_criteria, get_watchdog_criteria, check_history, read_watchdog_stop, watchdog_stop_file
+
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Small windows, so that the short recorded log is checked for stalls and divergence
+criteria = dict(watchdog_criteria, min_iterations=5, stall_iterations=10, stall_decades=0.5, divergence_decades=4.0)
+
+def get_recorded_log(out_dir):
+    """
+    Returns the recorded ADflow iterations of a healthy simulation, printed after the output directory of its angle of attack.
+    """
+    with open(os.path.join(data_dir, 'adflow_iterations.txt'), 'r') as log_file:
+        return log_file.read().replace('OUT_DIR', str(out_dir))
+
+def format_iteration(iteration, residual, cl=0.25, cd=0.0125):
+    """
+    Returns an ADflow iteration line, with the columns of the recorded log.
+    """
+    values = "   ".join('NaN' if math.isnan(value) else f"{value:.16E}" for value in (residual * 0.04, residual * 0.006, cl, cd, residual))
+    return f"      1 {iteration:6d} {2 * iteration:6d}      ANK  1.00E+05  1.00  0.010  {values}\n"
+
+################################################################################
+# check_history
+################################################################################
+def test_history_healthy():
+    residuals = [10.0 ** (-0.1 * iteration) for iteration in range(100)]
+    assert check_history({'totalRes': residuals, 'cl': [0.25] * 100, 'cd': [0.0125] * 100}, criteria) is None
+
+def test_history_nan_residual():
+    assert check_history({'totalRes': [1.0, 0.5, float('nan')]}, criteria) == 'nan'
+
+def test_history_nan_force():
+    assert check_history({'totalRes': [1.0, 0.5, 0.25], 'cl': [0.2, 0.2, float('nan')]}, criteria) == 'nan'
+
+def test_history_stall():
+    residuals = [10.0 ** (-0.1 * iteration) for iteration in range(20)] + [1e-2] * 20 # Plateau over more than 'stall_iterations'
+    assert check_history({'totalRes': residuals}, criteria) == 'stall'
+
+def test_history_divergence():
+    residuals = [10.0 ** (-0.2 * iteration) for iteration in range(20)] + [10.0 ** (-4.0 + 0.5 * iteration) for iteration in range(10)]
+    assert check_history({'totalRes': residuals}, criteria) == 'divergence'
+
+def test_history_before_min_iterations():
+    assert check_history({'totalRes': [1.0, 1.0, 1.0, 1e5]}, criteria) is None
+
+def test_history_resrho_fallback():
+    assert check_history({'resrho': [1.0] * 40}, criteria) == 'stall'
+
+def test_history_without_residual():
+    assert check_history({'cl': [0.2] * 40}, criteria) is None
+
+################################################################################
+# get_watchdog_criteria
+################################################################################
+def test_criteria_off():
+    assert get_watchdog_criteria({'watchdog': 'no'}) is None
+    assert get_watchdog_criteria({}) is None
+
+def test_criteria_overrides():
+    assert get_watchdog_criteria({'watchdog': 'yes', 'watchdog_criteria': {'stall_iterations': 100}}) == dict(watchdog_criteria, stall_iterations=100)
+
+@pytest.mark.parametrize('user_criteria', [{'unknown': 1}, {'stall_decades': -1.0}, {'min_iterations': 'many'}])
+def test_criteria_invalid(user_criteria):
+    with pytest.raises(ValueError):
+        get_watchdog_criteria({'watchdog': 'yes', 'watchdog_criteria': user_criteria})
+
+################################################################################
+# Watchdog.check_log
+################################################################################
+def test_log_healthy(tmp_path):
+    log_file = tmp_path / 'subprocess_out.txt'
+    log_file.write_text(get_recorded_log(tmp_path))
+    watchdog = Watchdog(criteria)
+    assert watchdog.check_log(str(log_file)) is None
+    history = watchdog.logs[str(log_file)]['history']
+    assert len(history['totalres']) == 41 # Iterations 0 to 40
+    assert history['totalres'][0] == pytest.approx(0.3476553402618025e6)
+    assert history['cl'][-1] == pytest.approx(0.2485219117058566)
+    assert history['cd'][-1] == pytest.approx(0.1244342648824304e-1)
+    assert len(history['resrho']) == 41
+
+def test_log_nan(tmp_path):
+    log_file = tmp_path / 'subprocess_out.txt'
+    log_file.write_text(get_recorded_log(tmp_path) + format_iteration(41, float('nan')))
+    stop = Watchdog(criteria).check_log(str(log_file))
+    assert stop['reason'] == 'nan'
+    assert stop['out_dir'] == str(tmp_path)
+    assert stop['iterations'] == 42
+
+def test_log_stall(tmp_path):
+    log_file = tmp_path / 'subprocess_out.txt'
+    watchdog = Watchdog(criteria)
+    log_file.write_text(get_recorded_log(tmp_path))
+    assert watchdog.check_log(str(log_file)) is None
+    with open(log_file, 'a') as log_handle:
+        for iteration in range(41, 60):
+            log_handle.write(format_iteration(iteration, 0.25))
+    assert watchdog.check_log(str(log_file))['reason'] == 'stall'
+
+def test_log_divergence(tmp_path):
+    log_file = tmp_path / 'subprocess_out.txt'
+    text = get_recorded_log(tmp_path) + "".join(format_iteration(41 + iteration, 0.2 * 10.0 ** iteration) for iteration in range(6))
+    log_file.write_text(text)
+    assert Watchdog(criteria).check_log(str(log_file))['reason'] == 'divergence'
+
+def test_log_partial_line(tmp_path):
+    log_file = tmp_path / 'subprocess_out.txt'
+    watchdog = Watchdog(criteria)
+    nan_line = format_iteration(41, float('nan'))
+    log_file.write_text(get_recorded_log(tmp_path) + nan_line[:40])
+    assert watchdog.check_log(str(log_file)) is None # The unfinished line is not read yet
+    with open(log_file, 'a') as log_handle:
+        log_handle.write(nan_line[40:])
+    assert watchdog.check_log(str(log_file))['reason'] == 'nan'
+
+def test_log_new_point_resets_history(tmp_path):
+    log_file = tmp_path / 'subprocess_out.txt'
+    stalled = "".join(format_iteration(41 + iteration, 0.25) for iteration in range(10))
+    next_point = tmp_path / 'aoa_2.0'
+    log_file.write_text(get_recorded_log(tmp_path) + stalled + get_recorded_log(next_point))
+    watchdog = Watchdog(criteria)
+    assert watchdog.check_log(str(log_file)) is None # Only the healthy history of the second point is checked
+    assert watchdog.logs[str(log_file)]['out_dir'] == str(next_point)
+
+def test_log_without_point(tmp_path):
+    log_file = tmp_path / 'subprocess_out.txt'
+    log_file.write_text(get_recorded_log(tmp_path).replace(f"Output directory: {tmp_path}\n", "") + format_iteration(41, float('nan')))
+    assert Watchdog(criteria).check_log(str(log_file)) is None # Iterations of no known angle of attack are not watched
+
+def test_log_missing(tmp_path):
+    assert Watchdog(criteria).check_log(str(tmp_path / 'missing.txt')) is None
+
+def test_log_stops_once(tmp_path):
+    log_file = tmp_path / 'subprocess_out.txt'
+    log_file.write_text(get_recorded_log(tmp_path) + format_iteration(41, float('nan')))
+    watchdog = Watchdog(criteria)
+    assert watchdog.check_log(str(log_file)) is not None
+    assert watchdog.check_log(str(log_file)) is None
+
+def test_write_and_read_stop(tmp_path):
+    log_file = tmp_path / 'subprocess_out.txt'
+    log_file.write_text(get_recorded_log(tmp_path) + format_iteration(41, float('nan')))
+    watchdog = Watchdog(criteria)
+    stop = watchdog.check_log(str(log_file))
+    watchdog.write_stop(stop)
+    assert (tmp_path / watchdog_stop_file).is_file()
+    assert read_watchdog_stop(str(tmp_path)) == stop
+    assert read_watchdog_stop(str(tmp_path / 'missing')) is None